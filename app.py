@@ -1,4 +1,8 @@
-from ecommerce.db import get_db
+import atexit
+import logging
+import os
+from ecommerce.db import get_db, get_product_cache, close_pools, set_instrumentation
+from ecommerce.instrumentation import QueryStats
 from utils.ui import show_main_menu
 from utils.user_management import (
     register_user,
@@ -11,7 +15,9 @@ from utils.user_management import (
 from utils.product_management import (
     create_product,
     view_products,
-    view_my_products
+    view_my_products,
+    search_products,
+    filter_products
 )
 from utils.cart_and_order import (
     view_cart,
@@ -21,11 +27,34 @@ from utils.cart_and_order import (
 import prompt_toolkit.shortcuts as shortcuts
 
 
+def enable_query_stats():
+    """
+    Turn on query instrumentation when the ECOMMERCE_QUERY_STATS environment variable is set.
+
+    Slow statements (over ECOMMERCE_SLOW_QUERY_MS milliseconds, default 100) are logged to
+    ECOMMERCE_QUERY_LOG (default 'queries.log') with their parameters and plan, and a
+    per-statement timing report and the product cache counters are printed when the
+    application exits.
+
+    Returns:
+        QueryStats or None: The installed collector, or None if instrumentation is off.
+    """
+    if not os.environ.get("ECOMMERCE_QUERY_STATS"):
+        return None
+    logging.basicConfig(filename=os.environ.get("ECOMMERCE_QUERY_LOG", "queries.log"), level=logging.WARNING)
+    stats = QueryStats(slow_query_threshold=float(os.environ.get("ECOMMERCE_SLOW_QUERY_MS", "100")) / 1000)
+    set_instrumentation(stats)
+    cache = get_product_cache()
+    atexit.register(lambda: print(f"{stats.report()}\n\nProduct cache: {cache.stats()}"))
+    return stats
+
+
 def main():
     """
     The core function that handles the flow of the e-commerce CLI application, 
     guiding users through registration, login, product management, and order processing.
     """
+    enable_query_stats()
     db = get_db()
     logged_in_user = None
 
@@ -41,6 +70,12 @@ def main():
         elif action == 'market_products' and logged_in_user:
             view_products(logged_in_user)
 
+        elif action == 'search_products' and logged_in_user:
+            search_products(logged_in_user)
+
+        elif action == 'filter_products' and logged_in_user:
+            filter_products(logged_in_user)
+
         elif action == 'view_cart' and logged_in_user:
             view_cart(logged_in_user)
 
@@ -65,6 +100,7 @@ def main():
 
         elif action == 'quit':
             db.close()
+            close_pools()
             shortcuts.button_dialog(
                 title="Goodbye",
                 text="Thank you for using the Marketplace! Goodbye!",
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import time
+from ecommerce.aio import AsyncDatabase, AsyncProduct, AsyncCart
+from ecommerce.db import get_db, close_pools
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.cart import Cart
+
+
+def seed(db_name, shoppers, product_count=100):
+    """
+    Populate the benchmark database with a catalog and one account per shopper.
+
+    Args:
+        db_name (str): The path of the SQLite database file.
+        shoppers (int): Number of buyer accounts.
+        product_count (int): Number of products to create.
+
+    Returns:
+        tuple: The buyer IDs and the product IDs.
+    """
+    db = get_db(db_name)
+    with db.transaction():
+        User.register("seller", "password", db)
+        seller_id = User.get_user_id("seller", db)
+        for i in range(product_count):
+            Product.create_product(f"Product {i}", 10.0 + i, "Description", seller_id, db=db, quantity=100)
+        buyer_ids = []
+        for i in range(shoppers):
+            User.register(f"buyer{i}", "password", db)
+            buyer_ids.append(User.get_user_id(f"buyer{i}", db))
+    product_ids = [row[0] for row in db.fetchall("SELECT id FROM products")]
+    db.close()
+    return buyer_ids, product_ids
+
+
+async def heartbeat(stop, lags, interval=0.005):
+    """Measure how late the event loop wakes a sleeping task, i.e. how long it was blocked."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        lags.append(loop.time() - expected)
+
+
+async def run_sync(db_name, buyer_ids, product_ids, rounds):
+    """Shoppers call the blocking model API directly from their coroutines on one connection."""
+    db = get_db(db_name)
+
+    async def shopper(buyer_id):
+        for i in range(rounds):
+            Product.get_product_by_id(product_ids[i % len(product_ids)], db)
+            Cart(buyer_id, db=db).add_product(product_ids[i % len(product_ids)])
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(shopper(buyer_id) for buyer_id in buyer_ids))
+    db.close()
+
+
+async def run_async(database, buyer_ids, product_ids, rounds):
+    """Shoppers await the `ecommerce.aio` facade."""
+    products = AsyncProduct(database)
+
+    async def shopper(buyer_id):
+        cart = AsyncCart(buyer_id, database)
+        for i in range(rounds):
+            await products.get_product_by_id(product_ids[i % len(product_ids)])
+            await cart.add_product(product_ids[i % len(product_ids)])
+
+    await asyncio.gather(*(shopper(buyer_id) for buyer_id in buyer_ids))
+
+
+async def measure(label, workload, operations):
+    """Run a workload alongside a heartbeat and print throughput and worst loop stall."""
+    stop = asyncio.Event()
+    lags = []
+    beat = asyncio.create_task(heartbeat(stop, lags))
+    start = time.perf_counter()
+    await workload
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    print(f"{label:<6} {operations / elapsed:>8.0f} ops/s   worst event-loop stall {max(lags, default=0) * 1000:>8.1f} ms")
+
+
+async def main(shoppers=128, rounds=20):
+    print(f"{shoppers} concurrent shopper tasks x {rounds} rounds (product read + add to cart)")
+    operations = shoppers * rounds * 2
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_name = os.path.join(tmpdir, "bench.db")
+        buyer_ids, product_ids = seed(db_name, shoppers)
+        await measure("sync", run_sync(db_name, buyer_ids, product_ids, rounds), operations)
+        close_pools()
+        async with AsyncDatabase(db_name, max_workers=8) as database:
+            await measure("aio", run_async(database, buyer_ids, product_ids, rounds), operations)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from PIL import Image, ImageDraw
+from ecommerce.db import MIGRATIONS, Database, migrate
+from ecommerce.product import Product
+from utils.ascii import convert_image_to_ascii
+
+# A full summary listing, which reads every page of the products table.
+LISTING = "SELECT id, name, price, quantity FROM products ORDER BY id"
+
+
+def make_art(rng):
+    """Render a random picture of ellipses to ASCII art at the width the application uses."""
+    image = Image.new("L", (400, 300), rng.randint(0, 255))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randint(0, 360), rng.randint(0, 260)
+        draw.ellipse((x, y, x + rng.randint(20, 200), y + rng.randint(20, 150)), fill=rng.randint(0, 255))
+    return convert_image_to_ascii(image, new_width=100)
+
+
+def timed(func, repeat=5):
+    """Return the best wall time of several calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def measure(path, label):
+    """Print the file size, the time of a full listing and of reading art through the model."""
+    connection = sqlite3.connect(path)
+    db = Database(connection, connection.cursor())
+    listing = timed(lambda: connection.execute(LISTING).fetchall())
+    details = timed(lambda: [Product.get_ascii_art(product_id, db) for product_id in range(1, 1001)])
+    size = os.path.getsize(path) / 2 ** 20
+    print(f"{label:<14} {size:>8.1f} MiB {listing:>10.1f} ms {details:>15.1f} ms")
+    connection.close()
+
+
+def main(product_count=20000, distinct_images=200):
+    """
+    Build a catalog with ASCII art stored inline in `products`, as before migration 5, then
+    migrate it to compressed, deduplicated out-of-line storage and compare.
+    """
+    rng = random.Random(42)
+    images = [make_art(rng) for _ in range(distinct_images)]
+    print(f"{product_count} products sharing {distinct_images} images of ~{len(images[0])} characters")
+    print(f"{'storage':<14} {'file size':>12} {'full listing':>13} {'1000 art reads':>18}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "bench.db")
+        connection = sqlite3.connect(path)
+        for migration in MIGRATIONS[:4]:
+            migration(connection.cursor())
+        connection.execute("PRAGMA user_version = 4")
+        connection.executemany('''
+            INSERT INTO products (name, price, description, user_id, ascii_art, quantity)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', ((f"Product {i}", 1.0 + i % 100, "Description", 1, rng.choice(images), i % 10)
+              for i in range(product_count)))
+        connection.commit()
+        connection.close()
+
+        # Read the inline layout directly: the models only understand the current schema.
+        connection = sqlite3.connect(path)
+        listing = timed(lambda: connection.execute(LISTING).fetchall())
+        details = timed(lambda: [connection.execute("SELECT ascii_art FROM products WHERE id = ?", (i,)).fetchone()
+                                 for i in range(1, 1001)])
+        size = os.path.getsize(path) / 2 ** 20
+        print(f"{'inline':<14} {size:>8.1f} MiB {listing:>10.1f} ms {details:>15.1f} ms")
+
+        start = time.perf_counter()
+        migrate(connection)
+        connection.execute("VACUUM")
+        print(f"(migration and VACUUM took {time.perf_counter() - start:.1f}s)")
+        connection.close()
+        measure(path, "out-of-line")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
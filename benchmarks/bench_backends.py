@@ -0,0 +1,67 @@
+import os
+import tempfile
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.memory import MemoryDatabase
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.cart import Cart
+from ecommerce.order import Order
+
+
+def simulate(db, shoppers, products_per_seller=5, items_per_cart=3):
+    """
+    Run a load simulation through the model API: sellers list products, shoppers browse,
+    fill their carts and check out, then review their orders.
+
+    Args:
+        db: The database to run on, a `Database` or a `MemoryDatabase`.
+        shoppers (int): Number of shoppers, each of whom is also a seller.
+        products_per_seller (int): Products listed by each shopper.
+        items_per_cart (int): Distinct products each shopper buys.
+
+    Returns:
+        int: The number of model calls made.
+    """
+    calls = 0
+    user_ids = []
+    for i in range(shoppers):
+        User.register(f"shopper{i}", "password", db)
+        user_ids.append(User.get_user_id(f"shopper{i}", db))
+        for n in range(products_per_seller):
+            Product.create_product(f"Product {i}-{n}", 1.0 + n, "Description", user_ids[-1], db=db, quantity=100)
+        calls += 2 + products_per_seller
+    product_ids = [row[0] for row in Product.get_all_products(db)]
+    for i, user_id in enumerate(user_ids):
+        User.login(f"shopper{i}", "password", db)
+        cart = Cart(user_id, db=db)
+        for n in range(items_per_cart):
+            product_id = product_ids[(i * 7 + n * 13) % len(product_ids)]
+            Product.get_product_by_id(product_id, db)
+            cart.add_product(product_id)
+        cart.checkout()
+        Order.get_orders_by_user(user_id, db)
+        calls += 3 + 2 * items_per_cart
+    return calls
+
+
+def main(shoppers=500):
+    print(f"{shoppers} shoppers through the model API")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        backends = [
+            ("sqlite file", lambda: get_db(os.path.join(tmpdir, "bench.db"), profile="throughput", replicas=False)),
+            ("sqlite :memory:", lambda: get_db(":memory:")),
+            ("memory engine", MemoryDatabase),
+        ]
+        for label, make_db in backends:
+            db = make_db()
+            start = time.perf_counter()
+            calls = simulate(db, shoppers)
+            elapsed = time.perf_counter() - start
+            db.close()
+            print(f"{label:<16} {elapsed:>7.3f}s   calls/s {calls / elapsed:>9.0f}")
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import random
+import tempfile
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.user import User
+from ecommerce.product import Product
+
+
+def main(product_count=5000, reads=50000):
+    """
+    Open product details with a skewed popularity (a few hot products get most views),
+    with and without the product cache.
+    """
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = get_db(os.path.join(tmpdir, "bench.db"), profile="throughput")
+        User.register("seller", "password", db)
+        seller_id = User.get_user_id("seller", db)
+        with db.transaction():
+            for i in range(product_count):
+                Product.create_product(f"Product {i}", 1.0 + i, "Description", seller_id, db=db, quantity=5)
+        views = [min(int(rng.paretovariate(1.2)), product_count) for _ in range(reads)]
+
+        print(f"{reads} product detail reads over {product_count} products")
+        for label, use_cache in (("no cache", False), ("LRU cache", True)):
+            start = time.perf_counter()
+            for product_id in views:
+                Product.get_product_by_id(product_id, db, include_ascii_art=False, use_cache=use_cache)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<10} {reads / elapsed:>9.0f} reads/s")
+        print(f"cache stats: {db.product_cache.stats()}")
+        db.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import time
+from ecommerce.cart import Cart
+from ecommerce.db import get_db, close_pools
+from ecommerce.user import User
+
+
+def timed(func, repeat=5):
+    """Return the best wall time of several calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(product_count=1000):
+    """
+    Restore carts of 10 to 1000 products on the durable profile with one `add_product` call
+    per product (one commit each) versus one `Cart.add_many` call, and update the quantities
+    of the same carts with `set_quantities`.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = get_db(os.path.join(tmpdir, "bench.db"))
+        User.register("seller", "password", db)
+        User.register("buyer", "password", db)
+        seller_id = User.get_user_id("seller", db)
+        db.storage.insert_products([(f"Product {i}", 1.0 + i % 100, "Description", seller_id, None, 10 ** 6)
+                                    for i in range(product_count)])
+        cart = Cart(User.get_user_id("buyer", db), db)
+
+        def one_by_one(ids):
+            cart.clear_cart()
+            for product_id in ids:
+                cart.add_product(product_id, 1)
+
+        def batched(ids):
+            cart.clear_cart()
+            cart.add_many({product_id: 1 for product_id in ids})
+
+        print("Cart restore on the durable profile (best of 5)")
+        print(f"{'items':>6} {'add_product':>13} {'add_many':>10} {'set_quantities':>16}")
+        for size in (10, 100, 1000):
+            ids = list(range(1, min(size, product_count) + 1))
+            single = timed(lambda: one_by_one(ids))
+            batch = timed(lambda: batched(ids))
+            update = timed(lambda: cart.set_quantities({product_id: 2 for product_id in ids}))
+            print(f"{size:>6} {single:>10.2f} ms {batch:>7.2f} ms {update:>13.2f} ms")
+        db.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
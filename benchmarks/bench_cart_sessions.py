@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ecommerce.cart import Cart
+from ecommerce.cart_sessions import CartSessionStore
+from ecommerce.db import get_db, close_pools
+from ecommerce.user import User
+
+
+def run(carts, adds, products):
+    """Have every cart add `adds` products from a thread each and return adds per second."""
+    def shop(cart):
+        for i in range(adds):
+            cart.add_product(1 + i % products, 1)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(carts)) as executor:
+        list(executor.map(shop, carts))
+    return len(carts) * adds / (time.perf_counter() - start)
+
+
+def main(adds=2000, products=50):
+    """
+    Add-to-cart throughput of 1 and 8 concurrent shoppers on the durable profile with the
+    write-through `Cart` (one commit per add) versus carts from a `CartSessionStore` flushing
+    every 5 seconds. The session store's final flush is timed separately.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = get_db(os.path.join(tmpdir, "bench.db"))
+        User.register("seller", "password", db)
+        seller_id = User.get_user_id("seller", db)
+        db.storage.insert_products([(f"Product {i}", 1.0, "Description", seller_id, None, 10 ** 6)
+                                    for i in range(products)])
+        user_ids = []
+        for i in range(8):
+            User.register(f"buyer{i}", "password", db)
+            user_ids.append(User.get_user_id(f"buyer{i}", db))
+
+        print(f"Add-to-cart on the durable profile, {adds} adds per shopper")
+        print(f"{'shoppers':>8} {'write-through':>16} {'session store':>16} {'final flush':>12}")
+        for shoppers in (1, 8):
+            for user_id in user_ids:
+                Cart.clear_cart_by_user(user_id, db)
+            direct = run([Cart(user_id, db) for user_id in user_ids[:shoppers]], adds, products)
+            for user_id in user_ids:
+                Cart.clear_cart_by_user(user_id, db)
+            store = CartSessionStore(db)
+            buffered = run([store.cart(user_id) for user_id in user_ids[:shoppers]], adds, products)
+            start = time.perf_counter()
+            store.close()
+            flush = (time.perf_counter() - start) * 1000
+            print(f"{shoppers:>8} {direct:>11.0f} /s {buffered:>11.0f} /s {flush:>9.2f} ms")
+        db.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.cart import Cart
+from ecommerce.checkout import CheckoutQueue
+from ecommerce.product import Product
+from ecommerce.user import User
+
+
+def seed(db, carts, product_count=50):
+    """Create a catalog and `carts` buyers with three products each in their cart; return the buyer IDs."""
+    with db.transaction():
+        User.register("seller", "password", db)
+        seller_id = User.get_user_id("seller", db)
+        for i in range(product_count):
+            Product.create_product(f"Product {i}", 10.0 + i, "Description", seller_id, db=db, quantity=10 ** 9)
+        buyer_ids = []
+        for i in range(carts):
+            User.register(f"buyer{i}", "password", db)
+            buyer_ids.append(User.get_user_id(f"buyer{i}", db))
+            for n in range(3):
+                Cart(buyer_ids[-1], db).add_product(1 + (i + n * 7) % product_count, 1 + n)
+    return buyer_ids
+
+
+def run(db_name, shoppers, checkouts_per_shopper, grouped):
+    """
+    Have `shoppers` threads check out pre-filled carts through one shared Database, each
+    checkout committed on its own or through a `CheckoutQueue`.
+
+    Returns:
+        tuple: Checkouts per second and the number of commits.
+    """
+    db = get_db(db_name)
+    buyer_ids = seed(db, shoppers * checkouts_per_shopper)
+    checkouts = CheckoutQueue(db) if grouped else None
+    checkout = checkouts.checkout if grouped else lambda buyer_id: Cart(buyer_id, db).checkout()
+
+    def shopper(index):
+        for buyer_id in buyer_ids[index::shoppers]:
+            checkout(buyer_id)
+
+    threads = [threading.Thread(target=shopper, args=(i,)) for i in range(shoppers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    commits = checkouts.batches if grouped else len(buyer_ids)
+    if grouped:
+        checkouts.close()
+    db.close()
+    return len(buyer_ids) / elapsed, commits
+
+
+def main(checkouts=640):
+    """
+    Check out carts from 1, 8 and 64 concurrent shopper threads on a file database with the
+    durable pragma profile (a full fsync per commit), committing each checkout on its own
+    versus group-committing them through `CheckoutQueue`.
+    """
+    print(f"{checkouts} checkouts of 3-item carts, durable profile")
+    print(f"{'shoppers':>8} {'mode':<14} {'checkouts/s':>12} {'commits':>8}")
+    for shoppers in (1, 8, 64):
+        for label, grouped in (("one by one", False), ("group commit", True)):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                rate, commits = run(os.path.join(tmpdir, "bench.db"), shoppers, checkouts // shoppers, grouped)
+                print(f"{shoppers:>8} {label:<14} {rate:>12.0f} {commits:>8}")
+                close_pools()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,57 @@
+import csv
+import sys
+import time
+import tracemalloc
+from ecommerce.db import get_db
+from ecommerce.exporter import export_orders
+from ecommerce.storage import ORDER_COLUMNS
+
+
+class NullFile:
+    """A text file that discards what is written to it, so only the export itself uses memory."""
+
+    def write(self, text):
+        return len(text)
+
+
+def export_with_fetchall(file, db):
+    """Export every order to CSV the simple way: read the whole table, then write it."""
+    rows = db.fetchall(f"SELECT {', '.join(ORDER_COLUMNS)} FROM orders ORDER BY id")
+    writer = csv.writer(file)
+    writer.writerow(ORDER_COLUMNS)
+    writer.writerows(rows)
+    return len(rows)
+
+
+def measure(label, func):
+    """Print the wall time of one run and the peak traced memory of another."""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<10} {elapsed:>7.2f} s {peak / 2 ** 20:>9.1f} MiB")
+
+
+def main(row_count=1000000):
+    """
+    Export a million orders to CSV with a `fetchall` of the whole table and with the
+    streaming `export_orders`, reporting time (without tracemalloc) and peak memory.
+    """
+    db = get_db(":memory:")
+    db.write('''
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+        INSERT INTO orders (user_id, order_details, total, status)
+        SELECT i % 1000 + 1, 'Product ' || i || ' x1', i % 500 + 0.5, 'pending' FROM n
+    ''', (row_count,))
+    print(f"Exporting {row_count} orders to CSV")
+    print(f"{'method':<10} {'time':>9} {'peak memory':>13}")
+    measure("fetchall", lambda: export_with_fetchall(NullFile(), db))
+    measure("streaming", lambda: export_orders(NullFile(), db=db))
+    db.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
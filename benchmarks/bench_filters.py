@@ -0,0 +1,66 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.product import Product
+
+# (label, filters passed to Product.browse)
+QUERIES = [
+    ("price 40-45, by price", {"min_price": 40.0, "max_price": 45.0, "sort": "price"}),
+    ("price 40-45, newest", {"min_price": 40.0, "max_price": 45.0}),
+    ("in stock, by name", {"in_stock": True, "sort": "name"}),
+    ("in stock, price desc", {"in_stock": True, "sort": "price_desc"}),
+    ("seller, in stock, <50", {"seller_id": 7, "in_stock": True, "max_price": 50.0, "sort": "price"}),
+]
+
+
+def python_side(products, min_price=None, max_price=None, seller_id=None, in_stock=False, sort="newest"):
+    """Filter and sort the full listing in Python, the way the menu would without `browse`."""
+    rows = [p for p in products
+            if (min_price is None or p[2] >= min_price) and (max_price is None or p[2] <= max_price)
+            and (seller_id is None or p[4] == seller_id) and (not in_stock or p[6] > 0)]
+    keys = {"newest": lambda p: -p[0], "price": lambda p: (p[2], p[0]),
+            "price_desc": lambda p: (-p[2], -p[0]), "name": lambda p: (p[1], p[0])}
+    return sorted(rows, key=keys[sort])[:20]
+
+
+def timed(func, repeat=5):
+    """Return the best wall time of several calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(product_count=200000):
+    """
+    Time the first page of several filtered, sorted listings with `Product.browse` against
+    loading every product and filtering and sorting in Python.
+    """
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = get_db(os.path.join(tmpdir, "bench.db"), profile="throughput", replicas=False)
+        with db.transaction():
+            db.executemany('''
+                INSERT INTO products (name, price, description, user_id, quantity)
+                VALUES (?, ?, ?, ?, ?)
+            ''', ((f"Product {rng.randrange(10**6)}", round(rng.uniform(1, 500), 2), "Description",
+                   rng.randint(1, 1000), rng.choice([0, 0, 1, 5, 20])) for _ in range(product_count)))
+        db.write("ANALYZE")
+
+        print(f"First page of 20 from {product_count} products (ms)")
+        print(f"{'query':<24} {'python-side':>12} {'browse':>9}")
+        for label, filters in QUERIES:
+            slow = timed(lambda: python_side(Product.get_all_products(db), **filters), repeat=1)
+            fast = timed(lambda: Product.browse(db=db, **filters))
+            print(f"{label:<24} {slow:>12.1f} {fast:>9.3f}")
+        db.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,50 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.product import Product
+from ecommerce.user import User
+
+
+def timed(func, repeat=20):
+    """Return the best wall time of several calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(product_count=20000):
+    """
+    Read batches of 10 to 1000 random products with one `get_product_by_id` call each
+    (N+1 queries) versus one `Product.get_many` call, bypassing the product cache, and with
+    `get_many` served from a warm cache.
+    """
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = get_db(os.path.join(tmpdir, "bench.db"), profile="throughput")
+        User.register("seller", "password", db)
+        seller_id = User.get_user_id("seller", db)
+        db.storage.insert_products([(f"Product {i}", 1.0 + i % 100, "Description", seller_id, None, 5)
+                                    for i in range(product_count)])
+
+        print(f"Batch reads over {product_count} products (best of 20)")
+        print(f"{'batch':>6} {'one by one':>12} {'get_many':>10} {'get_many, cached':>18}")
+        for size in (10, 100, 1000):
+            ids = rng.sample(range(1, product_count + 1), size)
+            one_by_one = timed(lambda: [Product.get_product_by_id(product_id, db, include_ascii_art=False,
+                                                                  use_cache=False) for product_id in ids])
+            batched = timed(lambda: Product.get_many(ids, db, include_ascii_art=False, use_cache=False))
+            Product.get_many(ids, db, include_ascii_art=False)
+            cached = timed(lambda: Product.get_many(ids, db, include_ascii_art=False))
+            print(f"{size:>6} {one_by_one:>9.2f} ms {batched:>7.2f} ms {cached:>15.2f} ms")
+        db.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
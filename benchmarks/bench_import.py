@@ -0,0 +1,66 @@
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.importer import import_products
+
+
+def write_catalog(path, rows, rng):
+    """
+    Write a generated catalog CSV in which about one row in a hundred is invalid.
+    """
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "price", "description", "quantity"])
+        for i in range(rows):
+            price = "n/a" if rng.random() < 0.01 else f"{rng.uniform(1, 500):.2f}"
+            writer.writerow([f"Product {i}", price, f"Description of product {i}", rng.randint(0, 50)])
+
+
+def main(rows=100000):
+    """
+    Load a generated catalog with `import_products` at several batch sizes, against inserting
+    the same rows one `create_product` call (and one commit) at a time.
+    """
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        catalog = os.path.join(tmpdir, "catalog.csv")
+        write_catalog(catalog, rows, rng)
+        print(f"Importing {rows} rows")
+
+        db = get_db(os.path.join(tmpdir, "per_row.db"))
+        User.register("seller", "password", db)
+        seller_id = User.get_user_id("seller", db)
+        sample = min(rows, 5000)
+        with open(catalog, newline="") as file:
+            records = list(csv.DictReader(file))[:sample]
+        start = time.perf_counter()
+        for record in records:
+            try:
+                Product.create_product(record["name"], float(record["price"]), record["description"],
+                                       seller_id, db=db, quantity=int(record["quantity"]))
+            except ValueError:
+                pass
+        elapsed = time.perf_counter() - start
+        print(f"{'create_product per row':<24} {sample / elapsed:>9.0f} rows/s (first {sample} rows)")
+        db.close()
+
+        for batch_size in (100, 1000, 10000):
+            db = get_db(os.path.join(tmpdir, f"batch_{batch_size}.db"))
+            User.register("seller", "password", db)
+            seller_id = User.get_user_id("seller", db)
+            report = import_products(catalog, seller_id, batch_size=batch_size,
+                                     error_path=os.path.join(tmpdir, "errors.csv"), db=db)
+            print(f"{'batch size ' + str(batch_size):<24} {report.rows_per_second:>9.0f} rows/s "
+                  f"({report.imported} imported, {report.rejected} rejected)")
+            db.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.cart import Cart
+from ecommerce.inventory import OutOfStockError
+from ecommerce.product import Product
+from ecommerce.user import User
+
+
+def seed(db_name, buyers, stock):
+    """Create a seller with one hot product and the buyer accounts; return their IDs."""
+    db = get_db(db_name)
+    with db.transaction():
+        User.register("seller", "password", db)
+        Product.create_product("Hot product", 10.0, "Everyone wants one", User.get_user_id("seller", db),
+                               db=db, quantity=stock)
+        for i in range(buyers):
+            User.register(f"buyer{i}", "password", db)
+    product_id = db.fetchone("SELECT id FROM products")[0]
+    buyer_ids = [User.get_user_id(f"buyer{i}", db) for i in range(buyers)]
+    db.close()
+    return product_id, buyer_ids
+
+
+def checkout_read_then_write(cart, product_id):
+    """The check the UI used to rely on: read the stock, then write it back decremented."""
+    line = cart.view_cart()[0]
+    quantity = Product.get_product_by_id(product_id, cart.db, use_cache=False).quantity
+    if quantity < line.quantity:
+        raise OutOfStockError(product_id, line.quantity, line.name)
+    # Another buyer may commit between the read above and this transaction: a lost update.
+    with cart.db.transaction():
+        cart.db.write("UPDATE products SET quantity = ? WHERE id = ?", (quantity - line.quantity, product_id))
+        cart.db.storage.insert_order(cart.user_id, f"{line.name} (x{line.quantity})",
+                                     line.price * line.quantity, "pending")
+        cart.clear_cart()
+
+
+def run(db_name, buyers, stock, attempts, conditional):
+    """
+    Have every buyer thread repeatedly put one unit of the hot product in its cart and check
+    out, each on its own connection, until the attempts run out.
+
+    Returns:
+        tuple: Successful checkouts, checkout attempts per second, and units sold beyond the stock.
+    """
+    product_id, buyer_ids = seed(db_name, buyers, stock)
+    sold = []
+    lock = threading.Lock()
+
+    def buyer(buyer_id):
+        db = get_db(db_name)
+        cart = Cart(buyer_id, db=db)
+        done = 0
+        for _ in range(attempts):
+            cart.add_product(product_id)
+            try:
+                if conditional:
+                    cart.checkout()
+                else:
+                    checkout_read_then_write(cart, product_id)
+                done += 1
+            except OutOfStockError:
+                cart.clear_cart()
+        db.close()
+        with lock:
+            sold.append(done)
+
+    threads = [threading.Thread(target=buyer, args=(buyer_id,)) for buyer_id in buyer_ids]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = sum(sold)
+    return total, buyers * attempts / elapsed, total - stock
+
+
+def main(buyers=32, stock=500, attempts=30):
+    """
+    Race many buyers for a product with less stock than they want, checking stock in Python
+    before writing versus reserving it with the conditional `UPDATE ... WHERE quantity >= ?`.
+    """
+    print(f"{buyers} buyer threads x {attempts} checkouts of 1 unit, {stock} units in stock")
+    for label, conditional in (("read-then-write", False), ("conditional", True)):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sold, rate, oversold = run(os.path.join(tmpdir, "bench.db"), buyers, stock, attempts, conditional)
+            print(f"{label:<16} sold {sold:>5}   attempts/s {rate:>7.0f}   oversold {oversold:>5}")
+            close_pools()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
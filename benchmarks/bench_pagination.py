@@ -0,0 +1,51 @@
+import os
+import tempfile
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.product import Product
+
+CATALOG_SIZES = [10000, 100000, 300000]
+
+
+def seed(db, product_count, ascii_art_size=2000):
+    """
+    Fill the catalog with products carrying realistic ASCII art and descriptions.
+
+    Args:
+        db (Database): The database to fill.
+        product_count (int): Number of products to create.
+        ascii_art_size (int): Characters of ASCII art per product.
+    """
+    art = "#" * ascii_art_size
+    with db.transaction():
+        db.storage.insert_products([(f"Product {i}", 1.0 + i % 100, "Description " * 20, 1, art, i % 10)
+                                    for i in range(product_count)])
+
+
+def timed(func, repeat=3):
+    """Return the best wall time of several calls, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    print(f"{'catalog':>8} {'get_all_products':>17} {'first page':>11} {'deep page':>10} {'with total':>11}  (ms)")
+    for size in CATALOG_SIZES:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = get_db(os.path.join(tmpdir, "bench.db"), profile="throughput", replicas=False)
+            seed(db, size)
+            full = timed(lambda: Product.get_all_products(db), repeat=1)
+            first = timed(lambda: Product.get_product_page(db=db))
+            deep = timed(lambda: Product.get_product_page(after_id=size - 100, db=db))
+            total = timed(lambda: Product.get_product_page(include_total=True, db=db))
+            db.close()
+            close_pools()
+        print(f"{size:>8} {full:>17.1f} {first:>11.3f} {deep:>10.3f} {total:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
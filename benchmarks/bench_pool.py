@@ -0,0 +1,78 @@
+import os
+import tempfile
+import time
+from ecommerce.db import Database, get_db, open_connection, close_pools
+from ecommerce.user import User
+from ecommerce.product import Product
+
+
+def unpooled_db(db_name):
+    """
+    Open a fresh connection the way `get_db()` did before the connection pool existed.
+
+    Args:
+        db_name (str): The path of the SQLite database file.
+
+    Returns:
+        Database: A `Database` wrapping a private connection.
+    """
+    connection = open_connection(db_name)
+    return Database(connection, connection.cursor())
+
+
+def seed(db_name, product_count=200):
+    """
+    Populate the benchmark database with one seller and a small catalog.
+
+    Args:
+        db_name (str): The path of the SQLite database file.
+        product_count (int): Number of products to create.
+
+    Returns:
+        None
+    """
+    db = get_db(db_name)
+    User.register("seller", "password", db)
+    user_id = User.get_user_id("seller", db)
+    for i in range(product_count):
+        Product.create_product(f"Product {i}", 10.0 + i, "Description", user_id, db=db, quantity=5)
+    db.close()
+
+
+def measure(label, open_db, db_name, iterations):
+    """
+    Time a typical UI action (user lookup plus catalog listing) with a given connection factory.
+
+    Args:
+        label (str): The name printed next to the result.
+        open_db (callable): A function taking `db_name` and returning a `Database`.
+        db_name (str): The path of the SQLite database file.
+        iterations (int): Number of actions to time.
+
+    Returns:
+        float: The mean latency per action in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        db = open_db(db_name)
+        User.get_user_id("seller", db)
+        Product.get_all_products(db)
+        db.close()
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / iterations * 1e6
+    print(f"{label:<10} {iterations} calls in {elapsed:.3f}s  ({per_call:.1f} us/call)")
+    return per_call
+
+
+def main(iterations=2000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_name = os.path.join(tmpdir, "bench.db")
+        seed(db_name)
+        before = measure("unpooled", unpooled_db, db_name, iterations)
+        after = measure("pooled", get_db, db_name, iterations)
+        close_pools()
+    print(f"speedup    {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import threading
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.cart import Cart
+
+# (label, reader profile, writer profile). None is SQLite's default rollback journal,
+# which is how get_db() opened connections before pragma profiles existed.
+SCENARIOS = [
+    ("default", None, None),
+    ("durable", "durable", "durable"),
+    ("throughput", "throughput", "throughput"),
+    ("readonly", "readonly", "throughput"),
+]
+
+
+def seed(db_name, product_count=200):
+    """
+    Populate the benchmark database with a seller, a buyer and a small catalog.
+
+    Args:
+        db_name (str): The path of the SQLite database file.
+        product_count (int): Number of products to create.
+
+    Returns:
+        tuple: The buyer's user ID and the list of product IDs.
+    """
+    db = get_db(db_name, profile=None)
+    User.register("seller", "password", db)
+    User.register("buyer", "password", db)
+    seller_id = User.get_user_id("seller", db)
+    buyer_id = User.get_user_id("buyer", db)
+    with db.transaction():
+        for i in range(product_count):
+            Product.create_product(f"Product {i}", 10.0 + i, "Description", seller_id, db=db, quantity=5)
+    db.cursor.execute("SELECT id FROM products")
+    product_ids = [row[0] for row in db.cursor.fetchall()]
+    db.close()
+    return buyer_id, product_ids
+
+
+def run_scenario(db_name, reader_profile, writer_profile, readers, duration):
+    """
+    Run catalog readers and one cart writer concurrently for a fixed time.
+
+    Args:
+        db_name (str): The path of the SQLite database file.
+        reader_profile (str): The pragma profile of the reader connections.
+        writer_profile (str): The pragma profile of the writer connection.
+        readers (int): Number of reader threads.
+        duration (float): Seconds to run.
+
+    Returns:
+        tuple: Reads per second and writes per second.
+    """
+    buyer_id, product_ids = seed(db_name)
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0}
+    lock = threading.Lock()
+
+    def reader():
+        db = get_db(db_name, profile=reader_profile, replicas=False)
+        done = 0
+        while not stop.is_set():
+            Product.get_all_products(db)
+            done += 1
+        db.close()
+        with lock:
+            counts["reads"] += done
+
+    def writer():
+        db = get_db(db_name, profile=writer_profile, replicas=False)
+        cart = Cart(buyer_id, db=db)
+        done = 0
+        while not stop.is_set():
+            cart.add_product(product_ids[done % len(product_ids)])
+            done += 1
+        db.close()
+        with lock:
+            counts["writes"] += done
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts["reads"] / duration, counts["writes"] / duration
+
+
+def main(readers=4, duration=2.0):
+    print(f"{readers} reader threads + 1 writer thread, {duration:.0f}s per profile")
+    for label, reader_profile, writer_profile in SCENARIOS:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_name = os.path.join(tmpdir, "bench.db")
+            reads, writes = run_scenario(db_name, reader_profile, writer_profile, readers, duration)
+            close_pools()
+        print(f"{label:<11} reads/s {reads:>9.0f}   writes/s {writes:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
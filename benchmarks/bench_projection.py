@@ -0,0 +1,61 @@
+import os
+import tempfile
+import time
+import tracemalloc
+from ecommerce.db import get_db, close_pools
+from ecommerce.product import Product
+
+
+def seed(db, product_count, sellers, ascii_art_size):
+    """
+    Fill the catalog with products carrying ASCII art and a description.
+
+    Args:
+        db (Database): The database to fill.
+        product_count (int): Number of products to create.
+        sellers (int): Number of sellers the products are spread over.
+        ascii_art_size (int): Characters of ASCII art per product.
+    """
+    art = ("#" * 99 + "\n") * (ascii_art_size // 100)
+    with db.transaction():
+        db.storage.insert_products([(f"Product {i}", 1.0 + i % 100, f"Description of product {i} " * 10,
+                                     1 + i % sellers, art, i % 10) for i in range(product_count)])
+
+
+def measure(func):
+    """
+    Call a listing function once under tracemalloc.
+
+    Returns:
+        tuple: The peak traced memory in MiB and the elapsed time in milliseconds.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del rows
+    return peak / 2 ** 20, elapsed * 1000
+
+
+def main(product_count=10000, sellers=10, ascii_art_size=2000):
+    print(f"{product_count} products with {ascii_art_size} characters of ASCII art each")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = get_db(os.path.join(tmpdir, "bench.db"), profile="throughput", replicas=False)
+        seed(db, product_count, sellers, ascii_art_size)
+        scenarios = [
+            ("get_all_products", lambda: Product.get_all_products(db)),
+            ("get_all_products(summary)", lambda: Product.get_all_products(db, summary=True)),
+            ("get_products_by_user_id", lambda: Product.get_products_by_user_id(1, db)),
+            ("get_products_by_user_id(summary)", lambda: Product.get_products_by_user_id(1, db, summary=True)),
+        ]
+        for label, func in scenarios:
+            peak, elapsed = measure(func)
+            print(f"{label:<34} peak {peak:>8.2f} MiB   {elapsed:>8.1f} ms")
+        db.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
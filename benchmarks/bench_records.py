@@ -0,0 +1,77 @@
+import gc
+import sqlite3
+import sys
+import time
+import tracemalloc
+from ecommerce.records import ProductSummary, row_factory
+
+
+class SlotsSummary:
+    """A `__slots__` class with the fields of `ProductSummary`, for comparison."""
+    __slots__ = ("id", "name", "price", "quantity")
+
+    def __init__(self, id, name, price, quantity):
+        self.id = id
+        self.name = name
+        self.price = price
+        self.quantity = quantity
+
+
+def dict_factory(cursor, row):
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+def slots_factory(cursor, row):
+    return SlotsSummary(*row)
+
+
+# (label, row factory)
+FACTORIES = [
+    ("tuple", None),
+    ("ProductSummary", row_factory(ProductSummary)),
+    ("__slots__ class", slots_factory),
+    ("sqlite3.Row", sqlite3.Row),
+    ("dict", dict_factory),
+]
+
+
+def fetch(connection, factory):
+    """Fetch every product summary with a row factory."""
+    cursor = connection.execute("SELECT id, name, price, quantity FROM products")
+    cursor.row_factory = factory
+    return cursor.fetchall()
+
+
+def memory_held(connection, factory):
+    """Return the memory, in MiB, held by the fetched rows."""
+    gc.collect()
+    tracemalloc.start()
+    rows = fetch(connection, factory)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del rows
+    return held / 2 ** 20
+
+
+def main(row_count=1000000):
+    """
+    Fetch a million product summaries as plain tuples, named tuple records built by
+    `ecommerce.records.row_factory`, a `__slots__` class, `sqlite3.Row` and dicts.
+    """
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price REAL, quantity INTEGER)")
+    connection.executemany("INSERT INTO products (name, price, quantity) VALUES (?, ?, ?)",
+                           ((f"Product {i}", 1.0 + i % 500, i % 10) for i in range(row_count)))
+    print(f"Fetching {row_count} rows (time without tracemalloc; memory held by the result list)")
+    print(f"{'row type':<16} {'time':>8} {'memory':>11}")
+    for label, factory in FACTORIES:
+        start = time.perf_counter()
+        rows = fetch(connection, factory)
+        elapsed = time.perf_counter() - start
+        del rows
+        print(f"{label:<16} {elapsed * 1000:>5.0f} ms {memory_held(connection, factory):>7.1f} MiB")
+    connection.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
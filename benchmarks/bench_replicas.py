@@ -0,0 +1,94 @@
+import os
+import tempfile
+import threading
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.cart import Cart
+
+
+def seed(db_name, product_count=200):
+    """
+    Populate the benchmark database with a seller, a buyer and a small catalog.
+
+    Args:
+        db_name (str): The path of the SQLite database file.
+        product_count (int): Number of products to create.
+
+    Returns:
+        tuple: The buyer's user ID and the list of product IDs.
+    """
+    db = get_db(db_name, replicas=False)
+    with db.transaction():
+        User.register("seller", "password", db)
+        User.register("buyer", "password", db)
+        seller_id = User.get_user_id("seller", db)
+        for i in range(product_count):
+            Product.create_product(f"Product {i}", 10.0 + i, "Description", seller_id, db=db, quantity=10 ** 9)
+    buyer_id = User.get_user_id("buyer", db)
+    product_ids = [row[0] for row in db.fetchall("SELECT id FROM products")]
+    db.close()
+    return buyer_id, product_ids
+
+
+def run(db_name, replicas, readers, duration):
+    """
+    Share one Database between catalog reader threads and a checkout writer thread.
+
+    Args:
+        db_name (str): The path of the SQLite database file.
+        replicas (bool): Whether reads are routed to read-only connections.
+        readers (int): Number of reader threads.
+        duration (float): Seconds to run.
+
+    Returns:
+        tuple: Reads per second and checkouts per second.
+    """
+    buyer_id, product_ids = seed(db_name)
+    db = get_db(db_name, replicas=replicas)
+    stop = threading.Event()
+    counts = {"reads": 0, "checkouts": 0}
+    lock = threading.Lock()
+
+    def reader():
+        done = 0
+        while not stop.is_set():
+            Product.get_all_products(db)
+            done += 1
+        with lock:
+            counts["reads"] += done
+
+    def writer():
+        cart = Cart(buyer_id, db=db)
+        done = 0
+        while not stop.is_set():
+            cart.add_product(product_ids[done % len(product_ids)])
+            cart.checkout()
+            done += 1
+        with lock:
+            counts["checkouts"] += done
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.close()
+    return counts["reads"] / duration, counts["checkouts"] / duration
+
+
+def main(readers=4, duration=2.0):
+    print(f"{readers} catalog reader threads + 1 checkout thread sharing one Database, {duration:.0f}s each")
+    for label, replicas in (("writer only", False), ("replicas", True)):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            reads, checkouts = run(os.path.join(tmpdir, "bench.db"), replicas, readers, duration)
+            close_pools()
+        print(f"{label:<12} reads/s {reads:>8.0f}   checkouts/s {checkouts:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import os
+import random
+import sys
+import tempfile
+import time
+from ecommerce.db import get_db, close_pools
+from ecommerce.product import Product
+
+ADJECTIVES = ["vintage", "modern", "rustic", "compact", "deluxe", "wireless", "handmade", "portable",
+              "classic", "ergonomic", "waterproof", "foldable", "organic", "premium", "minimalist", "smart"]
+NOUNS = ["lamp", "chair", "table", "speaker", "backpack", "kettle", "blanket", "mirror", "clock", "mug",
+         "keyboard", "jacket", "planter", "notebook", "headphones", "bicycle", "camera", "watch"]
+FILLER = ["great", "gift", "for", "home", "office", "travel", "durable", "design", "with", "and",
+          "quality", "materials", "easy", "to", "clean", "everyday", "use", "limited", "edition"]
+
+QUERIES = ["lamp", "vintage lamp", "wireless headphones", "ergonomic", "handmade mug", "waterproof jacket travel",
+           "424242", "keyboard 77777", "clock 9999"]
+
+
+def seed(db, product_count, seed=42):
+    """
+    Fill the catalog with generated product names and descriptions. The FTS index is kept
+    up to date by the triggers as the rows are inserted.
+
+    Args:
+        db (Database): The database to fill.
+        product_count (int): Number of products to create.
+        seed (int): Random seed, so runs are comparable.
+    """
+    rng = random.Random(seed)
+
+    def rows():
+        for i in range(product_count):
+            name = f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {i}"
+            description = " ".join(rng.choice(FILLER + ADJECTIVES + NOUNS) for _ in range(12))
+            yield name, 1.0 + i % 500, description, 1, i % 10
+
+    with db.transaction():
+        db.executemany('''
+            INSERT INTO products (name, price, description, user_id, quantity)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows())
+
+
+def like_search(db, query, limit=None):
+    """Match every query word anywhere in the name or description with LIKE '%word%'."""
+    words = query.split()
+    condition = " AND ".join("(name LIKE ? OR description LIKE ?)" for _ in words)
+    params = [f"%{word}%" for word in words for _ in range(2)]
+    sql = f"SELECT id, name, price, quantity FROM products WHERE {condition}"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return db.fetchall(sql, params)
+
+
+def timed(func, repeat=3):
+    """Return the best wall time of several calls in milliseconds, and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main(product_count=1000000):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = get_db(os.path.join(tmpdir, "bench.db"), profile="throughput", replicas=False)
+        start = time.perf_counter()
+        seed(db, product_count)
+        print(f"seeded {product_count} products with FTS triggers in {time.perf_counter() - start:.1f}s")
+        print(f"{'query':<26} {'matches':>8} {'FTS top 20':>11} {'LIKE first 20':>14} {'LIKE all':>10}  (ms)")
+        for query in QUERIES:
+            fts, _ = timed(lambda: Product.search(query, limit=20, db=db))
+            like_first, _ = timed(lambda: like_search(db, query, limit=20))
+            like_all, matches = timed(lambda: like_search(db, query), repeat=1)
+            print(f"{query:<26} {len(matches):>8} {fts:>11.1f} {like_first:>14.1f} {like_all:>10.1f}")
+        db.close()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,193 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from ecommerce.db import Database, ConnectionPool, ReplicaPool, DEFAULT_DB_NAME, DEFAULT_PROFILE, get_product_cache
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.cart import Cart
+from ecommerce.order import Order
+
+
+class AsyncDatabase:
+    """
+    Runs model calls for asyncio code on a dedicated thread pool, each call on a connection
+    checked out of a dedicated connection pool, so the event loop never blocks on disk I/O.
+
+    Attributes:
+        pool (ConnectionPool): The connections used by the worker threads.
+        replicas (ReplicaPool): The read-only connections serving pure reads.
+        product_cache (LRUCache): The product cache, shared with synchronous code using the same file.
+        executor (ThreadPoolExecutor): The worker threads.
+    """
+    def __init__(self, db_name=DEFAULT_DB_NAME, profile=DEFAULT_PROFILE, max_workers=8):
+        """
+        Initialize the executor and connection pool. Connections are opened lazily.
+
+        Args:
+            db_name (str): The path of the SQLite database file. Defaults to 'ecommerce.db'.
+            profile (str): The pragma profile of the connections. Defaults to 'durable'.
+            max_workers (int): The number of worker threads and pooled connections. Defaults to 8.
+        """
+        self.pool = ConnectionPool(db_name, profile=profile, max_size=max_workers)
+        self.replicas = ReplicaPool(db_name, max_size=max_workers)
+        self.product_cache = get_product_cache(db_name)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ecommerce-aio")
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Call a synchronous model function on a worker thread and await its result.
+
+        Args:
+            func (callable): A function accepting a `db` keyword argument.
+            *args: Positional arguments for `func`.
+            **kwargs: Keyword arguments for `func`.
+
+        Returns:
+            The return value of `func`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(self._call, func, args, kwargs))
+
+    def _call(self, func, args, kwargs):
+        connection = self.pool.acquire()
+        db = Database(connection, connection.cursor(), pool=self.pool, replicas=self.replicas,
+                      product_cache=self.product_cache)
+        try:
+            return func(*args, db=db, **kwargs)
+        finally:
+            db.close()
+
+    def close(self):
+        """
+        Wait for running calls to finish, then stop the workers and close the connections.
+
+        Returns:
+            None
+        """
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+        self.replicas.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+
+def _awaitable_static(model, name):
+    func = getattr(model, name)
+
+    @functools.wraps(func)
+    async def method(self, *args, **kwargs):
+        return await self.database.run(func, *args, **kwargs)
+    return method
+
+
+def _call_on_instance(model, user_id, name, args, kwargs, db):
+    return getattr(model(user_id, db=db), name)(*args, **kwargs)
+
+
+def _awaitable_instance(model, name):
+    @functools.wraps(getattr(model, name))
+    async def method(self, *args, **kwargs):
+        return await self.database.run(_call_on_instance, model, self.user_id, name, args, kwargs)
+    return method
+
+
+class AsyncUser:
+    """
+    Awaitable equivalents of the `User` model methods.
+    """
+    def __init__(self, database):
+        """
+        Initialize the facade.
+
+        Args:
+            database (AsyncDatabase): The executor and pool the calls run on.
+        """
+        self.database = database
+
+    register = _awaitable_static(User, "register")
+    login = _awaitable_static(User, "login")
+    update_username = _awaitable_static(User, "update_username")
+    update_password = _awaitable_static(User, "update_password")
+    delete_account = _awaitable_static(User, "delete_account")
+    get_user_id = _awaitable_static(User, "get_user_id")
+
+
+class AsyncProduct:
+    """
+    Awaitable equivalents of the `Product` model methods.
+    """
+    def __init__(self, database):
+        """
+        Initialize the facade.
+
+        Args:
+            database (AsyncDatabase): The executor and pool the calls run on.
+        """
+        self.database = database
+
+    create_product = _awaitable_static(Product, "create_product")
+    get_all_products = _awaitable_static(Product, "get_all_products")
+    get_product_page = _awaitable_static(Product, "get_product_page")
+    search = _awaitable_static(Product, "search")
+    browse = _awaitable_static(Product, "browse")
+    get_product_by_id = _awaitable_static(Product, "get_product_by_id")
+    get_many = _awaitable_static(Product, "get_many")
+    get_ascii_art = _awaitable_static(Product, "get_ascii_art")
+    update_product = _awaitable_static(Product, "update_product")
+    delete_product = _awaitable_static(Product, "delete_product")
+    get_products_by_user_id = _awaitable_static(Product, "get_products_by_user_id")
+    delete_products_by_user = _awaitable_static(Product, "delete_products_by_user")
+
+
+class AsyncCart:
+    """
+    Awaitable equivalents of the `Cart` model methods for one user's cart.
+    """
+    def __init__(self, user_id, database):
+        """
+        Initialize the facade for a user.
+
+        Args:
+            user_id (int): The ID of the user associated with the cart.
+            database (AsyncDatabase): The executor and pool the calls run on.
+        """
+        self.user_id = user_id
+        self.database = database
+
+    add_product = _awaitable_instance(Cart, "add_product")
+    remove_product = _awaitable_instance(Cart, "remove_product")
+    add_many = _awaitable_instance(Cart, "add_many")
+    remove_many = _awaitable_instance(Cart, "remove_many")
+    set_quantities = _awaitable_instance(Cart, "set_quantities")
+    view_cart = _awaitable_instance(Cart, "view_cart")
+    checkout = _awaitable_instance(Cart, "checkout")
+    clear_cart = _awaitable_instance(Cart, "clear_cart")
+    clear_cart_by_user = _awaitable_static(Cart, "clear_cart_by_user")
+
+
+class AsyncOrder:
+    """
+    Awaitable equivalents of the `Order` model methods for one user's orders.
+    """
+    def __init__(self, user_id, database):
+        """
+        Initialize the facade for a user.
+
+        Args:
+            user_id (int): The ID of the user associated with the orders.
+            database (AsyncDatabase): The executor and pool the calls run on.
+        """
+        self.user_id = user_id
+        self.database = database
+
+    create_order = _awaitable_instance(Order, "create_order")
+    get_orders_by_user = _awaitable_static(Order, "get_orders_by_user")
+    update_order_status = _awaitable_instance(Order, "update_order_status")
+    get_order_by_id = _awaitable_static(Order, "get_order_by_id")
+    get_units_sold = _awaitable_static(Order, "get_units_sold")
+    cancel_order = _awaitable_instance(Order, "cancel_order")
+    delete_orders_by_user = _awaitable_static(Order, "delete_orders_by_user")
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 30.0
+
+
+class LRUCache:
+    """
+    A thread-safe, bounded mapping that evicts the least recently used entry when full and
+    treats entries older than a time-to-live as absent.
+
+    Attributes:
+        max_size (int): The maximum number of entries.
+        ttl (float): Seconds an entry stays valid after it is stored, or None to keep entries
+                     until they are evicted or invalidated.
+        hits (int): Lookups that found a valid entry.
+        misses (int): Lookups that found nothing, including expired entries.
+        evictions (int): Entries dropped to make room.
+        expirations (int): Entries dropped because they outlived the TTL.
+        invalidations (int): Entries dropped by `invalidate` or `invalidate_where`.
+        generation (int): Bumped by every `invalidate`, `invalidate_where` and `clear` call,
+                          so a reader can tell that a value it read may be stale (see `put`).
+    """
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL, clock=time.monotonic):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size (int): The maximum number of entries. Defaults to 1024.
+            ttl (float): Seconds an entry stays valid, or None for no expiry. Defaults to 30.
+            clock (callable): Returns the current time in seconds. Defaults to `time.monotonic`.
+
+        Raises:
+            ValueError: If the size is not positive.
+        """
+        if max_size < 1:
+            raise ValueError('Cache size must be at least 1')
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Look up an entry, marking it as recently used.
+
+        Args:
+            key: The key.
+            default: Returned if the key is absent or expired. Defaults to None.
+
+        Returns:
+            The cached value, or `default`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires = entry
+            if expires is not None and expires <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation=None):
+        """
+        Store an entry, evicting the least recently used one if the cache is full.
+
+        A read-through caller passes the `generation` it saw before reading the value from the
+        source. If anything was invalidated since, the value may predate that write, and it
+        is not stored.
+
+        Args:
+            key: The key.
+            value: The value.
+            generation (int, optional): The `generation` taken before the value was read.
+
+        Returns:
+            bool: True if the entry was stored.
+        """
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key):
+        """
+        Drop an entry if it is present.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.generation += 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate):
+        """
+        Drop every entry for which `predicate(key, value)` is true. Visits the whole cache.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, (value, _) in self._entries.items() if predicate(key, value)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """
+        Drop every entry. The statistics are kept.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: hits, misses, evictions, expirations, invalidations, the current size and
+                  the hit rate (hits over lookups, 0.0 before the first lookup).
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -1,4 +1,7 @@
 from ecommerce.db import get_db
+from ecommerce.inventory import OutOfStockError, reserve_stock
+from ecommerce.product import Product
+from ecommerce.records import CartLine
 
 class Cart:
     def __init__(self, user_id, db=None):
@@ -20,13 +23,7 @@ class Cart:
             product_id (int): The ID of the product to add.
             quantity (int): The quantity of the product to add. Default is 1.
         """
-        cursor = self.db.cursor
-        cursor.execute('''
-            INSERT INTO carts (user_id, product_id, quantity)
-            VALUES (?, ?, ?)
-            ON CONFLICT(product_id, user_id) DO UPDATE SET quantity = quantity + excluded.quantity
-        ''', (self.user_id, product_id, quantity))
-        self.db.connection.commit()
+        self.db.storage.add_to_cart(self.user_id, product_id, quantity)
 
     def remove_product(self, product_id):
         """
@@ -35,53 +32,153 @@ class Cart:
         Args:
             product_id (int): The ID of the product to remove.
         """
-        cursor = self.db.cursor
-        cursor.execute('DELETE FROM carts WHERE user_id = ? AND product_id = ?', (self.user_id, product_id))
-        self.db.connection.commit()
+        self.db.storage.remove_from_cart(self.user_id, product_id)
+
+    def add_many(self, items):
+        """
+        Add several products to the cart in one transaction.
+
+        The stock of all the products is checked in one query and the rows are written with a
+        single `executemany`, so restoring or bulk-filling a cart costs one round trip and one
+        commit instead of one per product.
+
+        Args:
+            items (dict or iterable): Quantities by product ID, or (product_id, quantity) pairs.
+                                      A product listed twice gets both quantities.
+
+        Raises:
+            ValueError: If a quantity is not a positive integer or a product does not exist.
+            OutOfStockError: If the cart would hold more units of a product than are in stock.
+                             Nothing is added.
+        """
+        quantities = {}
+        for product_id, quantity in self._pairs(items):
+            if quantity < 1:
+                raise ValueError(f"Quantity of product {product_id} must be at least 1")
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        if not quantities:
+            return
+        with self.db.transaction():
+            self._check_stock(quantities, adding=True)
+            self.db.storage.add_many_to_cart(self.user_id, sorted(quantities.items()))
+
+    def remove_many(self, product_ids):
+        """
+        Remove several products from the cart in one transaction.
+
+        Args:
+            product_ids (iterable): The IDs of the products to remove. IDs not in the cart are ignored.
+        """
+        product_ids = sorted(set(product_ids))
+        if product_ids:
+            self.db.storage.remove_many_from_cart(self.user_id, product_ids)
+
+    def set_quantities(self, items):
+        """
+        Set the quantities of several products in the cart in one transaction, replacing what
+        the cart held. Products not in the cart yet are added; a quantity of 0 removes the product.
+
+        Args:
+            items (dict or iterable): Quantities by product ID, or (product_id, quantity) pairs.
+                                      When a product is listed twice, the last quantity wins.
+
+        Raises:
+            ValueError: If a quantity is negative or not an integer, or a product does not exist.
+            OutOfStockError: If a quantity is more than the product has in stock. Nothing is changed.
+        """
+        quantities = {}
+        for product_id, quantity in self._pairs(items):
+            if quantity < 0:
+                raise ValueError(f"Quantity of product {product_id} must not be negative")
+            quantities[product_id] = quantity
+        if not quantities:
+            return
+        removed = sorted(product_id for product_id, quantity in quantities.items() if quantity == 0)
+        kept = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+        with self.db.transaction():
+            if kept:
+                self._check_stock(kept, adding=False)
+                self.db.storage.set_cart_quantities(self.user_id, sorted(kept.items()))
+            if removed:
+                self.db.storage.remove_many_from_cart(self.user_id, removed)
+
+    @staticmethod
+    def _pairs(items):
+        # (product_id, quantity) pairs from a mapping or an iterable of pairs.
+        pairs = items.items() if hasattr(items, "items") else items
+        for product_id, quantity in pairs:
+            if not isinstance(quantity, int) or isinstance(quantity, bool):
+                raise ValueError(f"Quantity of product {product_id} must be an integer")
+            yield product_id, quantity
+
+    def _check_stock(self, quantities, adding):
+        # One query for the stock of every product and what the cart already holds of it.
+        stock = {product_id: (name, available, in_cart)
+                 for product_id, name, available, in_cart in self.db.storage.list_cart_stock(self.user_id, list(quantities))}
+        for product_id, quantity in quantities.items():
+            if product_id not in stock:
+                raise ValueError(f"Product {product_id} does not exist")
+            name, available, in_cart = stock[product_id]
+            wanted = quantity + in_cart if adding else quantity
+            if wanted > (available or 0):
+                raise OutOfStockError(product_id, wanted, name)
 
     def view_cart(self):
         """
         View all the items in the cart for the current user.
 
+        The products are read together with `Product.get_many`, so they come from the product
+        cache when it has them. Products deleted since they were added are left out.
+
         Returns:
-            list: A list of tuples containing product information and quantity.
+            list: A `CartLine` record (name, price, quantity, product_id) for each product in the cart,
+                  in product ID order.
         """
-        cursor = self.db.cursor
-        cursor.execute('''
-            SELECT p.name, p.price, c.quantity, p.id
-            FROM carts c
-            JOIN products p ON c.product_id = p.id
-            WHERE c.user_id = ?
-        ''', (self.user_id,))
-        return cursor.fetchall()
+        return [CartLine(product.name, product.price, quantity, product.id) for product, quantity in self._products()]
+
+    def _products(self):
+        # The products in the cart with their quantities, as (ProductDetail, quantity) pairs.
+        items = self._items()
+        products = Product.get_many([product_id for product_id, _ in items], self.db, include_ascii_art=False).products
+        quantities = dict(items)
+        return [(product, quantities[product.id]) for product in products]
+
+    def _items(self):
+        # The cart's (product_id, quantity) pairs, in product ID order.
+        return self.db.storage.list_cart_items(self.user_id)
 
     def checkout(self):
         """
-        Process the checkout of the cart.
+        Process the checkout of the cart: reserve the stock of every item, create the order
+        with one `order_items` line per product, holding its current price, and empty the
+        cart, all in one transaction.
 
         Returns:
-            None
+            int: The ID of the new order.
 
         Raises:
             ValueError: If the cart is empty.
+            OutOfStockError: If a product has fewer units in stock than the cart holds. Nothing
+                             is reserved, ordered or removed from the cart.
         """
-        cart_items = self.view_cart()
+        with self.db.transaction():
+            products = self._products()
 
-        if not cart_items:
-            raise ValueError("Your cart is empty. Please add products before checkout.")
+            if not products:
+                raise ValueError("Your cart is empty. Please add products before checkout.")
 
-        order_details = "\n".join([f"{item[0]} - ${item[1]} (x{item[2]})" for item in cart_items])
-        total = sum([item[1] * item[2] for item in cart_items])
+            cart_items = [CartLine(product.name, product.price, quantity, product.id) for product, quantity in products]
+            reserve_stock(cart_items, self.db)
 
-        cursor = self.db.cursor
-        cursor.execute('''
-            INSERT INTO orders (user_id, order_details, total, status)
-            VALUES (?, ?, ?, ?)
-        ''', (self.user_id, order_details, total, 'pending'))
+            order_details = "\n".join([f"{item.name} - ${item.price} (x{item.quantity})" for item in cart_items])
+            total = sum([item.price * item.quantity for item in cart_items])
 
-        self.db.connection.commit()
+            order_id = self.db.storage.insert_order(self.user_id, order_details, total, 'pending')
+            self.db.storage.insert_order_items(order_id, [(product.id, product.user_id, product.name, product.price, quantity)
+                                                          for product, quantity in products], reserved=True)
 
-        self.clear_cart()
+            self.db.storage.clear_cart(self.user_id)
+        return order_id
 
     def clear_cart(self):
         """
@@ -90,9 +187,7 @@ class Cart:
         Returns:
             None
         """
-        cursor = self.db.cursor
-        cursor.execute('DELETE FROM carts WHERE user_id = ?', (self.user_id,))
-        self.db.connection.commit()
+        self.db.storage.clear_cart(self.user_id)
 
     @staticmethod
     def clear_cart_by_user(user_id, db=None):
@@ -104,6 +199,4 @@ class Cart:
             db (Database): Optional database connection. If not provided, a new connection will be created.
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('DELETE FROM carts WHERE user_id = ?', (user_id,))
-        db.connection.commit()
+        db.storage.clear_cart(user_id)
@@ -0,0 +1,317 @@
+import logging
+import threading
+from ecommerce.cart import Cart
+from ecommerce.db import get_db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+class _Session:
+    # A user's cart held in memory: quantities by product ID, and the product IDs changed
+    # since the last flush (a product missing from `items` but in `dirty` was removed).
+    __slots__ = ("items", "dirty")
+
+    def __init__(self, items):
+        self.items = dict(items)
+        self.dirty = set()
+
+
+class CartSessionStore:
+    """
+    Keeps the carts of active sessions in memory and writes them behind to the `carts` table.
+
+    `add_product`, `remove_product` and `clear_cart` on a cart from `cart()` only change the
+    in-memory session, so a shopper changing quantities costs no commit. The changed products
+    are written to `carts` by `flush`, which a background thread calls every `flush_interval`
+    seconds, in one transaction for all sessions. A cart is also flushed before its checkout,
+    before a batch operation and when its session ends, and `close` flushes every session on
+    shutdown. Sessions are loaded from `carts` on first use, so after a crash the carts come
+    back as of the last flush; changes made after it, at most `flush_interval` seconds' worth,
+    are lost.
+
+    Attributes:
+        db (Database): The database the carts are loaded from and flushed to.
+        flush_interval (float or None): Seconds between background flushes, or None for none.
+        flushes (int): The number of flushes that wrote something.
+    """
+    def __init__(self, db=None, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        """
+        Initialize the store and start its flush thread.
+
+        Args:
+            db (Database, optional): A database connection object. If not provided,
+                                     a new connection will be created using `get_db()`.
+            flush_interval (float, optional): Seconds between background flushes. Defaults to 5.
+                                              None turns the timer off; carts are then written only
+                                              on checkout, `end_session`, `flush` and `close`.
+
+        Raises:
+            ValueError: If `flush_interval` is not positive.
+        """
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        self.db = db or get_db()
+        self.flush_interval = flush_interval
+        self.flushes = 0
+        self._sessions = {}
+        # `_lock` guards the sessions; `_flush_lock` keeps flushes in order, so an older
+        # snapshot is never written over a newer one. Always taken before `_lock`.
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = None
+        if flush_interval is not None:
+            self._flusher = threading.Thread(target=self._run, name="cart-flusher", daemon=True)
+            self._flusher.start()
+
+    def cart(self, user_id):
+        """
+        Return the cart of a user, backed by this store.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            SessionCart: A `Cart` whose single-item changes stay in memory until flushed.
+
+        Raises:
+            ValueError: If the store has been closed.
+        """
+        if self._closed.is_set():
+            raise ValueError("Cart session store is closed")
+        return SessionCart(user_id, self)
+
+    def flush(self):
+        """
+        Write every changed cart to the `carts` table in one transaction.
+
+        Returns:
+            int: The number of cart rows written or deleted.
+        """
+        with self._flush_lock:
+            return self._write(self._take_changes())
+
+    def end_session(self, user_id):
+        """
+        Flush a user's cart and drop it from memory, for example on logout.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            None
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._write(self._take_changes([user_id]))
+                self._sessions.pop(user_id, None)
+
+    def close(self):
+        """
+        Stop the flush thread and flush every session. The database is left open.
+
+        Returns:
+            None
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _session(self, user_id):
+        # The user's session, loaded from `carts` on first use. Call with `_lock` held.
+        session = self._sessions.get(user_id)
+        if session is None:
+            session = self._sessions[user_id] = _Session(self.db.storage.list_cart_items(user_id))
+        return session
+
+    def _take_changes(self, user_ids=None):
+        # Snapshot and reset the changes of some or all sessions, as
+        # {user_id: [(product_id, quantity or 0 if removed)]}.
+        with self._lock:
+            changes = {}
+            for user_id in (self._sessions if user_ids is None else user_ids):
+                session = self._sessions.get(user_id)
+                if session is not None and session.dirty:
+                    changes[user_id] = [(product_id, session.items.get(product_id, 0)) for product_id in sorted(session.dirty)]
+                    session.dirty.clear()
+            return changes
+
+    def _write(self, changes):
+        # Write a snapshot from `_take_changes`. Call with `_flush_lock` held. If the write
+        # fails, the products are marked changed again so the next flush retries them.
+        if not changes:
+            return 0
+        try:
+            with self.db.transaction():
+                for user_id, items in changes.items():
+                    kept = [(product_id, quantity) for product_id, quantity in items if quantity]
+                    removed = [product_id for product_id, quantity in items if not quantity]
+                    if kept:
+                        self.db.storage.set_cart_quantities(user_id, kept)
+                    if removed:
+                        self.db.storage.remove_many_from_cart(user_id, removed)
+        except Exception:
+            with self._lock:
+                for user_id, items in changes.items():
+                    session = self._sessions.get(user_id)
+                    if session is not None:
+                        session.dirty.update(product_id for product_id, _ in items)
+            raise
+        self.flushes += 1
+        return sum(len(items) for items in changes.values())
+
+    def _run(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # The changes stay marked and are retried on the next tick.
+                logger.exception("Cart flush failed; retrying in %.1fs", self.flush_interval)
+
+
+class SessionCart(Cart):
+    """
+    A `Cart` whose `add_product`, `remove_product` and `clear_cart` change only the session
+    held by a `CartSessionStore`. Reads come from the session; checkout and the batch
+    operations flush the cart first and run on the database as usual.
+    """
+    def __init__(self, user_id, store):
+        """
+        Initialize the cart.
+
+        Args:
+            user_id (int): The ID of the user associated with the cart.
+            store (CartSessionStore): The store holding the cart's session.
+        """
+        super().__init__(user_id, store.db)
+        self.store = store
+
+    def add_product(self, product_id, quantity=1):
+        """
+        Add a product to the cart's session.
+
+        Args:
+            product_id (int): The ID of the product to add.
+            quantity (int): The quantity of the product to add. Default is 1.
+        """
+        with self.store._lock:
+            session = self.store._session(self.user_id)
+            session.items[product_id] = session.items.get(product_id, 0) + quantity
+            session.dirty.add(product_id)
+
+    def remove_product(self, product_id):
+        """
+        Remove a product from the cart's session.
+
+        Args:
+            product_id (int): The ID of the product to remove.
+        """
+        with self.store._lock:
+            session = self.store._session(self.user_id)
+            session.items.pop(product_id, None)
+            session.dirty.add(product_id)
+
+    def clear_cart(self):
+        """
+        Clear all items from the cart's session.
+
+        Returns:
+            None
+        """
+        with self.store._lock:
+            session = self.store._session(self.user_id)
+            session.dirty.update(session.items)
+            session.items.clear()
+
+    def checkout(self):
+        """
+        Flush the cart and check it out with `Cart.checkout`.
+
+        Returns:
+            int: The ID of the new order.
+
+        Raises:
+            ValueError: If the cart is empty.
+            OutOfStockError: If a product has fewer units in stock than the cart holds.
+        """
+        # Flushed and checked out with the session locked, so no change slips in between.
+        with self.store._flush_lock, self.store._lock:
+            self.store._write(self.store._take_changes([self.user_id]))
+            order_id = super().checkout()
+            self.store._sessions[self.user_id] = _Session([])
+        return order_id
+
+    def add_many(self, items):
+        """
+        Flush the cart, add several products with `Cart.add_many` and reload the session from
+        `carts`.
+
+        Args:
+            items (dict or iterable): Quantities by product ID, or (product_id, quantity) pairs.
+                                      A product listed twice gets both quantities.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If a quantity is not a positive integer or a product does not exist.
+            OutOfStockError: If the cart would hold more units of a product than are in stock.
+                             Nothing is added, but the flush stands.
+        """
+        self._write_through(super().add_many, items)
+
+    def remove_many(self, product_ids):
+        """
+        Flush the cart, remove several products with `Cart.remove_many` and reload the session
+        from `carts`.
+
+        Args:
+            product_ids (iterable): The IDs of the products to remove. IDs not in the cart are ignored.
+
+        Returns:
+            None
+        """
+        self._write_through(super().remove_many, product_ids)
+
+    def set_quantities(self, items):
+        """
+        Flush the cart, set several quantities with `Cart.set_quantities` and reload the session
+        from `carts`.
+
+        Args:
+            items (dict or iterable): Quantities by product ID, or (product_id, quantity) pairs.
+                                      A quantity of 0 removes the product.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If a quantity is negative or not an integer, or a product does not exist.
+            OutOfStockError: If a quantity is more than the product has in stock. Nothing is
+                             changed, but the flush stands.
+        """
+        self._write_through(super().set_quantities, items)
+
+    def _write_through(self, operation, *args):
+        # Flush the cart, run a batch operation on the table and reload the session from it.
+        with self.store._flush_lock, self.store._lock:
+            self.store._write(self.store._take_changes([self.user_id]))
+            try:
+                operation(*args)
+            finally:
+                self.store._sessions.pop(self.user_id, None)
+
+    def _items(self):
+        with self.store._lock:
+            return sorted(self.store._session(self.user_id).items.items())
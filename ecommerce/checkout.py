@@ -0,0 +1,158 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from ecommerce.cart import Cart
+from ecommerce.db import get_db
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT = 0.0
+
+
+class CheckoutQueue:
+    """
+    Runs checkouts from many threads on one writer thread, committing them in groups.
+
+    Each checkout is `Cart.checkout`, unchanged: the cart is read, its prices snapshotted into
+    the order, the stock reserved, the order inserted and the cart cleared in one transaction.
+    The writer thread takes every checkout that is waiting (up to `max_batch`, lingering up to
+    `max_wait` seconds for more to arrive) and runs them in a single outer transaction, each in
+    its own savepoint, so a whole group costs one commit and one fsync instead of one each. A
+    checkout that fails, for example on an empty cart or a product out of stock, rolls back
+    only its savepoint. Callers are answered only after the group commits, so an order ID
+    returned by `checkout` is durable.
+
+    Attributes:
+        db (Database): The database the writer thread works on.
+        max_batch (int): The most checkouts committed together.
+        max_wait (float): Seconds, from a group's first checkout, the writer waits for more before committing it.
+        batches (int): The number of groups committed so far.
+    """
+    def __init__(self, db=None, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT):
+        """
+        Initialize the queue and start its writer thread.
+
+        Args:
+            db (Database, optional): A database connection object. If not provided,
+                                     a new connection will be created using `get_db()`.
+            max_batch (int): The most checkouts committed together. Defaults to 64.
+            max_wait (float): Seconds to wait for more checkouts before committing. Defaults to 0:
+                              a group is whatever queued up while the previous one committed.
+
+        Raises:
+            ValueError: If `max_batch` is not positive or `max_wait` is negative.
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        if max_wait < 0:
+            raise ValueError("max_wait must not be negative")
+        self.db = db or get_db()
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self._requests = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._run, name="checkout-writer", daemon=True)
+        self._writer.start()
+
+    def submit(self, user_id):
+        """
+        Queue the checkout of a user's cart without waiting for it.
+
+        Args:
+            user_id (int): The ID of the user whose cart is checked out.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the new order's ID once its group has
+                                       committed, or to the error `Cart.checkout` raised.
+
+        Raises:
+            ValueError: If the queue has been closed.
+        """
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise ValueError("Checkout queue is closed")
+            self._requests.put((user_id, future))
+        return future
+
+    def checkout(self, user_id):
+        """
+        Check out a user's cart through the queue and wait until the order is committed.
+
+        Args:
+            user_id (int): The ID of the user whose cart is checked out.
+
+        Returns:
+            int: The ID of the new order.
+
+        Raises:
+            ValueError: If the cart is empty or the queue has been closed.
+            OutOfStockError: If a product has fewer units in stock than the cart holds.
+        """
+        return self.submit(user_id).result()
+
+    def close(self):
+        """
+        Stop accepting checkouts, finish those already queued and stop the writer thread.
+        The database is left open.
+
+        Returns:
+            None
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(None)
+        self._writer.join()
+
+    def _next_batch(self):
+        # Block for the first checkout, then gather what arrives within `max_wait` of it, so
+        # the first caller never waits longer than that however the others trickle in.
+        # Returns None once the queue is closed and drained.
+        first = self._requests.get()
+        if first is None:
+            return None
+        deadline = time.monotonic() + self.max_wait
+        batch = [first]
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._requests.get(timeout=remaining) if remaining > 0 else self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Closing: commit this group, then stop.
+                self._requests.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            results = []
+            try:
+                with self.db.transaction():
+                    for user_id, future in batch:
+                        try:
+                            # Cart.checkout opens a nested transaction, i.e. a savepoint.
+                            results.append((future, Cart(user_id, self.db).checkout(), None))
+                        except Exception as e:
+                            results.append((future, None, e))
+            except Exception as e:
+                # The commit itself failed and `transaction()` rolled the group back: none of
+                # its orders, reservations or cart clears exist, so the callers can retry.
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            for future, order_id, error in results:
+                if error is None:
+                    future.set_result(order_id)
+                else:
+                    future.set_exception(error)
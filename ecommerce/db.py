@@ -1,51 +1,798 @@
+import os
+import pathlib
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from ecommerce.cache import LRUCache
+from ecommerce.records import row_factory
+from ecommerce.storage import SQLiteStorage, ascii_art_hash, compress_ascii_art
+
+DEFAULT_DB_NAME = "ecommerce.db"
+DEFAULT_FETCH_SIZE = 1000
+
+# Named sets of connection pragmas, applied in order when a connection is opened.
+#   durable:    WAL so readers never wait for the writer, with a full fsync on every commit.
+#   throughput: WAL with fsync only at checkpoints, a larger cache and memory-mapped reads.
+#   readonly:   for browsing sessions; writes are rejected with sqlite3.OperationalError.
+PRAGMA_PROFILES = {
+    "durable": [
+        ("busy_timeout", 5000),
+        ("journal_mode", "WAL"),
+        ("synchronous", "FULL"),
+        ("cache_size", -8192),
+        ("mmap_size", 0),
+        ("temp_store", "DEFAULT"),
+    ],
+    "throughput": [
+        ("busy_timeout", 5000),
+        ("journal_mode", "WAL"),
+        ("synchronous", "NORMAL"),
+        ("cache_size", -65536),
+        ("mmap_size", 268435456),
+        ("temp_store", "MEMORY"),
+    ],
+    "readonly": [
+        ("busy_timeout", 5000),
+        ("cache_size", -65536),
+        ("mmap_size", 268435456),
+        ("temp_store", "MEMORY"),
+        ("query_only", "ON"),
+    ],
+}
+
+DEFAULT_PROFILE = "durable"
 
 class Database:
     """
-    A wrapper class for managing the SQLite database connection and cursor.
+    A thread-safe wrapper around a SQLite connection.
+
+    Statements run on a fresh cursor per operation, so concurrent callers and nested calls
+    never share a result set. A re-entrant lock serialises access to the connection: single
+    statements hold it only while they run, and a `transaction()` block holds it until the
+    block exits, so one thread's unit of work never absorbs another thread's writes.
+
+    When a `ReplicaPool` is attached, `fetchone` and `fetchall` run on one of its read-only
+    connections without taking the lock, unless the calling thread has uncommitted work on
+    this connection, in which case they read from the writer so the work is visible.
 
     Attributes:
         connection (sqlite3.Connection): The SQLite database connection.
-        cursor (sqlite3.Cursor): The cursor for executing queries on the SQLite database.
+        cursor (sqlite3.Cursor): A shared cursor kept for callers that drive the connection
+                                 directly. It is not safe to use from several threads; prefer
+                                 `execute`, `fetchone` and `fetchall`.
+        pool (ConnectionPool): The pool the connection was checked out from, or None for a private connection.
+        lock (threading.RLock): The lock guarding the connection.
+        replicas (ReplicaPool): Read-only connections that serve pure reads, or None.
+        product_cache (LRUCache): The cache `Product.get_product_by_id` reads through, or None.
+        instrumentation (QueryStats): A hook whose `record(sql, params, elapsed, connection)` is
+                                      called after every statement, or None. Defaults to the
+                                      process-wide hook installed with `set_instrumentation`.
     """
-    def __init__(self, connection, cursor):
+    instrumentation = None
+
+    def __init__(self, connection, cursor, pool=None, replicas=None, product_cache=None):
         """
         Initialize the Database object with a connection and cursor.
 
         Args:
             connection (sqlite3.Connection): The SQLite database connection.
             cursor (sqlite3.Cursor): The cursor for executing queries.
+            pool (ConnectionPool, optional): The pool that owns the connection. If given, closing
+                                             the Database returns the connection to the pool.
+            replicas (ReplicaPool, optional): Read-only connections to route pure reads to.
+            product_cache (LRUCache, optional): A product cache shared by every Database on the same file.
         """
         self.connection = connection
         self.cursor = cursor
+        self.pool = pool
+        self.replicas = replicas
+        self.product_cache = product_cache
+        self.closed = False
+        self.transaction_depth = 0
+        self.transaction_owner = None
+        self.lock = threading.RLock()
+        self._after_commit = []
+
+    @property
+    def storage(self):
+        """
+        The model operations, implemented as statements on this database.
+
+        A new `SQLiteStorage` is returned on each access rather than cached, so the Database
+        is not part of a reference cycle and still returns its connection to the pool as soon
+        as it is dropped.
+        """
+        return SQLiteStorage(self)
+
+    def execute(self, sql, params=()):
+        """
+        Execute a single statement on a new cursor.
+
+        Args:
+            sql (str): The SQL statement.
+            params (tuple or dict): The statement parameters.
+
+        Returns:
+            sqlite3.Cursor: The cursor holding the statement's results.
+        """
+        with self.lock:
+            return self._run(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        """
+        Execute a statement once for every parameter set, on a new cursor.
+
+        Args:
+            sql (str): The SQL statement.
+            seq_of_params (iterable): The parameter sets.
+
+        Returns:
+            sqlite3.Cursor: The cursor used for the statement.
+        """
+        with self.lock:
+            return self._run(sql, seq_of_params, many=True)
+
+    def fetchone(self, sql, params=(), record=None):
+        """
+        Execute a query and return its first row.
+
+        Args:
+            sql (str): The SQL query.
+            params (tuple or dict): The query parameters.
+            record (type, optional): A named tuple type from `ecommerce.records` to build the
+                                     row as. Defaults to a plain tuple.
+
+        Returns:
+            tuple: The first row, or None if the query returned no rows.
+        """
+        return self._read(sql, params, sqlite3.Cursor.fetchone, record)
+
+    def fetchall(self, sql, params=(), record=None):
+        """
+        Execute a query and return all of its rows.
+
+        Args:
+            sql (str): The SQL query.
+            params (tuple or dict): The query parameters.
+            record (type, optional): A named tuple type from `ecommerce.records` to build the
+                                     rows as. Defaults to plain tuples.
+
+        Returns:
+            list: The result rows.
+        """
+        return self._read(sql, params, sqlite3.Cursor.fetchall, record)
+
+    def iterate(self, sql, params=(), batch_size=DEFAULT_FETCH_SIZE, record=None):
+        """
+        Execute a query and yield its rows one at a time, fetching them `batch_size` at a time
+        with `fetchmany`, so memory use does not grow with the size of the result.
+
+        With replicas attached, the whole query runs on one replica connection, held until the
+        generator is exhausted or closed, and so reads a single consistent snapshot. Otherwise
+        it runs on this connection and the lock is taken for each batch rather than for the
+        whole iteration, so other threads are not blocked while the caller processes rows.
+
+        Args:
+            sql (str): The SQL query.
+            params (tuple or dict): The query parameters.
+            batch_size (int): Rows fetched per `fetchmany` call. Defaults to 1000.
+            record (type, optional): A named tuple type from `ecommerce.records` to build the
+                                     rows as. Defaults to plain tuples.
+
+        Yields:
+            tuple: The result rows.
+        """
+        replicas = self.replicas
+        if (replicas is None or self.transaction_owner == threading.get_ident()
+                or (self.transaction_owner is None and self.connection.in_transaction)):
+            with self.lock:
+                cursor = self._run(sql, params, record=record)
+            while True:
+                with self.lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+        connection = replicas.acquire()
+        try:
+            cursor = self._run(sql, params, connection=connection, record=record)
+            try:
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        return
+                    yield from rows
+            finally:
+                # Ends the statement's read transaction before the connection is reused.
+                cursor.close()
+        finally:
+            replicas.release(connection)
+
+    def write(self, sql, params=()):
+        """
+        Execute a data-modifying statement and commit it, or leave the commit to the
+        enclosing `transaction()` block if one is open.
+
+        Args:
+            sql (str): The SQL statement.
+            params (tuple or dict): The statement parameters.
+
+        Returns:
+            sqlite3.Cursor: The cursor used, for `lastrowid` and `rowcount`.
+        """
+        with self.lock:
+            cursor = self._run(sql, params)
+            self.commit()
+            return cursor
+
+    def _read(self, sql, params, fetch, record=None):
+        replicas = self.replicas
+        if (replicas is None or self.transaction_owner == threading.get_ident()
+                or (self.transaction_owner is None and self.connection.in_transaction)):
+            with self.lock:
+                return self._run(sql, params, fetch=fetch, record=record)
+        connection = replicas.acquire()
+        try:
+            return self._run(sql, params, fetch=fetch, connection=connection, record=record)
+        finally:
+            replicas.release(connection)
+
+    def _run(self, sql, params, fetch=None, many=False, connection=None, record=None):
+        connection = connection or self.connection
+        run = connection.executemany if many else connection.execute
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            cursor = run(sql, params)
+            if record is not None:
+                cursor.row_factory = row_factory(record)
+            return fetch(cursor) if fetch else cursor
+        start = time.perf_counter()
+        cursor = run(sql, params)
+        if record is not None:
+            cursor.row_factory = row_factory(record)
+        result = fetch(cursor) if fetch else cursor
+        instrumentation.record(sql, () if many else params, time.perf_counter() - start, connection)
+        return result
+
+    def _commit(self):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            self.connection.commit()
+            return
+        start = time.perf_counter()
+        self.connection.commit()
+        instrumentation.record("COMMIT", (), time.perf_counter() - start)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block of work as a single unit, committed once when the outermost block exits.
+
+        Model methods called inside the block join it: their `commit()` calls are deferred
+        to the outermost scope. If the final commit fails, the whole block is rolled back
+        before the error propagates. Nested blocks run inside a savepoint, so an exception raised
+        in an inner block undoes only that block's changes before propagating. Other threads
+        using this Database wait until the outermost block exits.
+
+        Yields:
+            Database: This database object.
+        """
+        with self.lock:
+            if self.transaction_depth == 0:
+                if not self.connection.in_transaction:
+                    # Take the write lock up front: a deferred transaction that reads and then
+                    # writes fails with SQLITE_BUSY if another connection committed in between.
+                    self.connection.execute("BEGIN IMMEDIATE")
+                self.transaction_depth += 1
+                self.transaction_owner = threading.get_ident()
+                try:
+                    yield self
+                except BaseException:
+                    self.connection.rollback()
+                    raise
+                else:
+                    try:
+                        self._commit()
+                    except BaseException:
+                        # A failed COMMIT leaves the transaction open; without the rollback the
+                        # next block would join it and commit this block's work with its own.
+                        self.connection.rollback()
+                        raise
+                    callbacks, self._after_commit = self._after_commit, []
+                    for callback in callbacks:
+                        callback()
+                finally:
+                    self.transaction_depth -= 1
+                    self.transaction_owner = None
+                    self._after_commit = []
+            else:
+                savepoint = f"sp_{self.transaction_depth}"
+                self.connection.execute(f"SAVEPOINT {savepoint}")
+                self.transaction_depth += 1
+                try:
+                    yield self
+                except BaseException:
+                    self.connection.execute(f"ROLLBACK TO {savepoint}")
+                    self.connection.execute(f"RELEASE {savepoint}")
+                    raise
+                else:
+                    self.connection.execute(f"RELEASE {savepoint}")
+                finally:
+                    self.transaction_depth -= 1
+
+    def after_commit(self, callback):
+        """
+        Run a callback once the open `transaction()` block commits, or at once if none is open.
+        The callbacks of a block that rolls back are dropped.
+
+        Args:
+            callback (callable): A function taking no arguments.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if self.transaction_depth:
+                self._after_commit.append(callback)
+                return
+        callback()
+
+    def commit(self):
+        """
+        Commit pending changes, unless a `transaction()` block is open, in which case the
+        commit is left to the outermost block.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if self.transaction_depth == 0:
+                self._commit()
+
+    def close(self):
+        """
+        Close the SQLite database connection, or return it to its pool if it was checked out of one.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            if self.pool is not None:
+                self.pool.release(self.connection)
+            else:
+                self.connection.close()
+
+    def __del__(self):
+        # Model methods fall back to `get_db()` without closing the result, so a pooled
+        # connection is handed back as soon as its Database wrapper goes out of scope.
+        try:
+            if self.pool is not None:
+                self.close()
+        except Exception:
+            pass
+
+class ConnectionPool:
+    """
+    A bounded, thread-safe pool of SQLite connections to a single database file.
+
+    Connections are reused across checkouts so that their page cache survives between
+    calls. Idle connections are closed after `idle_timeout` seconds, and a connection that
+    has been idle longer than `health_check_interval` is probed with `SELECT 1` before it
+    is handed out again.
+
+    Attributes:
+        db_name (str): The path of the SQLite database file.
+        profile (str): The name of the pragma profile applied to each connection.
+        max_size (int): The maximum number of open connections (idle and checked out).
+        idle_timeout (float): Seconds an idle connection is kept before it is closed.
+        health_check_interval (float): Idle seconds after which a connection is probed before reuse.
+        timeout (float): Seconds `acquire` waits for a free connection before giving up.
+    """
+    def __init__(self, db_name, profile=DEFAULT_PROFILE, max_size=5, idle_timeout=300.0,
+                 health_check_interval=30.0, timeout=10.0):
+        """
+        Initialize an empty pool. Connections are opened lazily on demand.
+
+        Args:
+            db_name (str): The path of the SQLite database file.
+            profile (str): The pragma profile for new connections. Defaults to 'durable'.
+            max_size (int): The maximum number of open connections. Defaults to 5.
+            idle_timeout (float): Seconds before an idle connection is closed. Defaults to 300.
+            health_check_interval (float): Idle seconds before a connection is probed. Defaults to 30.
+            timeout (float): Seconds to wait for a free connection. Defaults to 10.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.db_name = db_name
+        self.profile = profile
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self._idle = []
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        """int: The number of open connections, idle and checked out."""
+        with self._condition:
+            return self._size
+
+    @property
+    def idle(self):
+        """int: The number of idle connections waiting in the pool."""
+        with self._condition:
+            return len(self._idle)
+
+    def acquire(self):
+        """
+        Check a connection out of the pool, opening a new one if the pool is not full.
+
+        Returns:
+            sqlite3.Connection: A healthy connection with the application tables in place.
+
+        Raises:
+            TimeoutError: If no connection becomes available within `timeout` seconds.
+            ValueError: If the pool has been closed.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ValueError("Connection pool is closed")
+                self._prune_idle()
+                while self._idle:
+                    connection, last_used = self._idle.pop()
+                    if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(connection):
+                        return connection
+                    self._discard(connection)
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No database connection available after {self.timeout} seconds")
+                self._condition.wait(remaining)
+
+        try:
+            return self._open()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection):
+        """
+        Return a checked-out connection to the pool. Any open transaction is rolled back.
+
+        Args:
+            connection (sqlite3.Connection): A connection previously returned by `acquire`.
+
+        Returns:
+            None
+        """
+        with self._condition:
+            try:
+                if connection.in_transaction:
+                    connection.rollback()
+            except sqlite3.Error:
+                self._discard(connection)
+                self._condition.notify()
+                return
+            if self._closed:
+                self._discard(connection)
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
 
     def close(self):
         """
-        Close the SQLite database connection.
+        Close every idle connection and refuse further checkouts. Connections that are still
+        checked out are closed when they are released.
 
         Returns:
             None
         """
-        self.connection.close()
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._discard(connection)
+            self._condition.notify_all()
+
+    def _open(self):
+        return open_connection(self.db_name, check_same_thread=False, profile=self.profile)
+
+    def _prune_idle(self):
+        now = time.monotonic()
+        fresh = []
+        for connection, last_used in self._idle:
+            if now - last_used >= self.idle_timeout:
+                self._discard(connection)
+            else:
+                fresh.append((connection, last_used))
+        self._idle = fresh
+
+    def _is_healthy(self, connection):
+        try:
+            connection.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
 
-def get_db(db_name="ecommerce.db"):
+    def _discard(self, connection):
+        self._size -= 1
+        try:
+            connection.close()
+        except sqlite3.Error:
+            pass
+
+class ReplicaPool(ConnectionPool):
+    """
+    A pool of read-only connections used to serve pure reads alongside a writer connection.
+
+    By default each connection opens the database file with a `mode=ro` URI, so it reads the
+    latest committed data (in WAL mode, without waiting for the writer). With a
+    `snapshot_interval`, each connection instead holds a private in-memory copy made with the
+    SQLite backup API and refreshed when it is older than the interval on checkout; reads are
+    then up to `snapshot_interval` seconds stale and never touch the file, at the cost of one
+    copy of the database in memory per connection.
+
+    Attributes:
+        snapshot_interval (float): Seconds a snapshot is served before it is refreshed, or None
+                                   to read the file directly.
+    """
+    def __init__(self, db_name, snapshot_interval=None, **options):
+        """
+        Initialize an empty replica pool. Connections are opened lazily on demand.
+
+        Args:
+            db_name (str): The path of the SQLite database file. It must already exist.
+            snapshot_interval (float, optional): Serve refreshed in-memory snapshots instead of
+                                                 reading the file. Defaults to None.
+            **options: Keyword arguments forwarded to `ConnectionPool`.
+        """
+        options.setdefault("profile", "readonly")
+        super().__init__(db_name, **options)
+        self.snapshot_interval = snapshot_interval
+        self._snapshot_times = {}
+
+    def acquire(self):
+        """
+        Check a read-only connection out of the pool, refreshing its snapshot if it is stale.
+
+        Returns:
+            sqlite3.Connection: A read-only connection.
+        """
+        connection = super().acquire()
+        if self.snapshot_interval is not None:
+            refreshed = self._snapshot_times.get(connection)
+            if refreshed is None or time.monotonic() - refreshed >= self.snapshot_interval:
+                self._refresh(connection)
+        return connection
+
+    def _open(self):
+        if self.snapshot_interval is None:
+            connection = self._connect_read_only(check_same_thread=False)
+        else:
+            # Filled from the file by `_refresh` on its first checkout.
+            connection = sqlite3.connect(":memory:", check_same_thread=False)
+        apply_profile(connection, self.profile)
+        return connection
+
+    def _connect_read_only(self, check_same_thread=True):
+        uri = pathlib.Path(os.path.abspath(self.db_name)).as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+
+    def _refresh(self, connection):
+        source = self._connect_read_only()
+        try:
+            source.backup(connection)
+        finally:
+            source.close()
+        self._snapshot_times[connection] = time.monotonic()
+
+    def _discard(self, connection):
+        self._snapshot_times.pop(connection, None)
+        super()._discard(connection)
+
+_pools = {}
+_pools_lock = threading.Lock()
+_product_caches = {}
+
+def set_instrumentation(hook):
+    """
+    Install a process-wide instrumentation hook on every `Database`, such as a `QueryStats`.
+
+    Args:
+        hook: An object with a `record(sql, params, elapsed, connection=None)` method, or None
+              to turn instrumentation off.
+
+    Returns:
+        None
+    """
+    Database.instrumentation = hook
+
+def get_pool(db_name=DEFAULT_DB_NAME, profile=DEFAULT_PROFILE, **options):
+    """
+    Return the process-wide connection pool for a database file and pragma profile,
+    creating it on first use.
+
+    Args:
+        db_name (str): The path of the SQLite database file. Defaults to 'ecommerce.db'.
+        profile (str): The pragma profile of the pooled connections. Defaults to 'durable'.
+        **options: Keyword arguments forwarded to `ConnectionPool` when the pool is created.
+
+    Returns:
+        ConnectionPool: The shared pool for `db_name` and `profile`.
+    """
+    key = (os.path.abspath(db_name), profile)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_name, profile=profile, **options)
+        return pool
+
+def get_replica_pool(db_name=DEFAULT_DB_NAME, snapshot_interval=None, **options):
+    """
+    Return the process-wide read replica pool for a database file, creating it on first use.
+
+    Args:
+        db_name (str): The path of the SQLite database file. Defaults to 'ecommerce.db'.
+        snapshot_interval (float, optional): Serve in-memory snapshots refreshed at this interval
+                                             instead of reading the file. Defaults to None.
+        **options: Keyword arguments forwarded to `ReplicaPool` when the pool is created.
+
+    Returns:
+        ReplicaPool: The shared replica pool for `db_name`.
+    """
+    key = (os.path.abspath(db_name), "replica", snapshot_interval)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ReplicaPool(db_name, snapshot_interval=snapshot_interval, **options)
+        return pool
+
+def get_product_cache(db_name=DEFAULT_DB_NAME):
+    """
+    Return the process-wide product cache for a database file, creating it on first use.
+
+    Args:
+        db_name (str): The path of the SQLite database file. Defaults to 'ecommerce.db'.
+
+    Returns:
+        LRUCache: The shared product cache for `db_name`.
+    """
+    key = os.path.abspath(db_name)
+    with _pools_lock:
+        cache = _product_caches.get(key)
+        if cache is None:
+            cache = _product_caches[key] = LRUCache()
+        return cache
+
+def close_pools():
+    """
+    Close and forget every process-wide connection pool, and drop the product caches.
+
+    Returns:
+        None
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        _product_caches.clear()
+    for pool in pools:
+        pool.close()
+
+def apply_profile(connection, profile):
+    """
+    Configure a connection with the pragmas of a named profile.
+
+    Args:
+        connection (sqlite3.Connection): The SQLite connection object to configure.
+        profile (str): A key of `PRAGMA_PROFILES`, or None to keep SQLite's defaults.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the profile name is unknown.
+    """
+    if profile is None:
+        return
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown pragma profile: {profile}")
+    for pragma, value in PRAGMA_PROFILES[profile]:
+        if pragma == "journal_mode":
+            _set_journal_mode(connection, value)
+        else:
+            connection.execute(f"PRAGMA {pragma} = {value}").fetchall()
+
+JOURNAL_MODE_ATTEMPTS = 10
+
+def _set_journal_mode(connection, mode):
+    # The journal mode is stored in the file, so only the first connection has to switch it.
+    # Switching needs an exclusive lock and is not covered by busy_timeout, so connections
+    # opening a fresh file at once can fail with "database is locked": retry with a backoff,
+    # and stop as soon as another connection has switched the file.
+    for attempt in range(JOURNAL_MODE_ATTEMPTS):
+        if connection.execute("PRAGMA journal_mode").fetchone()[0].lower() == mode.lower():
+            return
+        try:
+            connection.execute(f"PRAGMA journal_mode = {mode}").fetchall()
+            return
+        except sqlite3.OperationalError:
+            if attempt == JOURNAL_MODE_ATTEMPTS - 1:
+                raise
+            time.sleep(0.01 * 2 ** attempt)
+
+def open_connection(db_name, check_same_thread=True, profile=DEFAULT_PROFILE):
+    """
+    Open a new SQLite connection, apply any pending schema migrations and configure it
+    with a pragma profile.
+
+    Args:
+        db_name (str): The name of the SQLite database file.
+        check_same_thread (bool): Passed through to `sqlite3.connect`. Defaults to True.
+        profile (str): The pragma profile to apply. Defaults to 'durable'.
+
+    Returns:
+        sqlite3.Connection: The new connection.
+    """
+    connection = sqlite3.connect(db_name, check_same_thread=check_same_thread)
+    migrate(connection)
+    apply_profile(connection, profile)
+    return connection
+
+def get_db(db_name=DEFAULT_DB_NAME, profile=DEFAULT_PROFILE, replicas=True, snapshot_interval=None, product_cache=True):
     """
     Connect to the SQLite database and create necessary tables if they don't exist.
 
+    File databases are served from a process-wide `ConnectionPool`, so repeated calls reuse
+    connections instead of opening a new one each time; closing the returned object hands the
+    connection back to the pool. Pure reads are routed to a shared `ReplicaPool` of read-only
+    connections, so browsing does not queue behind writes. ':memory:' databases always get a
+    single private connection.
+
     Args:
         db_name (str): The name of the SQLite database file. Defaults to 'ecommerce.db'.
+        profile (str): The pragma profile, one of 'durable', 'throughput' or 'readonly'
+                       (see `PRAGMA_PROFILES`), or None for SQLite's defaults. Defaults to 'durable'.
+        replicas (bool): Route pure reads to read-only connections. Defaults to True.
+        snapshot_interval (float, optional): Have the read-only connections serve in-memory snapshots
+                                             refreshed at this interval. Defaults to None.
+        product_cache (bool): Serve product reads through the process-wide `LRUCache` of the file
+                              (a private one for ':memory:'). Defaults to True.
     
     Returns:
         Database: A custom `Database` object that wraps the SQLite connection and cursor.
+
+    Raises:
+        ValueError: If the profile name is unknown.
     """
-    connection = sqlite3.connect(db_name)
-    cursor = connection.cursor()
-    create_tables(connection)
-    return Database(connection, cursor)
+    if db_name == ":memory:":
+        connection = open_connection(db_name, check_same_thread=False, profile=profile)
+        return Database(connection, connection.cursor(), product_cache=LRUCache() if product_cache else None)
+    pool = get_pool(db_name, profile)
+    connection = pool.acquire()
+    replica_pool = get_replica_pool(db_name, snapshot_interval) if replicas else None
+    cache = get_product_cache(db_name) if product_cache else None
+    return Database(connection, connection.cursor(), pool=pool, replicas=replica_pool, product_cache=cache)
 
 def create_tables(connection):
     """
-    Create necessary tables for the application: 'users', 'products', 'carts', and 'orders'.
+    Create necessary tables for the application by bringing the schema up to date.
+
+    Kept as the public entry point for callers that prepare a connection themselves;
+    equivalent to `migrate(connection)`.
 
     Args:
         connection (sqlite3.Connection): The SQLite connection object to the database.
@@ -53,8 +800,60 @@ def create_tables(connection):
     Returns:
         None
     """
+    migrate(connection)
+
+def get_schema_version(connection):
+    """
+    Read the schema version recorded in the database header.
+
+    Args:
+        connection (sqlite3.Connection): The SQLite connection object to the database.
+
+    Returns:
+        int: The number of migrations applied to the database.
+    """
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(connection):
+    """
+    Apply any pending schema migrations, recording progress in `PRAGMA user_version`.
+
+    An up-to-date database costs a single pragma read. Each pending migration runs in its
+    own write transaction together with the version bump, so a failed migration leaves the
+    database at the last good version.
+
+    Args:
+        connection (sqlite3.Connection): The SQLite connection object to the database.
+
+    Returns:
+        int: The schema version after migrating.
+    """
+    current = get_schema_version(connection)
+    if current >= SCHEMA_VERSION:
+        return current
+
     cursor = connection.cursor()
-    
+    for version, migration in enumerate(MIGRATIONS, start=1):
+        if version <= current:
+            continue
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # Another connection may have migrated while we waited for the write lock.
+            if get_schema_version(connection) < version:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {version}")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+    return SCHEMA_VERSION
+
+def _create_initial_tables(cursor):
+    """
+    Migration 1: the 'users', 'products', 'carts', and 'orders' tables.
+
+    Uses `IF NOT EXISTS` so databases created before schema versioning are adopted as-is.
+    """
     cursor.execute('''CREATE TABLE IF NOT EXISTS users (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         username TEXT UNIQUE,
@@ -87,5 +886,210 @@ def create_tables(connection):
             total REAL,
             status TEXT DEFAULT 'pending',  -- Adiciona o status da ordem com valor padrão
             FOREIGN KEY(user_id) REFERENCES users(id))''')
-    
-    connection.commit()
+
+def _create_lookup_indexes(cursor):
+    """
+    Migration 2: secondary indexes for the per-user and per-status lookups.
+
+    `carts` needs none: its UNIQUE(user_id, product_id) index already leads with user_id.
+    """
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_user_id ON products (user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_user_id ON orders (user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status)')
+
+def _create_product_search(cursor):
+    """
+    Migration 3: an FTS5 index over product names and descriptions.
+
+    `products_fts` is an external-content table: it stores only the index and reads the text
+    from `products`. Triggers keep it in step with every insert, delete and update of the
+    indexed columns, and existing products are indexed by a rebuild.
+    """
+    cursor.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                        name,
+                        description,
+                        content='products',
+                        content_rowid='id')''')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+                        INSERT INTO products_fts (rowid, name, description)
+                        VALUES (new.id, new.name, new.description);
+                      END''')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+                        INSERT INTO products_fts (products_fts, rowid, name, description)
+                        VALUES ('delete', old.id, old.name, old.description);
+                      END''')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description ON products BEGIN
+                        INSERT INTO products_fts (products_fts, rowid, name, description)
+                        VALUES ('delete', old.id, old.name, old.description);
+                        INSERT INTO products_fts (rowid, name, description)
+                        VALUES (new.id, new.name, new.description);
+                      END''')
+
+    # Rank by BM25 with a match in the name worth ten in the description; ordering by `rank`
+    # lets FTS5 sort the matches itself instead of a temporary B-tree.
+    cursor.execute("INSERT INTO products_fts (products_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')")
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+def _create_catalog_filter_indexes(cursor):
+    """
+    Migration 4: indexes for filtering and sorting the catalog by price, seller and stock.
+
+    A price range, alone or within a seller's products, is a range read on `price` or
+    `(user_id, price)`, which also yields the rows in price order. The partial indexes hold
+    only products in stock, so an in-stock listing never visits sold-out rows. The name
+    indexes let a listing sorted by name stop after one page instead of sorting everything.
+    `(user_id, price)` also serves every per-seller lookup, so migration 2's
+    `idx_products_user_id` is dropped rather than maintained on every product write.
+    """
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_price ON products (price)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_name ON products (name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_user_price ON products (user_id, price)')
+    cursor.execute('DROP INDEX IF EXISTS idx_products_user_id')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_in_stock_price ON products (price) WHERE quantity > 0')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_in_stock_name ON products (name) WHERE quantity > 0')
+
+def _move_ascii_art_out_of_line(cursor):
+    """
+    Migration 5: ASCII art moves from `products.ascii_art` to a separate `ascii_art` table.
+
+    Art is stored once per distinct content, keyed by its SHA-256 hash and compressed with
+    zlib, and products reference it by `ascii_art_id`. The products table is left holding
+    only small rows, so listings and scans read far fewer pages. Triggers delete a piece of
+    art when the last product using it is deleted or given other art.
+    """
+    cursor.execute('''CREATE TABLE IF NOT EXISTS ascii_art (
+                        id INTEGER PRIMARY KEY,
+                        hash TEXT UNIQUE NOT NULL,
+                        data BLOB NOT NULL)''')
+    cursor.execute('ALTER TABLE products ADD COLUMN ascii_art_id INTEGER REFERENCES ascii_art(id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_products_ascii_art_id ON products (ascii_art_id)')
+
+    # Move the existing art a bounded number of products at a time.
+    art_ids = {}
+    last_id = 0
+    while True:
+        rows = cursor.execute('''SELECT id, ascii_art FROM products
+                                 WHERE id > ? AND ascii_art IS NOT NULL
+                                 ORDER BY id LIMIT 500''', (last_id,)).fetchall()
+        if not rows:
+            break
+        for product_id, ascii_art in rows:
+            digest = ascii_art_hash(ascii_art)
+            if digest not in art_ids:
+                cursor.execute('INSERT INTO ascii_art (hash, data) VALUES (?, ?)', (digest, compress_ascii_art(ascii_art)))
+                art_ids[digest] = cursor.lastrowid
+            cursor.execute('UPDATE products SET ascii_art_id = ? WHERE id = ?', (art_ids[digest], product_id))
+        last_id = rows[-1][0]
+    cursor.execute('ALTER TABLE products DROP COLUMN ascii_art')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS ascii_art_release_on_delete
+                      AFTER DELETE ON products WHEN old.ascii_art_id IS NOT NULL BEGIN
+                        DELETE FROM ascii_art WHERE id = old.ascii_art_id
+                        AND NOT EXISTS (SELECT 1 FROM products WHERE ascii_art_id = old.ascii_art_id);
+                      END''')
+
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS ascii_art_release_on_update
+                      AFTER UPDATE OF ascii_art_id ON products
+                      WHEN old.ascii_art_id IS NOT new.ascii_art_id AND old.ascii_art_id IS NOT NULL BEGIN
+                        DELETE FROM ascii_art WHERE id = old.ascii_art_id
+                        AND NOT EXISTS (SELECT 1 FROM products WHERE ascii_art_id = old.ascii_art_id);
+                      END''')
+
+# The formats checkout has written to `orders.order_details`, one line per product:
+# "<name> - $<unit price> (x<quantity>)", and, from the command-line UI's own checkout,
+# "<name> (x<quantity>) - $<line total>".
+_ORDER_LINE_UNIT_PRICE = re.compile(r"(?P<name>.+) - \$(?P<price>[\d.eE+-]+) \(x(?P<quantity>\d+)\)")
+_ORDER_LINE_TOTAL = re.compile(r"(?P<name>.+) \(x(?P<quantity>\d+)\) - \$(?P<total>[\d.eE+-]+)")
+
+def _parse_order_details(text):
+    """
+    Split the text of an order into (product name, unit price, quantity) lines.
+
+    Returns:
+        list: The lines, or None if any line is in neither checkout format.
+    """
+    lines = []
+    for line in (text or "").splitlines():
+        try:
+            match = _ORDER_LINE_UNIT_PRICE.fullmatch(line)
+            if match:
+                lines.append((match["name"], float(match["price"]), int(match["quantity"])))
+                continue
+            match = _ORDER_LINE_TOTAL.fullmatch(line)
+            if match and int(match["quantity"]) > 0:
+                lines.append((match["name"], float(match["total"]) / int(match["quantity"]), int(match["quantity"])))
+                continue
+        except ValueError:
+            pass
+        return None
+    return lines or None
+
+def _create_order_items(cursor):
+    """
+    Migration 6: the 'order_items' table, one row per product in an order.
+
+    Orders used to record what was bought only as text in `orders.order_details`. Each line
+    keeps the product, its seller and a snapshot of its name and unit price at purchase, so
+    sales can be queried per product or per seller. Existing orders are backfilled from their
+    text: an order whose text is not in a checkout format gets no lines, and a line whose
+    name matches no product, or several, keeps its name with no product or seller.
+    """
+    cursor.execute('''CREATE TABLE IF NOT EXISTS order_items (
+                        id INTEGER PRIMARY KEY,
+                        order_id INTEGER NOT NULL REFERENCES orders(id),
+                        product_id INTEGER REFERENCES products(id),
+                        seller_id INTEGER REFERENCES users(id),
+                        product_name TEXT NOT NULL,
+                        unit_price REAL NOT NULL,
+                        quantity INTEGER NOT NULL)''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_order_id ON order_items (order_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_product_id ON order_items (product_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_order_items_seller_id ON order_items (seller_id)')
+    cursor.execute('''CREATE TRIGGER IF NOT EXISTS order_items_delete_with_order
+                      AFTER DELETE ON orders BEGIN
+                        DELETE FROM order_items WHERE order_id = old.id;
+                      END''')
+
+    # Backfill a bounded number of orders at a time.
+    products = {}
+    last_id = 0
+    while True:
+        rows = cursor.execute('''SELECT id, order_details FROM orders
+                                 WHERE id > ? ORDER BY id LIMIT 500''', (last_id,)).fetchall()
+        if not rows:
+            break
+        for order_id, order_details in rows:
+            for name, unit_price, quantity in _parse_order_details(order_details) or ():
+                if name not in products:
+                    matches = cursor.execute('SELECT id, user_id FROM products WHERE name = ? LIMIT 2', (name,)).fetchall()
+                    products[name] = matches[0] if len(matches) == 1 else (None, None)
+                cursor.execute('''INSERT INTO order_items (order_id, product_id, seller_id, product_name, unit_price, quantity)
+                                  VALUES (?, ?, ?, ?, ?, ?)''', (order_id, *products[name], name, unit_price, quantity))
+        last_id = rows[-1][0]
+
+def _add_order_item_reservations(cursor):
+    """
+    Migration 7: `order_items.reserved`, set on the lines whose units checkout took out of
+    stock, so canceling an order returns only those.
+
+    Existing lines are left unreserved: lines backfilled from orders placed before checkout
+    reserved stock cannot be told apart from later ones, and returning units that were never
+    taken would overstate the stock.
+    """
+    cursor.execute('ALTER TABLE order_items ADD COLUMN reserved INTEGER NOT NULL DEFAULT 0')
+
+
+MIGRATIONS = [
+    _create_initial_tables,
+    _create_lookup_indexes,
+    _create_product_search,
+    _create_catalog_filter_indexes,
+    _move_ascii_art_out_of_line,
+    _create_order_items,
+    _add_order_item_reservations,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
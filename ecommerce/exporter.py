@@ -0,0 +1,173 @@
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from ecommerce.db import get_db, DEFAULT_DB_NAME, DEFAULT_FETCH_SIZE
+from ecommerce.importer import detect_format
+from ecommerce.storage import ORDER_COLUMNS, PRODUCT_COLUMNS
+from ecommerce.user import User
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+
+
+def _check_arguments(columns, available, file_format, batch_size):
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format '{file_format}'; expected one of {', '.join(FORMATS)}")
+    if batch_size < 1:
+        raise ValueError('Batch size must be at least 1')
+    columns = list(columns or available)
+    unknown = [column for column in columns if column not in available]
+    if unknown or not columns:
+        raise ValueError(f"Unknown columns {', '.join(unknown) or '(none given)'}; "
+                         f"expected some of {', '.join(available)}")
+    return columns
+
+
+def write_rows(file, rows, columns, file_format):
+    """
+    Write rows to an open text file, one at a time.
+
+    Args:
+        file (file): The open text file. For CSV, open it with `newline=''`.
+        rows (iterable): Tuples of values in the order of `columns`.
+        columns (list): The column names.
+        file_format (str): 'csv' for a header row and one line per row, or 'jsonl' for one
+                           JSON object per line.
+
+    Returns:
+        int: The number of rows written.
+    """
+    count = 0
+    if file_format == "csv":
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+        return count
+    for row in rows:
+        file.write(json.dumps(dict(zip(columns, row))) + "\n")
+        count += 1
+    return count
+
+
+def export_products(file, file_format="csv", columns=None, min_price=None, max_price=None, seller_id=None,
+                    in_stock=False, batch_size=DEFAULT_FETCH_SIZE, db=None):
+    """
+    Stream the catalog, or the part of it matching some filters, to a CSV or JSONL file.
+
+    Rows are read with `fetchmany` and written as they arrive, so memory use stays constant
+    however large the catalog is. Products are written in ID order.
+
+    Args:
+        file (file): The open text file to write to. For CSV, open it with `newline=''`.
+        file_format (str): 'csv' (the default) or 'jsonl'.
+        columns (list, optional): The columns to export, from `PRODUCT_COLUMNS`. Defaults to all.
+        min_price (float, optional): The lowest price included.
+        max_price (float, optional): The highest price included.
+        seller_id (int, optional): Only the products of this user.
+        in_stock (bool): Only products with a quantity above zero. Defaults to False.
+        batch_size (int): Rows fetched at a time. Defaults to 1000.
+        db (Database, optional): A database connection object. If not provided,
+                                 a new connection will be created using `get_db()`.
+
+    Returns:
+        int: The number of products exported.
+
+    Raises:
+        ValueError: If the format or a column is unknown, or the batch size is not positive.
+    """
+    columns = _check_arguments(columns, PRODUCT_COLUMNS, file_format, batch_size)
+    db = db or get_db()
+    rows = db.storage.iter_products(columns, min_price, max_price, seller_id, in_stock, batch_size)
+    return write_rows(file, rows, columns, file_format)
+
+
+def export_orders(file, file_format="csv", columns=None, user_id=None, status=None,
+                  batch_size=DEFAULT_FETCH_SIZE, db=None):
+    """
+    Stream the orders, or those matching some filters, to a CSV or JSONL file.
+
+    Rows are read with `fetchmany` and written as they arrive, so memory use stays constant
+    however many orders there are. Orders are written in ID order.
+
+    Args:
+        file (file): The open text file to write to. For CSV, open it with `newline=''`.
+        file_format (str): 'csv' (the default) or 'jsonl'.
+        columns (list, optional): The columns to export, from `ORDER_COLUMNS`. Defaults to all.
+        user_id (int, optional): Only the orders of this user.
+        status (str, optional): Only orders with this status.
+        batch_size (int): Rows fetched at a time. Defaults to 1000.
+        db (Database, optional): A database connection object. If not provided,
+                                 a new connection will be created using `get_db()`.
+
+    Returns:
+        int: The number of orders exported.
+
+    Raises:
+        ValueError: If the format or a column is unknown, or the batch size is not positive.
+    """
+    columns = _check_arguments(columns, ORDER_COLUMNS, file_format, batch_size)
+    db = db or get_db()
+    rows = db.storage.iter_orders(columns, user_id, status, batch_size)
+    return write_rows(file, rows, columns, file_format)
+
+
+def main(argv=None):
+    """
+    Command-line entry point: `python -m ecommerce.exporter {products,orders} [-o FILE]`.
+    """
+    parser = argparse.ArgumentParser(description="Export the catalog or the orders as CSV or JSONL.")
+    parser.add_argument("--db", default=DEFAULT_DB_NAME, help="the SQLite database file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_FETCH_SIZE, help="rows fetched at a time")
+    tables = parser.add_subparsers(dest="table", required=True)
+
+    products = tables.add_parser("products", help="export products")
+    products.add_argument("--min-price", type=float, help="the lowest price included")
+    products.add_argument("--max-price", type=float, help="the highest price included")
+    products.add_argument("--seller", help="only the products of this username")
+    products.add_argument("--in-stock", action="store_true", help="only products with a quantity above zero")
+
+    orders = tables.add_parser("orders", help="export orders")
+    orders.add_argument("--user", help="only the orders of this username")
+    orders.add_argument("--status", help="only orders with this status")
+
+    for table, available in ((products, PRODUCT_COLUMNS), (orders, ORDER_COLUMNS)):
+        table.add_argument("-o", "--output", default="-", help="the file to write; '-' (the default) for stdout")
+        table.add_argument("--format", choices=FORMATS, help="the file format; inferred from the output file name, "
+                                                             "CSV for stdout")
+        table.add_argument("--columns", help=f"comma-separated columns to export, from: {', '.join(available)}")
+    args = parser.parse_args(argv)
+
+    db = get_db(args.db)
+    output = None
+    try:
+        file_format = args.format or ("csv" if args.output == "-" else detect_format(args.output))
+        columns = args.columns.split(",") if args.columns else None
+        output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+        start = time.perf_counter()
+        if args.table == "products":
+            seller_id = User.get_user_id(args.seller, db) if args.seller else None
+            count = export_products(output, file_format, columns, args.min_price, args.max_price, seller_id,
+                                    args.in_stock, args.batch_size, db)
+        else:
+            user_id = User.get_user_id(args.user, db) if args.user else None
+            count = export_orders(output, file_format, columns, user_id, args.status, args.batch_size, db)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    finally:
+        if output is not None and output is not sys.stdout:
+            output.close()
+        db.close()
+    elapsed = time.perf_counter() - start
+    logger.info("Exported %d %s in %.2fs", count, args.table, elapsed)
+    # The summary goes to stderr so that it never mixes with data written to stdout.
+    print(f"Exported {count} {args.table} in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import time
+from itertools import islice
+from ecommerce.db import get_db, DEFAULT_DB_NAME
+from ecommerce.user import User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+FORMATS = ("csv", "jsonl")
+
+
+class ImportReport:
+    """
+    The outcome of a bulk import.
+
+    Attributes:
+        imported (int): Rows inserted.
+        rejected (int): Rows written to the error file instead.
+        batches (int): Batches committed.
+        elapsed (float): Wall time of the import, in seconds.
+    """
+    def __init__(self):
+        """
+        Initialize an empty report.
+        """
+        self.imported = 0
+        self.rejected = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        """float: Rows read (imported or rejected) per second of wall time."""
+        return (self.imported + self.rejected) / self.elapsed if self.elapsed else 0.0
+
+
+def detect_format(path):
+    """
+    Infer the file format from a path's extension.
+
+    Args:
+        path (str): The file path.
+
+    Returns:
+        str: 'csv' or 'jsonl'.
+
+    Raises:
+        ValueError: If the extension is not .csv, .jsonl or .ndjson.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of '{path}'; use a .csv or .jsonl file or pass the format")
+
+
+def read_rows(file, file_format):
+    """
+    Stream the records of an open CSV or JSONL file, one at a time.
+
+    Args:
+        file (file): The open text file.
+        file_format (str): 'csv' or 'jsonl'.
+
+    Yields:
+        tuple: (line number, record). The record is a dict, or for a JSONL line that is not a
+               JSON object, a ValueError describing the problem.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, ValueError(f"invalid JSON: {e.msg}")
+            continue
+        yield line_number, record if isinstance(record, dict) else ValueError("not a JSON object")
+
+
+def validate_row(record, user_id):
+    """
+    Check a record and convert it to a products row.
+
+    Args:
+        record (dict): The fields 'name' and 'price' (required), 'description', 'quantity'
+                       and 'ascii_art' (optional).
+        user_id (int): The seller the product belongs to.
+
+    Returns:
+        tuple: (name, price, description, user_id, ascii_art, quantity).
+
+    Raises:
+        ValueError: If a field is missing or invalid.
+    """
+    name = _text_field(record, "name").strip()
+    if not name:
+        raise ValueError("name is required")
+    description = _text_field(record, "description")
+    ascii_art = _text_field(record, "ascii_art")
+    price = record.get("price")
+    if isinstance(price, bool):
+        raise ValueError(f"invalid price {price!r}")
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price {price!r}")
+    if not math.isfinite(price) or price < 0:
+        raise ValueError(f"invalid price {record.get('price')!r}")
+    quantity = record.get("quantity")
+    if quantity in (None, ""):
+        quantity = 0
+    elif isinstance(quantity, bool) or (isinstance(quantity, float) and not quantity.is_integer()):
+        raise ValueError(f"invalid quantity {quantity!r}")
+    else:
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid quantity {quantity!r}")
+    if quantity < 0:
+        raise ValueError(f"invalid quantity {quantity!r}")
+    return name, price, description, user_id, ascii_art or None, quantity
+
+
+def _text_field(record, field):
+    # A text field, "" if missing. JSONL values of other types would fail to bind in the
+    # batch insert and take the whole batch down with them, so they are rejected here.
+    value = record.get(field)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"invalid {field} {value!r}")
+    return value
+
+
+class _ErrorWriter:
+    """Writes rejected records to an error file in the input's format, opening it on first use."""
+
+    def __init__(self, path, file_format):
+        self.path = path
+        self.file_format = file_format
+        self.file = None
+        self.writer = None
+
+    def write(self, line_number, record, error):
+        if self.path is None:
+            return
+        if self.file is None:
+            self.file = open(self.path, "w", newline="" if self.file_format == "csv" else None)
+        if self.file_format == "jsonl":
+            self.file.write(json.dumps({"line": line_number, "error": error, "row": record}) + "\n")
+            return
+        if self.writer is None:
+            fields = ["line", "error"] + [field for field in record if field not in (None, "line", "error")]
+            self.writer = csv.DictWriter(self.file, fieldnames=fields, extrasaction="ignore")
+            self.writer.writeheader()
+        self.writer.writerow({**record, "line": line_number, "error": error})
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def import_products(path, user_id, batch_size=DEFAULT_BATCH_SIZE, error_path=None, file_format=None, db=None):
+    """
+    Load a seller's catalog from a CSV or JSONL file.
+
+    The file is streamed, so memory use is bounded by the batch size rather than the file
+    size. Each batch of valid rows is inserted with a single `executemany` in its own
+    transaction. Invalid rows are written, with their line number and the reason, to the
+    error file and do not stop the load. A batch that fails to insert is rolled back and
+    its rows are rejected too.
+
+    Args:
+        path (str): The CSV or JSONL file. CSV files need a header row.
+        user_id (int): The seller the products belong to.
+        batch_size (int): Rows per transaction. Defaults to 1000.
+        error_path (str, optional): Where to write rejected rows, in the input's format.
+                                    Rejected rows are only counted if not given.
+        file_format (str, optional): 'csv' or 'jsonl'. Inferred from the extension if not given.
+        db (Database, optional): A database connection object. If not provided,
+                                 a new connection will be created using `get_db()`.
+
+    Returns:
+        ImportReport: Counts of imported and rejected rows and the throughput.
+
+    Raises:
+        ValueError: If the batch size is not positive or the format is unknown.
+    """
+    if batch_size < 1:
+        raise ValueError('Batch size must be at least 1')
+    file_format = file_format or detect_format(path)
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format '{file_format}'; expected one of {', '.join(FORMATS)}")
+    db = db or get_db()
+    report = ImportReport()
+    errors = _ErrorWriter(error_path, file_format)
+    start = time.perf_counter()
+    try:
+        with open(path, newline="" if file_format == "csv" else None) as file:
+            records = read_rows(file, file_format)
+            while True:
+                chunk = list(islice(records, batch_size))
+                if not chunk:
+                    break
+                batch = []
+                for line_number, record in chunk:
+                    try:
+                        if isinstance(record, Exception):
+                            raise record
+                        batch.append((line_number, record, validate_row(record, user_id)))
+                    except ValueError as e:
+                        errors.write(line_number, record if isinstance(record, dict) else None, str(e))
+                        report.rejected += 1
+                if not batch:
+                    continue
+                try:
+                    with db.transaction():
+                        db.storage.insert_products([row for _, _, row in batch])
+                except Exception as e:
+                    logger.warning("Batch ending at line %d failed: %s", chunk[-1][0], e)
+                    for line_number, record, _ in batch:
+                        errors.write(line_number, record, f"batch failed: {e}")
+                    report.rejected += len(batch)
+                    continue
+                report.imported += len(batch)
+                report.batches += 1
+                report.elapsed = time.perf_counter() - start
+                logger.info("Imported %d rows (%.0f rows/s)", report.imported, report.rows_per_second)
+    finally:
+        errors.close()
+        report.elapsed = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    """
+    Command-line entry point: `python -m ecommerce.importer FILE --seller USERNAME`.
+    """
+    parser = argparse.ArgumentParser(description="Bulk import a seller's products from a CSV or JSONL file.")
+    parser.add_argument("path", help="the CSV (with a header row) or JSONL file")
+    parser.add_argument("--seller", required=True, help="the username of the seller the products belong to")
+    parser.add_argument("--db", default=DEFAULT_DB_NAME, help="the SQLite database file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--errors", help="write rejected rows to this file")
+    parser.add_argument("--format", choices=FORMATS, help="the file format, if not clear from the extension")
+    args = parser.parse_args(argv)
+
+    db = get_db(args.db)
+    try:
+        user_id = User.get_user_id(args.seller, db)
+        report = import_products(args.path, user_id, batch_size=args.batch_size, error_path=args.errors,
+                                 file_format=args.format, db=db)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"error: {e}\n")
+    finally:
+        db.close()
+    print(f"Imported {report.imported} products, rejected {report.rejected}, "
+          f"in {report.elapsed:.2f}s ({report.rows_per_second:.0f} rows/s)")
+    if report.rejected and args.errors:
+        print(f"Rejected rows were written to {args.errors}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import logging
+import math
+import re
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def normalize_sql(sql):
+    """
+    Reduce a SQL statement to a canonical form so that executions of the same query are
+    grouped together.
+
+    Whitespace is collapsed, literals are replaced by `?` and placeholder lists such as
+    `IN (?, ?, ?)` are folded to `IN (?, ...)`.
+
+    Args:
+        sql (str): The SQL statement.
+
+    Returns:
+        str: The normalized statement.
+    """
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return _PLACEHOLDER_LIST.sub("?, ...", sql)
+
+
+def percentile(sorted_samples, fraction):
+    """
+    Return the nearest-rank percentile of a sorted list of samples.
+
+    Args:
+        sorted_samples (list): The samples in ascending order.
+        fraction (float): The percentile as a fraction between 0 and 1.
+
+    Returns:
+        float: The sample at the requested rank, or 0.0 if there are no samples.
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = min(max(math.ceil(fraction * len(sorted_samples)), 1), len(sorted_samples))
+    return sorted_samples[rank - 1]
+
+
+class StatementStats:
+    """
+    Timing statistics for one normalized statement.
+
+    Attributes:
+        sql (str): The normalized statement.
+        count (int): The number of executions.
+        total (float): The total time spent, in seconds.
+        max (float): The slowest execution, in seconds.
+        samples (collections.deque): The most recent execution times, used for percentiles.
+    """
+    def __init__(self, sql, max_samples):
+        """
+        Initialize empty statistics for a statement.
+
+        Args:
+            sql (str): The normalized statement.
+            max_samples (int): The number of recent timings to retain.
+        """
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+    def add(self, elapsed):
+        """Record one execution time in seconds."""
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.samples.append(elapsed)
+
+    def percentiles(self):
+        """
+        Compute the p50, p95 and p99 execution times over the retained samples.
+
+        Returns:
+            tuple: The (p50, p95, p99) times in seconds.
+        """
+        ordered = sorted(self.samples)
+        return percentile(ordered, 0.50), percentile(ordered, 0.95), percentile(ordered, 0.99)
+
+
+class QueryStats:
+    """
+    A `Database` instrumentation hook that aggregates per-statement timings and logs slow
+    statements together with their parameters and query plan.
+
+    Attributes:
+        slow_query_threshold (float): Executions at least this many seconds long are logged.
+        max_samples (int): How many recent timings are kept per statement for percentiles.
+    """
+    def __init__(self, slow_query_threshold=0.1, max_samples=10000):
+        """
+        Initialize an empty collector.
+
+        Args:
+            slow_query_threshold (float): Seconds after which a statement is logged as slow.
+                                          Defaults to 0.1. Use None to disable the slow-query log.
+            max_samples (int): Timings retained per statement. Defaults to 10000.
+        """
+        self.slow_query_threshold = slow_query_threshold
+        self.max_samples = max_samples
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql, params, elapsed, connection=None):
+        """
+        Record one statement execution. Called by `Database` after every statement.
+
+        Args:
+            sql (str): The statement as executed.
+            params (tuple or dict): The statement parameters.
+            elapsed (float): The execution time in seconds.
+            connection (sqlite3.Connection, optional): The connection the statement ran on,
+                                                      used to fetch the plan of slow statements.
+
+        Returns:
+            None
+        """
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats(key, self.max_samples)
+            stats.add(elapsed)
+
+        if self.slow_query_threshold is not None and elapsed >= self.slow_query_threshold:
+            plan = self.explain(connection, sql, params)
+            logger.warning("Slow query (%.1f ms): %s params=%r plan=%s",
+                           elapsed * 1000, key, params, " | ".join(plan) or "n/a")
+
+    def explain(self, connection, sql, params):
+        """
+        Fetch the query plan of a statement, if it has one.
+
+        Args:
+            connection (sqlite3.Connection): The connection to explain on.
+            sql (str): The statement.
+            params (tuple or dict): The statement parameters.
+
+        Returns:
+            list: The plan detail lines, empty if the statement cannot be explained.
+        """
+        if connection is None or sql.split(None, 1)[0].upper() not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+            return []
+        try:
+            return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+        except Exception:
+            return []
+
+    def statements(self):
+        """
+        Return the statistics of every statement seen so far, slowest total first.
+
+        Returns:
+            list: `StatementStats` objects sorted by total time, descending.
+        """
+        with self._lock:
+            return sorted(self._statements.values(), key=lambda stats: stats.total, reverse=True)
+
+    def reset(self):
+        """
+        Forget all recorded statistics.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._statements.clear()
+
+    def report(self, limit=20):
+        """
+        Format the recorded statistics as a text table.
+
+        Args:
+            limit (int): The maximum number of statements listed. Defaults to 20.
+
+        Returns:
+            str: The report, one statement per row, slowest total first. Times are in milliseconds.
+        """
+        lines = [f"{'count':>7} {'total':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  statement"]
+        for stats in self.statements()[:limit]:
+            p50, p95, p99 = stats.percentiles()
+            lines.append(f"{stats.count:>7} {stats.total * 1000:>10.2f} {p50 * 1000:>8.3f} {p95 * 1000:>8.3f} "
+                         f"{p99 * 1000:>8.3f} {stats.max * 1000:>8.3f}  {stats.sql}")
+        return "\n".join(lines)
@@ -0,0 +1,81 @@
+from ecommerce.db import get_db
+from ecommerce.product import _invalidate_cached_product
+
+
+class OutOfStockError(ValueError):
+    """
+    Raised when a reservation asks for more units of a product than are in stock.
+
+    Attributes:
+        product_id (int): The product that ran short.
+        requested (int): The number of units asked for.
+    """
+    def __init__(self, product_id, requested, name=None):
+        """
+        Initialize the error.
+
+        Args:
+            product_id (int): The product that ran short.
+            requested (int): The number of units asked for.
+            name (str, optional): The product name, for the message.
+        """
+        super().__init__(f"Not enough stock of {name or f'product {product_id}'} for {requested} units.")
+        self.product_id = product_id
+        self.requested = requested
+
+
+def reserve_stock(lines, db=None):
+    """
+    Take the units of every line out of stock, or of none of them.
+
+    Each line is a single conditional `UPDATE ... WHERE quantity >= ?`, so checking the stock
+    and decrementing it is one atomic step: two buyers can never both take the last unit,
+    whether they share a connection or not. The lines run in a `transaction()` block, joining
+    the caller's if one is open, and the first line that cannot be filled raises at once; the
+    rollback then returns the units already taken. Cached copies of the products are dropped.
+
+    Args:
+        lines (list): `CartLine` records, or any records with `product_id`, `quantity` and `name`.
+        db (Database, optional): A database connection object. If not provided,
+                                 a new connection will be created using `get_db()`.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If a quantity is not positive.
+        OutOfStockError: If a product does not exist or has fewer units than its line asks for.
+    """
+    db = db or get_db()
+    for line in lines:
+        if line.quantity < 1:
+            raise ValueError('Quantity must be at least 1')
+    with db.transaction():
+        for line in lines:
+            if not db.storage.reserve_stock(line.product_id, line.quantity):
+                raise OutOfStockError(line.product_id, line.quantity, line.name)
+            _invalidate_cached_product(db, line.product_id)
+
+
+def release_stock(items, db=None):
+    """
+    Put units back in stock, for example when an order is canceled.
+
+    The items run in a `transaction()` block, joining the caller's if one is open. Products
+    that have since been deleted are skipped. Cached copies of the products are dropped once
+    the transaction commits.
+
+    Args:
+        items (list): (product_id, quantity) pairs.
+        db (Database, optional): A database connection object. If not provided,
+                                 a new connection will be created using `get_db()`.
+
+    Returns:
+        None
+    """
+    db = db or get_db()
+    with db.transaction():
+        for product_id, quantity in items:
+            if product_id is not None:
+                db.storage.release_stock(product_id, quantity)
+                _invalidate_cached_product(db, product_id)
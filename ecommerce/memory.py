@@ -0,0 +1,542 @@
+import bisect
+import math
+import threading
+from contextlib import contextmanager
+from ecommerce.records import OrderDetail, OrderItem, OrderSummary, ProductDetail, ProductRow, ProductSummary
+from ecommerce.storage import IntegrityError, Storage, tokenize
+
+
+class _Table:
+    """
+    Rows keyed by primary key, with secondary indexes mapping a column value to the keys of
+    the rows holding it, and the keys kept sorted for ordered range reads. Rows are
+    dictionaries that are replaced, never modified in place.
+    """
+    def __init__(self, name, indexes=(), unique=()):
+        self.name = name
+        self.rows = {}
+        self.keys = []
+        self.next_id = 1
+        self.indexes = {column: {} for column in indexes}
+        self.unique = {column: {} for column in unique}
+
+    def lookup(self, column, value):
+        """Return the rows whose indexed column equals a value, in key order."""
+        return [self.rows[key] for key in sorted(self.indexes[column].get(value, ()))]
+
+    def find(self, column, value):
+        """Return the row whose unique column equals a value, or None."""
+        key = self.unique[column].get(value)
+        return None if key is None else self.rows[key]
+
+    def scan(self):
+        """Return every row in key order."""
+        return [self.rows[key] for key in self.keys]
+
+    def range(self, after, limit=None):
+        """Return up to `limit` rows (all if None) with a key greater than `after`, in key order."""
+        start = bisect.bisect_right(self.keys, after)
+        end = None if limit is None else start + limit
+        return [self.rows[key] for key in self.keys[start:end]]
+
+    def put(self, key, row):
+        for column, index in self.unique.items():
+            owner = index.get(row[column])
+            if owner is not None and owner != key:
+                raise IntegrityError(f"UNIQUE constraint failed: {self.name}.{column}")
+        old = self.rows.get(key)
+        if old is not None:
+            self._unlink(key, old)
+        elif not self.keys or key > self.keys[-1]:
+            self.keys.append(key)
+        else:
+            bisect.insort(self.keys, key)
+        self.rows[key] = row
+        for column, index in self.indexes.items():
+            index.setdefault(row[column], {})[key] = None
+        for column, index in self.unique.items():
+            if row[column] is not None:
+                index[row[column]] = key
+
+    def delete(self, key):
+        self._unlink(key, self.rows.pop(key))
+        del self.keys[bisect.bisect_left(self.keys, key)]
+
+    def _unlink(self, key, row):
+        for column, index in self.indexes.items():
+            keys = index[row[column]]
+            del keys[key]
+            if not keys:
+                del index[row[column]]
+        for column, index in self.unique.items():
+            if index.get(row[column]) == key:
+                del index[row[column]]
+
+
+class MemoryStorage(Storage):
+    """
+    A pure-Python `Storage` backend that keeps every table in dictionaries.
+
+    Lookups by primary key, username, seller, cart owner and order owner go through hash
+    indexes. While a transaction is open, every change is journaled with the row it
+    replaced so that it can be undone.
+
+    Attributes:
+        lock (threading.RLock): Serialises access to the tables.
+        journal (list): The (table, key, previous row) undo entries of the open transaction,
+                        or None outside a transaction.
+    """
+    def __init__(self):
+        """
+        Initialize empty tables.
+        """
+        self.lock = threading.RLock()
+        self.journal = None
+        self.users = _Table("users", unique=("username",))
+        self.products = _Table("products", indexes=("user_id",))
+        self.carts = _Table("carts", indexes=("user_id",))
+        self.orders = _Table("orders", indexes=("user_id",))
+        self.order_items = _Table("order_items", indexes=("order_id", "product_id"))
+        self._search_tokens = {}
+
+    def _put(self, table, key, row):
+        old = table.rows.get(key)
+        table.put(key, row)
+        if self.journal is not None:
+            self.journal.append((table, key, old))
+
+    def _insert(self, table, row):
+        key = table.next_id
+        self._put(table, key, dict(row, id=key))
+        table.next_id = key + 1
+        return key
+
+    def _delete(self, table, key):
+        old = table.rows.get(key)
+        if old is None:
+            return
+        table.delete(key)
+        if self.journal is not None:
+            self.journal.append((table, key, old))
+
+    def rollback_to(self, mark):
+        """
+        Undo the journaled changes made after a point in the journal.
+
+        Args:
+            mark (int): The journal length to roll back to.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            while len(self.journal) > mark:
+                table, key, old = self.journal.pop()
+                if old is None:
+                    table.delete(key)
+                else:
+                    table.put(key, old)
+
+    @staticmethod
+    def _product_row(row):
+        return ProductRow(row["id"], row["name"], row["price"], row["description"], row["user_id"],
+                          row["ascii_art"], row["quantity"])
+
+    def insert_user(self, username, password_hash):
+        with self.lock:
+            return self._insert(self.users, {"username": username, "password_hash": password_hash})
+
+    def get_password_hash(self, username):
+        with self.lock:
+            row = self.users.find("username", username)
+            return row["password_hash"] if row else None
+
+    def get_user_id(self, username):
+        with self.lock:
+            row = self.users.find("username", username)
+            return row["id"] if row else None
+
+    def rename_user(self, current_username, new_username):
+        with self.lock:
+            row = self.users.find("username", current_username)
+            if row:
+                self._put(self.users, row["id"], dict(row, username=new_username))
+
+    def set_password_hash(self, username, password_hash):
+        with self.lock:
+            row = self.users.find("username", username)
+            if row:
+                self._put(self.users, row["id"], dict(row, password_hash=password_hash))
+
+    def delete_user(self, username):
+        with self.lock:
+            row = self.users.find("username", username)
+            if row:
+                self._delete(self.users, row["id"])
+
+    def insert_product(self, name, price, description, user_id, ascii_art, quantity):
+        with self.lock:
+            return self._insert(self.products, {"name": name, "price": price, "description": description,
+                                                "user_id": user_id, "ascii_art": ascii_art, "quantity": quantity})
+
+    def insert_products(self, rows):
+        with self.lock:
+            for row in rows:
+                self.insert_product(*row)
+
+    def list_products(self):
+        with self.lock:
+            return [self._product_row(row) for row in self.products.scan()]
+
+    @staticmethod
+    def _product_summary(row):
+        return ProductSummary(row["id"], row["name"], row["price"], row["quantity"])
+
+    def list_product_summaries(self, after_id=0, limit=None):
+        with self.lock:
+            return [self._product_summary(row) for row in self.products.range(after_id, limit)]
+
+    def list_product_summaries_by_user(self, user_id):
+        with self.lock:
+            return [self._product_summary(row) for row in self.products.lookup("user_id", user_id)]
+
+    def count_products(self):
+        with self.lock:
+            return len(self.products.rows)
+
+    def get_product(self, product_id, include_ascii_art=True):
+        with self.lock:
+            row = self.products.rows.get(product_id)
+            if row is None:
+                return None
+            seller = self.users.rows.get(row["user_id"])
+            return ProductDetail(row["id"], row["name"], row["price"], row["description"], seller and seller["username"],
+                                 row["ascii_art"] if include_ascii_art else None, row["quantity"], row["user_id"])
+
+    def get_products(self, product_ids, include_ascii_art=True):
+        products = []
+        for product_id in product_ids:
+            product = self.get_product(product_id, include_ascii_art)
+            if product is not None:
+                products.append(product)
+        return products
+
+    def get_ascii_art(self, product_id):
+        with self.lock:
+            row = self.products.rows.get(product_id)
+            return row["ascii_art"] if row else None
+
+    def _tokens(self, row):
+        cached = self._search_tokens.get(row["id"])
+        if cached is None or cached[0] is not row:
+            cached = self._search_tokens[row["id"]] = (row, tokenize(row["name"]), tokenize(row["description"]))
+        return cached[1], cached[2]
+
+    def search_products(self, terms, limit, offset):
+        # Scores every product with the same BM25 formula and weights as the SQLite backend
+        # (k1=1.2, b=0.75, name weighted 10 to 1 over description).
+        with self.lock:
+            rows = self.products.scan()
+            documents = [(row, *self._tokens(row)) for row in rows]
+            total_length = sum(len(name) + len(description) for _, name, description in documents)
+            average_length = total_length / len(documents) if documents else 0
+            containing = [0] * len(terms)
+            matches = []
+            for row, name, description in documents:
+                counts = [(sum(token.startswith(term) for token in name),
+                           sum(token.startswith(term) for token in description)) for term in terms]
+                for i, (in_name, in_description) in enumerate(counts):
+                    containing[i] += bool(in_name or in_description)
+                if all(in_name or in_description for in_name, in_description in counts):
+                    matches.append((row, len(name) + len(description), counts))
+            idf = [max(math.log((len(documents) - n + 0.5) / (n + 0.5)), 1e-6) for n in containing]
+
+            scored = []
+            for row, length, counts in matches:
+                score = 0.0
+                for i, (in_name, in_description) in enumerate(counts):
+                    frequency = 10.0 * in_name + in_description
+                    score += idf[i] * frequency * 2.2 / (frequency + 1.2 * (0.25 + 0.75 * length / average_length))
+                scored.append((-score, row["id"], row))
+            scored.sort(key=lambda item: item[:2])
+            return [self._product_summary(row) for _, _, row in scored[offset:offset + limit]]
+
+    _PRODUCT_ORDER = {
+        "newest": lambda row: -row["id"],
+        "price": lambda row: (row["price"], row["id"]),
+        "price_desc": lambda row: (-row["price"], -row["id"]),
+        "name": lambda row: (row["name"], row["id"]),
+    }
+
+    def filter_products(self, min_price, max_price, user_id, in_stock, sort, limit, offset):
+        with self.lock:
+            rows = self.products.scan() if user_id is None else self.products.lookup("user_id", user_id)
+            matches = [row for row in rows
+                       if (min_price is None or row["price"] >= min_price)
+                       and (max_price is None or row["price"] <= max_price)
+                       and (not in_stock or (row["quantity"] or 0) > 0)]
+            matches.sort(key=self._PRODUCT_ORDER[sort])
+            return [self._product_summary(row) for row in matches[offset:offset + limit]]
+
+    def update_product(self, product_id, fields):
+        with self.lock:
+            row = self.products.rows.get(product_id)
+            if row and fields:
+                self._put(self.products, product_id, dict(row, **fields))
+
+    def delete_product(self, product_id):
+        with self.lock:
+            self._delete(self.products, product_id)
+            self._search_tokens.pop(product_id, None)
+
+    def list_products_by_user(self, user_id):
+        with self.lock:
+            return [self._product_row(row) for row in self.products.lookup("user_id", user_id)]
+
+    def delete_products_by_user(self, user_id):
+        with self.lock:
+            for row in self.products.lookup("user_id", user_id):
+                self._delete(self.products, row["id"])
+                self._search_tokens.pop(row["id"], None)
+
+    def reserve_stock(self, product_id, quantity):
+        with self.lock:
+            row = self.products.rows.get(product_id)
+            if row is None or (row["quantity"] or 0) < quantity:
+                return False
+            self._put(self.products, product_id, dict(row, quantity=row["quantity"] - quantity))
+            return True
+
+    def release_stock(self, product_id, quantity):
+        with self.lock:
+            row = self.products.rows.get(product_id)
+            if row is not None:
+                self._put(self.products, product_id, dict(row, quantity=(row["quantity"] or 0) + quantity))
+
+    def _iterate(self, table, batch_size):
+        # Walk a table in key order a batch at a time, holding the lock only while a batch is copied.
+        after = 0
+        while True:
+            with self.lock:
+                rows = table.range(after, batch_size)
+            if not rows:
+                return
+            yield from rows
+            after = rows[-1]["id"]
+
+    def iter_products(self, columns, min_price, max_price, user_id, in_stock, batch_size):
+        for row in self._iterate(self.products, batch_size):
+            if ((min_price is None or row["price"] >= min_price) and (max_price is None or row["price"] <= max_price)
+                    and (user_id is None or row["user_id"] == user_id) and (not in_stock or (row["quantity"] or 0) > 0)):
+                yield tuple(row[column] for column in columns)
+
+    def add_to_cart(self, user_id, product_id, quantity):
+        with self.lock:
+            key = (user_id, product_id)
+            row = self.carts.rows.get(key)
+            if row is None:
+                row = {"id": self.carts.next_id, "user_id": user_id, "product_id": product_id, "quantity": quantity}
+                self.carts.next_id += 1
+            else:
+                row = dict(row, quantity=row["quantity"] + quantity)
+            self._put(self.carts, key, row)
+
+    def remove_from_cart(self, user_id, product_id):
+        with self.lock:
+            self._delete(self.carts, (user_id, product_id))
+
+    def add_many_to_cart(self, user_id, items):
+        with self.lock:
+            for product_id, quantity in items:
+                self.add_to_cart(user_id, product_id, quantity)
+
+    def remove_many_from_cart(self, user_id, product_ids):
+        with self.lock:
+            for product_id in product_ids:
+                self._delete(self.carts, (user_id, product_id))
+
+    def set_cart_quantities(self, user_id, items):
+        with self.lock:
+            for product_id, quantity in items:
+                key = (user_id, product_id)
+                row = self.carts.rows.get(key)
+                if row is None:
+                    self.add_to_cart(user_id, product_id, quantity)
+                else:
+                    self._put(self.carts, key, dict(row, quantity=quantity))
+
+    def list_cart_stock(self, user_id, product_ids):
+        with self.lock:
+            rows = []
+            for product_id in product_ids:
+                product = self.products.rows.get(product_id)
+                if product is not None:
+                    in_cart = self.carts.rows.get((user_id, product_id))
+                    rows.append((product_id, product["name"], product["quantity"], in_cart["quantity"] if in_cart else 0))
+            return rows
+
+    def list_cart_items(self, user_id):
+        with self.lock:
+            return sorted((row["product_id"], row["quantity"]) for row in self.carts.lookup("user_id", user_id))
+
+    def clear_cart(self, user_id):
+        with self.lock:
+            for row in self.carts.lookup("user_id", user_id):
+                self._delete(self.carts, (user_id, row["product_id"]))
+
+    def insert_order(self, user_id, order_details, total, status):
+        with self.lock:
+            return self._insert(self.orders, {"user_id": user_id, "order_details": order_details,
+                                              "total": total, "status": status})
+
+    def list_orders_by_user(self, user_id):
+        with self.lock:
+            return [OrderSummary(row["id"], row["order_details"], row["total"], row["status"])
+                    for row in self.orders.lookup("user_id", user_id)]
+
+    def insert_order_items(self, order_id, items, reserved=False):
+        with self.lock:
+            for product_id, seller_id, product_name, unit_price, quantity in items:
+                self._insert(self.order_items, {"order_id": order_id, "product_id": product_id, "seller_id": seller_id,
+                                                "product_name": product_name, "unit_price": unit_price,
+                                                "quantity": quantity, "reserved": reserved})
+
+    def list_reserved_order_items(self, order_id):
+        with self.lock:
+            items = sorted(self.order_items.lookup("order_id", order_id), key=lambda item: item["id"])
+            return [(item["product_id"], item["quantity"]) for item in items
+                    if item["reserved"] and item["product_id"] in self.products.rows]
+
+    def get_order(self, order_id):
+        with self.lock:
+            row = self.orders.rows.get(order_id)
+            if row is None:
+                return None
+            items = []
+            for item in self.order_items.lookup("order_id", order_id):
+                seller = self.users.rows.get(item["seller_id"])
+                items.append(OrderItem(item["product_id"], item["product_name"], item["seller_id"],
+                                       seller and seller["username"], item["unit_price"], item["quantity"]))
+            return OrderDetail(row["id"], row["order_details"], row["total"], row["status"], items)
+
+    def count_units_sold(self, product_id):
+        with self.lock:
+            return sum(item["quantity"] for item in self.order_items.lookup("product_id", product_id)
+                       if self.orders.rows[item["order_id"]]["status"] != "canceled")
+
+    def set_order_status(self, order_id, user_id, status, current_status=None):
+        with self.lock:
+            row = self.orders.rows.get(order_id)
+            if row and row["user_id"] == user_id and current_status in (None, row["status"]):
+                self._put(self.orders, order_id, dict(row, status=status))
+                return True
+            return False
+
+    def delete_orders_by_user(self, user_id):
+        with self.lock:
+            for row in self.orders.lookup("user_id", user_id):
+                self._delete(self.orders, row["id"])
+                for item in self.order_items.lookup("order_id", row["id"]):
+                    self._delete(self.order_items, item["id"])
+
+    def iter_orders(self, columns, user_id, status, batch_size):
+        for row in self._iterate(self.orders, batch_size):
+            if (user_id is None or row["user_id"] == user_id) and (status is None or row["status"] == status):
+                yield tuple(row[column] for column in columns)
+
+
+class MemoryDatabase:
+    """
+    A drop-in replacement for `Database` backed by `MemoryStorage`, for unit tests and load
+    simulations that do not need durability. Data lives only as long as the object.
+
+    It supports the calls the models make on a database: `storage`, `product_cache`,
+    `transaction()`, `after_commit()`, `commit()` and `close()`. It has no SQL interface.
+
+    Attributes:
+        storage (MemoryStorage): The tables.
+        lock (threading.RLock): The lock guarding the tables, shared with `storage`.
+        transaction_depth (int): The number of open `transaction()` blocks.
+        product_cache (LRUCache): The cache `Product.get_product_by_id` reads through, or None.
+    """
+    def __init__(self, product_cache=None):
+        """
+        Initialize an empty database.
+
+        Args:
+            product_cache (LRUCache, optional): A product cache. Defaults to None, since reads
+                                                from this engine are already in memory.
+        """
+        self.storage = MemoryStorage()
+        self.product_cache = product_cache
+        self.lock = self.storage.lock
+        self.transaction_depth = 0
+        self.closed = False
+        self._after_commit = []
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block of work as a single unit, with the same semantics as `Database.transaction()`:
+        an exception undoes the changes made in the block, nested blocks roll back on their own,
+        and other threads wait until the outermost block exits.
+
+        Yields:
+            MemoryDatabase: This database object.
+        """
+        with self.lock:
+            storage = self.storage
+            outermost = storage.journal is None
+            if outermost:
+                storage.journal = []
+            mark = len(storage.journal)
+            self.transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                storage.rollback_to(mark)
+                if outermost:
+                    self._after_commit = []
+                raise
+            finally:
+                self.transaction_depth -= 1
+                if outermost:
+                    storage.journal = None
+            if outermost:
+                callbacks, self._after_commit = self._after_commit, []
+                for callback in callbacks:
+                    callback()
+
+    def after_commit(self, callback):
+        """
+        Run a callback once the open `transaction()` block ends without an error, or at once
+        if none is open, like `Database.after_commit`.
+
+        Args:
+            callback (callable): A function taking no arguments.
+
+        Returns:
+            None
+        """
+        with self.lock:
+            if self.transaction_depth:
+                self._after_commit.append(callback)
+                return
+        callback()
+
+    def commit(self):
+        """
+        Present for interface compatibility; changes are visible as soon as they are made.
+
+        Returns:
+            None
+        """
+
+    def close(self):
+        """
+        Mark the database closed. The data is released with the object.
+
+        Returns:
+            None
+        """
+        self.closed = True
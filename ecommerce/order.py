@@ -1,4 +1,5 @@
 from ecommerce.db import get_db
+from ecommerce.inventory import release_stock
 
 class Order:
     def __init__(self, user_id, db=None):
@@ -24,12 +25,7 @@ class Order:
         Returns:
             None
         """
-        cursor = self.db.cursor
-        cursor.execute('''
-            INSERT INTO orders (user_id, order_details, total, status)
-            VALUES (?, ?, ?, ?)
-        ''', (self.user_id, order_details, total, status))
-        self.db.connection.commit()
+        self.db.storage.insert_order(self.user_id, order_details, total, status)
 
     @staticmethod
     def get_orders_by_user(user_id, db=None):
@@ -41,17 +37,10 @@ class Order:
             db (Database): Optional database connection. If not provided, a new connection will be created.
 
         Returns:
-            list: A list of tuples containing order information.
+            list: An `OrderSummary` record (id, order_details, total, status) for each order.
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('''
-            SELECT o.id, o.order_details, o.total, o.status
-            FROM orders o
-            WHERE o.user_id = ?
-        ''', (user_id,))
-        
-        return cursor.fetchall()
+        return db.storage.list_orders_by_user(user_id)
 
 
     def update_order_status(self, order_id, new_status):
@@ -65,40 +54,45 @@ class Order:
         Returns:
             None
         """
-        cursor = self.db.cursor
-        cursor.execute('''
-            UPDATE orders
-            SET status = ?
-            WHERE id = ? AND user_id = ?
-        ''', (new_status, order_id, self.user_id))
-        self.db.connection.commit()
+        self.db.storage.set_order_status(order_id, self.user_id, new_status)
 
     @staticmethod
     def get_order_by_id(order_id, db=None):
         """
-        Retrieve a specific order by its ID, including product details and seller names.
+        Retrieve a specific order by its ID, with the product, seller, unit price and quantity
+        of each of its lines.
 
         Args:
             order_id (int): The ID of the order.
             db (Database): Optional database connection. If not provided, a new connection will be created.
 
         Returns:
-            tuple: A tuple containing order information, or None if the order is not found.
+            OrderDetail: The order, with its lines as `OrderItem` records in `items`, or None if the
+                         order is not found. Orders created with `create_order` have no lines.
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('''
-            SELECT o.id, o.order_details, o.total, o.status, p.name AS product_name, u.username AS seller_name
-            FROM orders o
-            JOIN products p ON p.id = o.user_id
-            JOIN users u ON u.id = p.user_id
-            WHERE o.id = ?
-        ''', (order_id,))
-        return cursor.fetchone()
+        return db.storage.get_order(order_id)
+
+    @staticmethod
+    def get_units_sold(product_id, db=None):
+        """
+        Count the units of a product sold in orders that were not canceled.
+
+        Args:
+            product_id (int): The ID of the product.
+            db (Database): Optional database connection. If not provided, a new connection will be created.
+
+        Returns:
+            int: The number of units.
+        """
+        db = db or get_db()
+        return db.storage.count_units_sold(product_id)
 
     def cancel_order(self, order_id):
         """
-        Cancel an order by changing its status to 'canceled' if it is 'pending'.
+        Cancel an order by changing its status to 'canceled' if it is 'pending', and put the
+        units checkout took out of stock for it back, in one transaction. Lines that never
+        reserved stock, such as those of orders placed before checkout did, are left alone.
 
         Args:
             order_id (int): The ID of the order to cancel.
@@ -106,13 +100,9 @@ class Order:
         Returns:
             None
         """
-        cursor = self.db.cursor
-        cursor.execute('''
-            UPDATE orders
-            SET status = 'canceled'
-            WHERE id = ? AND user_id = ? AND status = 'pending'
-        ''', (order_id, self.user_id))
-        self.db.connection.commit()
+        with self.db.transaction():
+            if self.db.storage.set_order_status(order_id, self.user_id, 'canceled', current_status='pending'):
+                release_stock(self.db.storage.list_reserved_order_items(order_id), self.db)
     
     @staticmethod
     def delete_orders_by_user(user_id, db=None):
@@ -127,9 +117,4 @@ class Order:
             None
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('''
-            DELETE FROM orders
-            WHERE user_id = ?
-        ''', (user_id,))
-        db.connection.commit()
\ No newline at end of file
+        db.storage.delete_orders_by_user(user_id)
\ No newline at end of file
@@ -1,4 +1,64 @@
 from ecommerce.db import get_db
+from ecommerce.storage import PRODUCT_SORTS, tokenize
+
+DEFAULT_PAGE_SIZE = 20
+
+
+def _invalidate_cached_product(db, product_id):
+    # Drop the cached copies once the write is committed: dropped earlier, a reader on another
+    # connection could cache the old committed row again before the commit.
+    cache = db.product_cache
+    if cache is not None:
+        def invalidate():
+            cache.invalidate((product_id, True))
+            cache.invalidate((product_id, False))
+        db.after_commit(invalidate)
+
+
+class ProductPage:
+    """
+    One page of a catalog listing.
+
+    Attributes:
+        products (list): The products on the page as `ProductSummary` records, in ID order.
+        next_after_id (int): The cursor to pass as `after_id` to fetch the next page, or None
+                             if this is the last page.
+        total (int): The number of products in the catalog, or None if it was not requested.
+    """
+    def __init__(self, products, next_after_id, total=None):
+        """
+        Initialize a page.
+
+        Args:
+            products (list): The products on the page.
+            next_after_id (int): The cursor of the next page, or None.
+            total (int, optional): The catalog size.
+        """
+        self.products = products
+        self.next_after_id = next_after_id
+        self.total = total
+
+
+class ProductBatch:
+    """
+    The result of looking up several products at once.
+
+    Attributes:
+        products (list): The products found, as `ProductDetail` records, in the order their IDs
+                         were given. An ID given more than once yields the product once.
+        missing (list): The given IDs that match no product, in the order they were given.
+    """
+    def __init__(self, products, missing):
+        """
+        Initialize a batch.
+
+        Args:
+            products (list): The products found.
+            missing (list): The IDs not found.
+        """
+        self.products = products
+        self.missing = missing
+
 
 class Product:
     """
@@ -48,58 +108,223 @@ class Product:
             None
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('''
-            INSERT INTO products (name, price, description, user_id, ascii_art, quantity)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (name, price, description, user_id, ascii_art, quantity))
-        db.connection.commit()
+        db.storage.insert_product(name, price, description, user_id, ascii_art, quantity)
 
     @staticmethod
-    def get_all_products(db=None):
+    def get_all_products(db=None, summary=False):
         """
         Retrieve all products from the 'products' table.
 
         Args:
             db (Database, optional): A database connection object. If not provided,
                                      a new connection will be created using `get_db()`.
+            summary (bool): Read only (id, name, price, quantity), leaving out the description
+                            and ASCII art. Defaults to False.
 
         Returns:
-            list: A list of all products as tuples containing product details.
+            list: Every product as a `ProductRow` record, or a `ProductSummary` with `summary`.
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('''
-            SELECT *
-            FROM products
-        ''')
-        
-        return cursor.fetchall()
+        if summary:
+            return db.storage.list_product_summaries()
+        return db.storage.list_products()
 
     @staticmethod
-    def get_product_by_id(product_id, db=None):
+    def get_product_page(after_id=0, page_size=DEFAULT_PAGE_SIZE, include_total=False, db=None):
+        """
+        Retrieve one page of the catalog, in product ID order.
+
+        Pages are addressed by the last ID of the previous page (keyset pagination), so each
+        page is a range read on the primary key whose cost does not grow with the catalog.
+        Only the columns a listing shows are read.
+
+        Args:
+            after_id (int): Return products with an ID greater than this; pass the previous
+                            page's `next_after_id`. Defaults to 0, the first page.
+            page_size (int): The maximum number of products on the page. Defaults to 20.
+            include_total (bool): Also count the whole catalog. The count visits every row,
+                                  so request it only when it is displayed. Defaults to False.
+            db (Database, optional): A database connection object. If not provided,
+                                     a new connection will be created using `get_db()`.
+
+        Returns:
+            ProductPage: The products on the page and the cursor of the next page.
+
+        Raises:
+            ValueError: If the page size is not positive.
+        """
+        if page_size < 1:
+            raise ValueError('Page size must be at least 1')
+        db = db or get_db()
+        rows = db.storage.list_product_summaries(after_id, page_size + 1)
+        products = rows[:page_size]
+        next_after_id = products[-1].id if len(rows) > page_size else None
+        total = db.storage.count_products() if include_total else None
+        return ProductPage(products, next_after_id, total)
+
+    @staticmethod
+    def search(query, limit=DEFAULT_PAGE_SIZE, offset=0, db=None):
+        """
+        Search product names and descriptions, best match first.
+
+        Every word of the query must appear, as a whole word or the start of one, in the
+        name or the description. Matches are ranked by BM25, with a match in the name
+        weighted above one in the description. Punctuation in the query is ignored.
+
+        Args:
+            query (str): The words to search for.
+            limit (int): The maximum number of products returned. Defaults to 20.
+            offset (int): The number of best matches to skip, for paging. Defaults to 0.
+            db (Database, optional): A database connection object. If not provided,
+                                     a new connection will be created using `get_db()`.
+
+        Returns:
+            list: The matching products as `ProductSummary` records. Empty if the
+                  query contains no words.
+
+        Raises:
+            ValueError: If the limit is not positive or the offset is negative.
+        """
+        if limit < 1 or offset < 0:
+            raise ValueError('Limit must be at least 1 and offset at least 0')
+        terms = tokenize(query)
+        if not terms:
+            return []
+        db = db or get_db()
+        return db.storage.search_products(terms, limit, offset)
+
+    @staticmethod
+    def browse(min_price=None, max_price=None, seller_id=None, in_stock=False, sort="newest",
+               limit=DEFAULT_PAGE_SIZE, offset=0, db=None):
+        """
+        List the products matching a set of filters, in a chosen order.
+
+        Every filter is optional and they combine with AND. A price range, a seller or the
+        in-stock filter is served by an index range read, and sorting by price or name
+        follows an index, so a page costs about the same whatever the catalog size.
+
+        Args:
+            min_price (float, optional): The lowest price included.
+            max_price (float, optional): The highest price included.
+            seller_id (int, optional): Only the products of this user.
+            in_stock (bool): Only products with a quantity above zero. Defaults to False.
+            sort (str): 'newest' (the default), 'price' (cheapest first), 'price_desc'
+                        (dearest first) or 'name'.
+            limit (int): The maximum number of products returned. Defaults to 20.
+            offset (int): The number of matching products to skip, for paging. Defaults to 0.
+            db (Database, optional): A database connection object. If not provided,
+                                     a new connection will be created using `get_db()`.
+
+        Returns:
+            list: The matching products as `ProductSummary` records.
+
+        Raises:
+            ValueError: If the sort is unknown, a price bound is negative, the minimum price is
+                        above the maximum, the limit is not positive or the offset is negative.
+        """
+        if sort not in PRODUCT_SORTS:
+            raise ValueError(f"Unknown sort '{sort}'; expected one of {', '.join(PRODUCT_SORTS)}")
+        if (min_price is not None and min_price < 0) or (max_price is not None and max_price < 0):
+            raise ValueError('Prices cannot be negative')
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValueError('The minimum price cannot be above the maximum price')
+        if limit < 1 or offset < 0:
+            raise ValueError('Limit must be at least 1 and offset at least 0')
+        db = db or get_db()
+        return db.storage.filter_products(min_price, max_price, seller_id, in_stock, sort, limit, offset)
+
+    @staticmethod
+    def get_product_by_id(product_id, db=None, include_ascii_art=True, use_cache=True):
         """
         Retrieve a product by its ID, including the username of the product creator.
 
+        Reads go through the database's product cache, if it has one. Product writes made
+        through this class and username changes invalidate the affected entries; changes made
+        by other processes become visible when the entry's TTL runs out. Reads inside a
+        `transaction()` block bypass the cache, so uncommitted data is never cached.
+
         Args:
             product_id (int): The ID of the product to retrieve.
             db (Database, optional): A database connection object. If not provided,
                                      a new connection will be created using `get_db()`.
+            include_ascii_art (bool): Read the ASCII art. If False, the `ascii_art` field is None
+                                      and it can be loaded later with `get_ascii_art`. Defaults to True.
+            use_cache (bool): Set to False to read from the database and leave the cache untouched.
+                              Defaults to True.
 
         Returns:
-            tuple: A tuple containing product details and the creator's username, 
-                   or None if the product does not exist.
+            ProductDetail: The product and the creator's username,
+                           or None if the product does not exist.
         """
         db = db or get_db()
-        cursor = db.cursor
-        
-        cursor.execute('''
-            SELECT p.id, p.name, p.price, p.description, u.username, p.ascii_art, p.quantity, p.user_id
-            FROM products p
-            LEFT JOIN users u ON p.user_id = u.id
-            WHERE p.id = ?
-        ''', (product_id,))
-        return cursor.fetchone()
+        cache = db.product_cache if use_cache and db.transaction_depth == 0 else None
+        if cache is None:
+            return db.storage.get_product(product_id, include_ascii_art)
+        key = (product_id, include_ascii_art)
+        product = cache.get(key)
+        if product is None:
+            # A write that commits and invalidates while the row is read makes it stale: the
+            # generation check keeps it out of the cache.
+            generation = cache.generation
+            product = db.storage.get_product(product_id, include_ascii_art)
+            if product is not None:
+                cache.put(key, product, generation)
+        return product
+
+    @staticmethod
+    def get_many(product_ids, db=None, include_ascii_art=True, use_cache=True):
+        """
+        Retrieve any number of products by ID in a few queries, instead of one query each.
+
+        Products already in the database's product cache are taken from it; the rest are read
+        with `IN (...)` lists of at most 500 IDs and then cached. As with `get_product_by_id`,
+        reads inside a `transaction()` block bypass the cache.
+
+        Args:
+            product_ids (iterable): The IDs of the products to retrieve.
+            db (Database, optional): A database connection object. If not provided,
+                                     a new connection will be created using `get_db()`.
+            include_ascii_art (bool): Read the ASCII art. Defaults to True.
+            use_cache (bool): Set to False to read from the database and leave the cache untouched.
+                              Defaults to True.
+
+        Returns:
+            ProductBatch: The products found, in the order of `product_ids`, and the IDs not found.
+        """
+        db = db or get_db()
+        product_ids = list(dict.fromkeys(product_ids))
+        cache = db.product_cache if use_cache and db.transaction_depth == 0 else None
+        found = {}
+        if cache is not None:
+            for product_id in product_ids:
+                product = cache.get((product_id, include_ascii_art))
+                if product is not None:
+                    found[product_id] = product
+        unread = [product_id for product_id in product_ids if product_id not in found]
+        if unread:
+            generation = cache.generation if cache is not None else None
+            for product in db.storage.get_products(unread, include_ascii_art):
+                found[product.id] = product
+                if cache is not None:
+                    cache.put((product.id, include_ascii_art), product, generation)
+        return ProductBatch([found[product_id] for product_id in product_ids if product_id in found],
+                            [product_id for product_id in product_ids if product_id not in found])
+
+    @staticmethod
+    def get_ascii_art(product_id, db=None):
+        """
+        Retrieve only the ASCII art of a product.
+
+        Args:
+            product_id (int): The ID of the product.
+            db (Database, optional): A database connection object. If not provided,
+                                     a new connection will be created using `get_db()`.
+
+        Returns:
+            str: The ASCII art, or None if the product has none or does not exist.
+        """
+        db = db or get_db()
+        return db.storage.get_ascii_art(product_id)
 
     @staticmethod
     def update_product(product_id, name=None, price=None, description=None, ascii_art=None, quantity=None, db=None):
@@ -119,30 +344,21 @@ class Product:
             None
         """
         db = db or get_db()
-        cursor = db.cursor
-        updates = []
-        values = []
+        fields = {}
         if name:
-            updates.append("name = ?")
-            values.append(name)
+            fields["name"] = name
         if price:
-            updates.append("price = ?")
-            values.append(price)
+            fields["price"] = price
         if description:
-            updates.append("description = ?")
-            values.append(description)
+            fields["description"] = description
         if ascii_art:
-            updates.append("ascii_art = ?")
-            values.append(ascii_art)
+            fields["ascii_art"] = ascii_art
         if quantity is not None:
-            updates.append("quantity = ?")
-            values.append(quantity)
+            fields["quantity"] = quantity
         
-        if updates:
-            query = f'UPDATE products SET {", ".join(updates)} WHERE id = ?'
-            values.append(product_id)
-            cursor.execute(query, values)
-            db.connection.commit()
+        if fields:
+            db.storage.update_product(product_id, fields)
+            _invalidate_cached_product(db, product_id)
             
     @staticmethod
     def delete_product(product_id, db=None):
@@ -158,26 +374,28 @@ class Product:
             None
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('DELETE FROM products WHERE id = ?', (product_id,))
-        db.connection.commit()
+        db.storage.delete_product(product_id)
+        _invalidate_cached_product(db, product_id)
 
     @staticmethod
-    def get_products_by_user_id(user_id, db=None):
+    def get_products_by_user_id(user_id, db=None, summary=False):
         """
         Retrieve all products created by the current user.
 
+        Args:
+            user_id (int): The ID of the seller.
+            db (Database, optional): A database connection object. If not provided,
+                                     a new connection will be created using `get_db()`.
+            summary (bool): Read only (id, name, price, quantity), leaving out the description
+                            and ASCII art. Defaults to False.
+
         Returns:
-            list: A list of tuples containing product details.
+            list: The seller's products as `ProductRow` records, or `ProductSummary` with `summary`.
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('''
-            SELECT *
-            FROM products
-            WHERE user_id = ?
-        ''', (user_id,))
-        return cursor.fetchall()
+        if summary:
+            return db.storage.list_product_summaries_by_user(user_id)
+        return db.storage.list_products_by_user(user_id)
     
     @staticmethod
     def delete_products_by_user(user_id, db=None):
@@ -188,6 +406,7 @@ class Product:
             None
         """
         db = db or get_db()
-        cursor = db.cursor
-        cursor.execute('DELETE FROM products WHERE user_id = ?', (user_id,))
-        db.connection.commit()
\ No newline at end of file
+        db.storage.delete_products_by_user(user_id)
+        cache = db.product_cache
+        if cache is not None:
+            db.after_commit(lambda: cache.invalidate_where(lambda key, product: product.user_id == user_id))
\ No newline at end of file
@@ -0,0 +1,52 @@
+from collections import namedtuple
+
+# Typed rows returned by the storage backends. Each is a named tuple: fields can be read by
+# name (`product.price`) or by position as before, it compares equal to the plain tuple with
+# the same values, and, having no per-instance dict, it takes no more memory than a tuple.
+
+ProductRow = namedtuple("ProductRow", "id name price description user_id ascii_art quantity")
+ProductRow.__doc__ = "A product with every column, as listed by `get_all_products`."
+
+ProductSummary = namedtuple("ProductSummary", "id name price quantity")
+ProductSummary.__doc__ = "The columns of a product a listing shows."
+
+ProductDetail = namedtuple("ProductDetail", "id name price description seller ascii_art quantity user_id")
+ProductDetail.__doc__ = "A product with its seller's username, as read by `get_product_by_id`."
+
+CartLine = namedtuple("CartLine", "name price quantity product_id")
+CartLine.__doc__ = "A product in a cart, with the quantity the shopper wants."
+
+OrderSummary = namedtuple("OrderSummary", "id order_details total status")
+OrderSummary.__doc__ = "An order as listed in a user's order history."
+
+OrderItem = namedtuple("OrderItem", "product_id product_name seller_id seller_name unit_price quantity")
+OrderItem.__doc__ = "A line of an order: the product, its name and unit price at purchase, its seller and the quantity."
+
+OrderDetail = namedtuple("OrderDetail", "id order_details total status items")
+OrderDetail.__doc__ = "An order with its lines as a list of `OrderItem` records, as read by `get_order_by_id`."
+
+_row_factories = {}
+
+
+def row_factory(record):
+    """
+    Return a `sqlite3` row factory that builds instances of a record type.
+
+    The factory passes each row straight to `tuple.__new__`, skipping the argument
+    handling of the named tuple's own constructor.
+
+    Args:
+        record (type): A named tuple type whose fields match the query's columns.
+
+    Returns:
+        callable: A function of (cursor, row) suitable for `Cursor.row_factory`.
+    """
+    factory = _row_factories.get(record)
+    if factory is None:
+        new = tuple.__new__
+
+        def factory(cursor, row):
+            return new(record, row)
+
+        _row_factories[record] = factory
+    return factory
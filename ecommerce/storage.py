@@ -0,0 +1,854 @@
+import hashlib
+import re
+import zlib
+from abc import ABC, abstractmethod
+from ecommerce.records import (
+    OrderDetail,
+    OrderItem,
+    OrderSummary,
+    ProductDetail,
+    ProductRow,
+    ProductSummary
+)
+
+_SEARCH_TOKEN = re.compile(r"[^\W_]+")
+
+# The orders a filtered product listing can be sorted in. Ties are broken by product ID.
+PRODUCT_SORTS = ("newest", "price", "price_desc", "name")
+
+# The most IDs bound in one `IN (...)` list. SQLite builds before 3.32 refuse statements
+# with more than 999 parameters.
+MAX_IN_PARAMS = 500
+
+# The columns `iter_products` and `iter_orders` can return.
+PRODUCT_COLUMNS = ProductRow._fields
+ORDER_COLUMNS = ("id", "user_id", "order_details", "total", "status")
+
+
+def tokenize(text):
+    """
+    Split text into lower-case search terms the way the FTS5 `unicode61` tokenizer does:
+    runs of letters and digits, with everything else as a separator.
+
+    Args:
+        text (str): The text to split. None is treated as empty.
+
+    Returns:
+        list: The terms, in order.
+    """
+    return _SEARCH_TOKEN.findall(text.lower()) if text else []
+
+
+def ascii_art_hash(ascii_art):
+    """
+    Return the content hash that identifies a piece of ASCII art in the `ascii_art` table.
+
+    Args:
+        ascii_art (str): The art.
+
+    Returns:
+        str: The hex SHA-256 digest of the art's UTF-8 encoding.
+    """
+    return hashlib.sha256(ascii_art.encode()).hexdigest()
+
+
+def compress_ascii_art(ascii_art):
+    """
+    Compress ASCII art for storage. Art is mostly runs of a few characters and typically
+    shrinks to a small fraction of its size.
+
+    Args:
+        ascii_art (str): The art.
+
+    Returns:
+        bytes: The zlib-compressed UTF-8 encoding of the art.
+    """
+    return zlib.compress(ascii_art.encode(), 9)
+
+
+def decompress_ascii_art(data):
+    """
+    Reverse `compress_ascii_art`.
+
+    Args:
+        data (bytes): The stored art, or None.
+
+    Returns:
+        str: The art, or None if `data` is None.
+    """
+    return None if data is None else zlib.decompress(data).decode()
+
+
+class IntegrityError(Exception):
+    """
+    Raised by a storage backend when a write would violate a uniqueness constraint.
+    """
+
+
+class Storage(ABC):
+    """
+    The operations the models perform on persistent data.
+
+    A backend implements every method below; one that misses any cannot be instantiated.
+    Rows are returned as the named tuples of `ecommerce.records`, whose fields match the
+    SQLite schema, so callers can switch engines without changing how they read results.
+    Writes are committed immediately unless the owning database has a `transaction()` block
+    open, in which case they join it.
+    """
+
+    # Users
+
+    @abstractmethod
+    def insert_user(self, username, password_hash):
+        """
+        Add a user.
+
+        Args:
+            username (str): The unique username.
+            password_hash (str): The hashed password.
+
+        Returns:
+            int: The ID of the new user.
+
+        Raises:
+            IntegrityError: If the username is taken.
+        """
+
+    @abstractmethod
+    def get_password_hash(self, username):
+        """
+        Return the password hash of a user, or None if the user does not exist.
+        """
+
+    @abstractmethod
+    def get_user_id(self, username):
+        """
+        Return the ID of a user, or None if the user does not exist.
+        """
+
+    @abstractmethod
+    def rename_user(self, current_username, new_username):
+        """
+        Change a user's username.
+
+        Raises:
+            IntegrityError: If the new username is taken.
+        """
+
+    @abstractmethod
+    def set_password_hash(self, username, password_hash):
+        """
+        Replace a user's password hash.
+        """
+
+    @abstractmethod
+    def delete_user(self, username):
+        """
+        Delete a user by username.
+        """
+
+    # Products
+
+    @abstractmethod
+    def insert_product(self, name, price, description, user_id, ascii_art, quantity):
+        """
+        Add a product.
+
+        Returns:
+            int: The ID of the new product.
+        """
+
+    @abstractmethod
+    def insert_products(self, rows):
+        """
+        Add many products at once.
+
+        Args:
+            rows (list): (name, price, description, user_id, ascii_art, quantity) tuples.
+        """
+
+    @abstractmethod
+    def list_products(self):
+        """
+        Return every product as (id, name, price, description, user_id, ascii_art, quantity).
+        """
+
+    @abstractmethod
+    def list_product_summaries(self, after_id=0, limit=None):
+        """
+        Return up to `limit` products (all if None) with an ID greater than `after_id`,
+        in ID order, as (id, name, price, quantity).
+        """
+
+    @abstractmethod
+    def list_product_summaries_by_user(self, user_id):
+        """
+        Return the products of one seller in ID order, in the same shape as `list_product_summaries`.
+        """
+
+    @abstractmethod
+    def count_products(self):
+        """
+        Return the number of products.
+        """
+
+    @abstractmethod
+    def get_product(self, product_id, include_ascii_art=True):
+        """
+        Return (id, name, price, description, seller username, ascii_art, quantity, user_id)
+        for a product, or None if it does not exist. Without `include_ascii_art`, the
+        ascii_art column is None.
+        """
+
+    @abstractmethod
+    def get_products(self, product_ids, include_ascii_art=True):
+        """
+        Return the products among `product_ids` that exist, in no particular order, as
+        `get_product` returns one. IDs that match no product are left out.
+
+        Args:
+            product_ids (list): Distinct product IDs.
+            include_ascii_art (bool): Read the ASCII art; otherwise the ascii_art column is None.
+        """
+
+    @abstractmethod
+    def get_ascii_art(self, product_id):
+        """
+        Return the ASCII art of a product, or None if it has none or does not exist.
+        """
+
+    @abstractmethod
+    def search_products(self, terms, limit, offset):
+        """
+        Return the products whose name or description contains a word starting with every
+        one of the terms, best BM25 match first, as (id, name, price, quantity).
+
+        Args:
+            terms (list): Lower-case search terms from `tokenize`.
+            limit (int): The maximum number of products returned.
+            offset (int): The number of best matches to skip.
+        """
+
+    @abstractmethod
+    def filter_products(self, min_price, max_price, user_id, in_stock, sort, limit, offset):
+        """
+        Return the products matching every given filter, as (id, name, price, quantity).
+
+        Args:
+            min_price (float): The lowest price included, or None for no lower bound.
+            max_price (float): The highest price included, or None for no upper bound.
+            user_id (int): Only this seller's products, or None for every seller.
+            in_stock (bool): Only products with a quantity above zero.
+            sort (str): One of `PRODUCT_SORTS`: newest first, cheapest first, dearest first,
+                        or by name.
+            limit (int): The maximum number of products returned.
+            offset (int): The number of matching products to skip.
+        """
+
+    @abstractmethod
+    def update_product(self, product_id, fields):
+        """
+        Overwrite some columns of a product.
+
+        Args:
+            product_id (int): The ID of the product.
+            fields (dict): New values keyed by column name.
+        """
+
+    @abstractmethod
+    def delete_product(self, product_id):
+        """
+        Delete a product by ID.
+        """
+
+    @abstractmethod
+    def list_products_by_user(self, user_id):
+        """
+        Return the products of one seller in ID order, in the same shape as `list_products`.
+        """
+
+    @abstractmethod
+    def delete_products_by_user(self, user_id):
+        """
+        Delete every product of one seller.
+        """
+
+    @abstractmethod
+    def reserve_stock(self, product_id, quantity):
+        """
+        Take `quantity` units of a product out of stock if at least that many are left,
+        checking and decrementing in one atomic step.
+
+        Returns:
+            bool: True if the units were taken, False if the product is missing or short.
+        """
+
+    @abstractmethod
+    def release_stock(self, product_id, quantity):
+        """
+        Put `quantity` units of a product back in stock. A deleted product is left alone.
+        """
+
+    @abstractmethod
+    def iter_products(self, columns, min_price, max_price, user_id, in_stock, batch_size):
+        """
+        Yield the products matching every given filter in ID order, reading them a batch at
+        a time so that memory use does not depend on the catalog size.
+
+        Args:
+            columns (list): The columns of each row, a subset of `PRODUCT_COLUMNS`.
+            min_price (float): The lowest price included, or None for no lower bound.
+            max_price (float): The highest price included, or None for no upper bound.
+            user_id (int): Only this seller's products, or None for every seller.
+            in_stock (bool): Only products with a quantity above zero.
+            batch_size (int): Rows read at a time.
+
+        Yields:
+            tuple: The requested columns of a product.
+        """
+
+    # Carts
+
+    @abstractmethod
+    def add_to_cart(self, user_id, product_id, quantity):
+        """
+        Add a quantity of a product to a cart, on top of any quantity already there.
+        """
+
+    @abstractmethod
+    def remove_from_cart(self, user_id, product_id):
+        """
+        Remove a product from a cart.
+        """
+
+    @abstractmethod
+    def add_many_to_cart(self, user_id, items):
+        """
+        Add quantities of several products to a cart, each on top of any quantity already there.
+
+        Args:
+            user_id (int): The owner of the cart.
+            items (list): (product_id, quantity) tuples with distinct product IDs.
+        """
+
+    @abstractmethod
+    def remove_many_from_cart(self, user_id, product_ids):
+        """
+        Remove several products from a cart.
+        """
+
+    @abstractmethod
+    def set_cart_quantities(self, user_id, items):
+        """
+        Set the quantities of several products in a cart, adding the products that are not
+        there yet.
+
+        Args:
+            user_id (int): The owner of the cart.
+            items (list): (product_id, quantity) tuples with distinct product IDs.
+        """
+
+    @abstractmethod
+    def list_cart_stock(self, user_id, product_ids):
+        """
+        Return (product_id, name, quantity in stock, quantity in the user's cart) for the
+        products among `product_ids` that exist, in no particular order.
+        """
+
+    @abstractmethod
+    def list_cart_items(self, user_id):
+        """
+        Return the items of a cart as (product_id, quantity), in product ID order.
+        """
+
+    @abstractmethod
+    def clear_cart(self, user_id):
+        """
+        Remove every item from a cart.
+        """
+
+    # Orders
+
+    @abstractmethod
+    def insert_order(self, user_id, order_details, total, status):
+        """
+        Add an order.
+
+        Returns:
+            int: The ID of the new order.
+        """
+
+    @abstractmethod
+    def list_orders_by_user(self, user_id):
+        """
+        Return the orders of a user as (id, order_details, total, status).
+        """
+
+    @abstractmethod
+    def insert_order_items(self, order_id, items, reserved=False):
+        """
+        Add the lines of an order.
+
+        Args:
+            order_id (int): The ID of the order.
+            items (list): (product_id, seller_id, product_name, unit_price, quantity) tuples.
+            reserved (bool): Whether the units of the lines were taken out of stock.
+        """
+
+    @abstractmethod
+    def list_reserved_order_items(self, order_id):
+        """
+        Return (product_id, quantity) for the lines of an order whose units were taken out of
+        stock and whose product still exists.
+        """
+
+    @abstractmethod
+    def get_order(self, order_id):
+        """
+        Return (id, order_details, total, status, items) for an order, where items lists its
+        lines as `OrderItem` records in the order they were added, or None if it does not exist.
+        """
+
+    @abstractmethod
+    def count_units_sold(self, product_id):
+        """
+        Return the number of units of a product in orders that were not canceled.
+        """
+
+    @abstractmethod
+    def set_order_status(self, order_id, user_id, status, current_status=None):
+        """
+        Change the status of a user's order.
+
+        Args:
+            order_id (int): The ID of the order.
+            user_id (int): The owner of the order; other users' orders are left alone.
+            status (str): The new status.
+            current_status (str, optional): Only change the order if it has this status.
+
+        Returns:
+            bool: True if the order was changed.
+        """
+
+    @abstractmethod
+    def delete_orders_by_user(self, user_id):
+        """
+        Delete every order of a user, with their lines.
+        """
+
+    @abstractmethod
+    def iter_orders(self, columns, user_id, status, batch_size):
+        """
+        Yield the orders matching every given filter in ID order, reading them a batch at a
+        time so that memory use does not depend on the number of orders.
+
+        Args:
+            columns (list): The columns of each row, a subset of `ORDER_COLUMNS`.
+            user_id (int): Only this user's orders, or None for every user.
+            status (str): Only orders with this status, or None for any status.
+            batch_size (int): Rows read at a time.
+
+        Yields:
+            tuple: The requested columns of an order.
+        """
+
+
+class SQLiteStorage(Storage):
+    """
+    The `Storage` backend for a SQLite `Database`.
+
+    Attributes:
+        db (Database): The database the statements run on.
+    """
+    def __init__(self, db):
+        """
+        Initialize the backend.
+
+        Args:
+            db (Database): The database the statements run on.
+        """
+        self.db = db
+
+    def insert_user(self, username, password_hash):
+        try:
+            return self.db.write("INSERT INTO users (username, password_hash) VALUES (?, ?)",
+                                 (username, password_hash)).lastrowid
+        except self.db.connection.IntegrityError as e:
+            raise IntegrityError(str(e)) from e
+
+    def get_password_hash(self, username):
+        row = self.db.fetchone("SELECT password_hash FROM users WHERE username = ?", (username,))
+        return row[0] if row else None
+
+    def get_user_id(self, username):
+        row = self.db.fetchone("SELECT id FROM users WHERE username = ?", (username,))
+        return row[0] if row else None
+
+    def rename_user(self, current_username, new_username):
+        try:
+            self.db.write("UPDATE users SET username = ? WHERE username = ?", (new_username, current_username))
+        except self.db.connection.IntegrityError as e:
+            raise IntegrityError(str(e)) from e
+
+    def set_password_hash(self, username, password_hash):
+        self.db.write("UPDATE users SET password_hash = ? WHERE username = ?", (password_hash, username))
+
+    def delete_user(self, username):
+        self.db.write("DELETE FROM users WHERE username = ?", (username,))
+
+    def _store_ascii_art(self, ascii_art):
+        # Return the ID of the art's row in `ascii_art`, adding the row unless identical art is
+        # already stored. Callers run this in the transaction that references the row, so the
+        # cleanup triggers cannot drop it in between.
+        if ascii_art is None:
+            return None
+        digest = ascii_art_hash(ascii_art)
+        row = self.db.fetchone('SELECT id FROM ascii_art WHERE hash = ?', (digest,))
+        if row:
+            return row[0]
+        return self.db.write('INSERT INTO ascii_art (hash, data) VALUES (?, ?)',
+                             (digest, compress_ascii_art(ascii_art))).lastrowid
+
+    def insert_product(self, name, price, description, user_id, ascii_art, quantity):
+        with self.db.transaction():
+            return self.db.write('''
+                INSERT INTO products (name, price, description, user_id, ascii_art_id, quantity)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (name, price, description, user_id, self._store_ascii_art(ascii_art), quantity)).lastrowid
+
+    def insert_products(self, rows):
+        with self.db.transaction():
+            art_ids = {}
+            for row in rows:
+                if row[4] is not None and row[4] not in art_ids:
+                    art_ids[row[4]] = self._store_ascii_art(row[4])
+            self.db.executemany('''
+                INSERT INTO products (name, price, description, user_id, ascii_art_id, quantity)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', ((name, price, description, user_id, art_ids.get(ascii_art), quantity)
+                  for name, price, description, user_id, ascii_art, quantity in rows))
+
+    @staticmethod
+    def _with_ascii_art(rows, record, column=5):
+        # Decompress each distinct piece of art once, so products sharing art share the string.
+        art = {None: None}
+        for row in rows:
+            if row[column] not in art:
+                art[row[column]] = decompress_ascii_art(row[column])
+        return [record(*row[:column], art[row[column]], *row[column + 1:]) for row in rows]
+
+    def list_products(self):
+        return self._with_ascii_art(self.db.fetchall('''
+            SELECT p.id, p.name, p.price, p.description, p.user_id, a.data, p.quantity
+            FROM products p
+            LEFT JOIN ascii_art a ON a.id = p.ascii_art_id
+        '''), ProductRow)
+
+    def list_product_summaries(self, after_id=0, limit=None):
+        return self.db.fetchall('''
+            SELECT id, name, price, quantity
+            FROM products
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (after_id, -1 if limit is None else limit), ProductSummary)
+
+    def list_product_summaries_by_user(self, user_id):
+        return self.db.fetchall('''
+            SELECT id, name, price, quantity
+            FROM products
+            WHERE user_id = ?
+            ORDER BY id
+        ''', (user_id,), ProductSummary)
+
+    def count_products(self):
+        return self.db.fetchone('SELECT COUNT(*) FROM products')[0]
+
+    def get_product(self, product_id, include_ascii_art=True):
+        if not include_ascii_art:
+            return self.db.fetchone('''
+                SELECT p.id, p.name, p.price, p.description, u.username, NULL, p.quantity, p.user_id
+                FROM products p
+                LEFT JOIN users u ON p.user_id = u.id
+                WHERE p.id = ?
+            ''', (product_id,), ProductDetail)
+        row = self.db.fetchone('''
+            SELECT p.id, p.name, p.price, p.description, u.username, a.data, p.quantity, p.user_id
+            FROM products p
+            LEFT JOIN users u ON p.user_id = u.id
+            LEFT JOIN ascii_art a ON a.id = p.ascii_art_id
+            WHERE p.id = ?
+        ''', (product_id,))
+        return row and self._with_ascii_art([row], ProductDetail)[0]
+
+    def get_products(self, product_ids, include_ascii_art=True):
+        art, join = ("a.data", "LEFT JOIN ascii_art a ON a.id = p.ascii_art_id") if include_ascii_art else ("NULL", "")
+        rows = []
+        # One primary-key lookup per ID, in chunks small enough for any SQLite build.
+        for start in range(0, len(product_ids), MAX_IN_PARAMS):
+            chunk = product_ids[start:start + MAX_IN_PARAMS]
+            rows += self.db.fetchall(f'''
+                SELECT p.id, p.name, p.price, p.description, u.username, {art}, p.quantity, p.user_id
+                FROM products p
+                LEFT JOIN users u ON p.user_id = u.id
+                {join}
+                WHERE p.id IN ({", ".join("?" * len(chunk))})
+            ''', chunk)
+        return self._with_ascii_art(rows, ProductDetail)
+
+    def get_ascii_art(self, product_id):
+        row = self.db.fetchone('''
+            SELECT a.data
+            FROM products p
+            JOIN ascii_art a ON a.id = p.ascii_art_id
+            WHERE p.id = ?
+        ''', (product_id,))
+        return decompress_ascii_art(row[0]) if row else None
+
+    def search_products(self, terms, limit, offset):
+        return self.db.fetchall('''
+            SELECT p.id, p.name, p.price, p.quantity
+            FROM products_fts
+            JOIN products p ON p.id = products_fts.rowid
+            WHERE products_fts MATCH ?
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        ''', (" ".join(f'"{term}"*' for term in terms), limit, offset), ProductSummary)
+
+    # The ORDER BY of each sort. The product ID breaks ties; every index ends with the row ID,
+    # so an index on the sort column yields this order without a separate sort step.
+    _PRODUCT_ORDER = {
+        "newest": "id DESC",
+        "price": "price, id",
+        "price_desc": "price DESC, id DESC",
+        "name": "name, id",
+    }
+
+    @staticmethod
+    def _product_filter(min_price, max_price, user_id, in_stock, prefix=""):
+        # Return the WHERE clause (empty if there is no filter) and its parameters.
+        conditions, params = [], []
+        if min_price is not None:
+            conditions.append(f"{prefix}price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            conditions.append(f"{prefix}price <= ?")
+            params.append(max_price)
+        if user_id is not None:
+            conditions.append(f"{prefix}user_id = ?")
+            params.append(user_id)
+        if in_stock:
+            # Written as a literal, not a parameter, so the planner can use the partial indexes.
+            conditions.append(f"{prefix}quantity > 0")
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), params
+
+    def filter_products(self, min_price, max_price, user_id, in_stock, sort, limit, offset):
+        where, params = self._product_filter(min_price, max_price, user_id, in_stock)
+        return self.db.fetchall(f'''
+            SELECT id, name, price, quantity
+            FROM products
+            {where}
+            ORDER BY {self._PRODUCT_ORDER[sort]}
+            LIMIT ? OFFSET ?
+        ''', (*params, limit, offset), ProductSummary)
+
+    def update_product(self, product_id, fields):
+        if "ascii_art" in fields:
+            fields = dict(fields)
+            with self.db.transaction():
+                fields["ascii_art_id"] = self._store_ascii_art(fields.pop("ascii_art"))
+                self.update_product(product_id, fields)
+            return
+        if fields:
+            query = f'UPDATE products SET {", ".join(f"{column} = ?" for column in fields)} WHERE id = ?'
+            self.db.write(query, [*fields.values(), product_id])
+
+    def delete_product(self, product_id):
+        self.db.write('DELETE FROM products WHERE id = ?', (product_id,))
+
+    def list_products_by_user(self, user_id):
+        return self._with_ascii_art(self.db.fetchall('''
+            SELECT p.id, p.name, p.price, p.description, p.user_id, a.data, p.quantity
+            FROM products p
+            LEFT JOIN ascii_art a ON a.id = p.ascii_art_id
+            WHERE p.user_id = ?
+            ORDER BY p.id
+        ''', (user_id,)), ProductRow)
+
+    def delete_products_by_user(self, user_id):
+        self.db.write('DELETE FROM products WHERE user_id = ?', (user_id,))
+
+    def reserve_stock(self, product_id, quantity):
+        return self.db.write('''
+            UPDATE products
+            SET quantity = quantity - ?
+            WHERE id = ? AND quantity >= ?
+        ''', (quantity, product_id, quantity)).rowcount == 1
+
+    def release_stock(self, product_id, quantity):
+        self.db.write('''
+            UPDATE products
+            SET quantity = COALESCE(quantity, 0) + ?
+            WHERE id = ?
+        ''', (quantity, product_id))
+
+    def iter_products(self, columns, min_price, max_price, user_id, in_stock, batch_size):
+        where, params = self._product_filter(min_price, max_price, user_id, in_stock, prefix="p.")
+        selected = ", ".join("a.data" if column == "ascii_art" else f"p.{column}" for column in columns)
+        join = "LEFT JOIN ascii_art a ON a.id = p.ascii_art_id" if "ascii_art" in columns else ""
+        rows = self.db.iterate(f'''
+            SELECT {selected}
+            FROM products p
+            {join}
+            {where}
+            ORDER BY p.id
+        ''', params, batch_size)
+        if "ascii_art" not in columns:
+            yield from rows
+            return
+        art = columns.index("ascii_art")
+        for row in rows:
+            yield (*row[:art], decompress_ascii_art(row[art]), *row[art + 1:])
+
+    def add_to_cart(self, user_id, product_id, quantity):
+        self.db.write('''
+            INSERT INTO carts (user_id, product_id, quantity)
+            VALUES (?, ?, ?)
+            ON CONFLICT(product_id, user_id) DO UPDATE SET quantity = quantity + excluded.quantity
+        ''', (user_id, product_id, quantity))
+
+    def remove_from_cart(self, user_id, product_id):
+        self.db.write('DELETE FROM carts WHERE user_id = ? AND product_id = ?', (user_id, product_id))
+
+    def add_many_to_cart(self, user_id, items):
+        with self.db.transaction():
+            self.db.executemany('''
+                INSERT INTO carts (user_id, product_id, quantity)
+                VALUES (?, ?, ?)
+                ON CONFLICT(product_id, user_id) DO UPDATE SET quantity = quantity + excluded.quantity
+            ''', ((user_id, product_id, quantity) for product_id, quantity in items))
+
+    def remove_many_from_cart(self, user_id, product_ids):
+        with self.db.transaction():
+            self.db.executemany('DELETE FROM carts WHERE user_id = ? AND product_id = ?',
+                                ((user_id, product_id) for product_id in product_ids))
+
+    def set_cart_quantities(self, user_id, items):
+        with self.db.transaction():
+            self.db.executemany('''
+                INSERT INTO carts (user_id, product_id, quantity)
+                VALUES (?, ?, ?)
+                ON CONFLICT(product_id, user_id) DO UPDATE SET quantity = excluded.quantity
+            ''', ((user_id, product_id, quantity) for product_id, quantity in items))
+
+    def list_cart_stock(self, user_id, product_ids):
+        rows = []
+        for start in range(0, len(product_ids), MAX_IN_PARAMS):
+            chunk = product_ids[start:start + MAX_IN_PARAMS]
+            rows += self.db.fetchall(f'''
+                SELECT p.id, p.name, p.quantity, COALESCE(c.quantity, 0)
+                FROM products p
+                LEFT JOIN carts c ON c.user_id = ? AND c.product_id = p.id
+                WHERE p.id IN ({", ".join("?" * len(chunk))})
+            ''', (user_id, *chunk))
+        return rows
+
+    def list_cart_items(self, user_id):
+        return self.db.fetchall('''
+            SELECT product_id, quantity
+            FROM carts
+            WHERE user_id = ?
+            ORDER BY product_id
+        ''', (user_id,))
+
+    def clear_cart(self, user_id):
+        self.db.write('DELETE FROM carts WHERE user_id = ?', (user_id,))
+
+    def insert_order(self, user_id, order_details, total, status):
+        return self.db.write('''
+            INSERT INTO orders (user_id, order_details, total, status)
+            VALUES (?, ?, ?, ?)
+        ''', (user_id, order_details, total, status)).lastrowid
+
+    def list_orders_by_user(self, user_id):
+        return self.db.fetchall('''
+            SELECT o.id, o.order_details, o.total, o.status
+            FROM orders o
+            WHERE o.user_id = ?
+        ''', (user_id,), OrderSummary)
+
+    def insert_order_items(self, order_id, items, reserved=False):
+        with self.db.transaction():
+            self.db.executemany('''
+                INSERT INTO order_items (order_id, product_id, seller_id, product_name, unit_price, quantity, reserved)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', ((order_id, *item, int(reserved)) for item in items))
+
+    def list_reserved_order_items(self, order_id):
+        return self.db.fetchall('''
+            SELECT product_id, quantity
+            FROM order_items
+            WHERE order_id = ? AND reserved AND product_id IS NOT NULL
+            ORDER BY id
+        ''', (order_id,))
+
+    def get_order(self, order_id):
+        # One statement, so the order and its lines are read from the same snapshot.
+        rows = self.db.fetchall('''
+            SELECT o.id, o.order_details, o.total, o.status,
+                   i.product_id, i.product_name, i.seller_id, u.username, i.unit_price, i.quantity
+            FROM orders o
+            LEFT JOIN order_items i ON i.order_id = o.id
+            LEFT JOIN users u ON u.id = i.seller_id
+            WHERE o.id = ?
+            ORDER BY i.id
+        ''', (order_id,))
+        if not rows:
+            return None
+        items = [OrderItem(*row[4:]) for row in rows if row[5] is not None]
+        return OrderDetail(*rows[0][:4], items)
+
+    def count_units_sold(self, product_id):
+        return self.db.fetchone('''
+            SELECT COALESCE(SUM(i.quantity), 0)
+            FROM order_items i
+            JOIN orders o ON o.id = i.order_id
+            WHERE i.product_id = ? AND o.status != 'canceled'
+        ''', (product_id,))[0]
+
+    def set_order_status(self, order_id, user_id, status, current_status=None):
+        if current_status is None:
+            cursor = self.db.write('''
+                UPDATE orders
+                SET status = ?
+                WHERE id = ? AND user_id = ?
+            ''', (status, order_id, user_id))
+        else:
+            cursor = self.db.write('''
+                UPDATE orders
+                SET status = ?
+                WHERE id = ? AND user_id = ? AND status = ?
+            ''', (status, order_id, user_id, current_status))
+        return cursor.rowcount == 1
+
+    def delete_orders_by_user(self, user_id):
+        self.db.write('''
+            DELETE FROM orders
+            WHERE user_id = ?
+        ''', (user_id,))
+
+    def iter_orders(self, columns, user_id, status, batch_size):
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.db.iterate(f'''
+            SELECT {", ".join(columns)}
+            FROM orders
+            {where}
+            ORDER BY id
+        ''', params, batch_size)
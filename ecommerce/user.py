@@ -1,5 +1,6 @@
 import hashlib
 from ecommerce.db import get_db
+from ecommerce.storage import IntegrityError
 
 class User:
     """
@@ -55,11 +56,9 @@ class User:
             db = get_db()
         user = User(username, password)
         try:
-            db.cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)",
-                              (user.username, user.password_hash))
-            db.connection.commit()
+            db.storage.insert_user(user.username, user.password_hash)
             return user
-        except db.connection.IntegrityError:
+        except IntegrityError:
             raise ValueError('User already exists')
 
     @staticmethod
@@ -81,10 +80,8 @@ class User:
         """
         if db is None:
             db = get_db()
-        db.cursor.execute("SELECT password_hash FROM users WHERE username = ?", (username,))
-        row = db.cursor.fetchone()
-        if row:
-            stored_password_hash = row[0]
+        stored_password_hash = db.storage.get_password_hash(username)
+        if stored_password_hash is not None:
             if stored_password_hash == hashlib.sha256(password.encode()).hexdigest():
                 return True
             else:
@@ -112,10 +109,13 @@ class User:
         if db is None:
             db = get_db()
         try:
-            db.cursor.execute("UPDATE users SET username = ? WHERE username = ?", (new_username, current_username))
-            db.connection.commit()
-        except db.connection.IntegrityError:
+            db.storage.rename_user(current_username, new_username)
+        except IntegrityError:
             raise ValueError('New username is already taken')
+        # Cached products carry their seller's username.
+        cache = db.product_cache
+        if cache is not None:
+            db.after_commit(lambda: cache.invalidate_where(lambda key, product: product.seller == current_username))
 
     @staticmethod
     def update_password(username, new_password, db=None):
@@ -134,8 +134,7 @@ class User:
         if db is None:
             db = get_db()
         new_password_hash = hashlib.sha256(new_password.encode()).hexdigest()
-        db.cursor.execute("UPDATE users SET password_hash = ? WHERE username = ?", (new_password_hash, username))
-        db.connection.commit()
+        db.storage.set_password_hash(username, new_password_hash)
 
     @staticmethod
     def delete_account(username, db=None):
@@ -152,8 +151,10 @@ class User:
         """
         if db is None:
             db = get_db()
-        db.cursor.execute("DELETE FROM users WHERE username = ?", (username,))
-        db.connection.commit()
+        db.storage.delete_user(username)
+        cache = db.product_cache
+        if cache is not None:
+            db.after_commit(lambda: cache.invalidate_where(lambda key, product: product.seller == username))
 
     @staticmethod
     def get_user_id(username, db=None):
@@ -173,9 +174,8 @@ class User:
         """
         if db is None:
             db = get_db()
-        db.cursor.execute("SELECT id FROM users WHERE username = ?", (username,))
-        row = db.cursor.fetchone()
-        if row:
-            return row[0]
+        user_id = db.storage.get_user_id(username)
+        if user_id is not None:
+            return user_id
         else:
             raise ValueError('User not found')
@@ -0,0 +1,48 @@
+import os
+import tempfile
+from ecommerce.db import get_db, close_pools
+from ecommerce.memory import MemoryDatabase
+from ecommerce.product import Product
+from ecommerce.user import User
+
+
+def temporary_database(test):
+    """
+    Return the path of a database file in a temporary directory. Cleanups registered on the
+    test close the pools and remove the directory, even if the test fails.
+    """
+    tmpdir = tempfile.TemporaryDirectory()
+    test.addCleanup(tmpdir.cleanup)
+    test.addCleanup(close_pools)
+    return os.path.join(tmpdir.name, "shop.db")
+
+
+def seed_shop(db, products, buyers=1):
+    """
+    Register a seller with one product per (name, price, quantity) in `products`, and
+    `buyers` buyers named buyer0, buyer1, ...
+
+    Returns:
+        tuple: (product IDs in the order of `products`, buyer IDs).
+    """
+    User.register("seller", "password", db)
+    seller_id = User.get_user_id("seller", db)
+    for name, price, quantity in products:
+        Product.create_product(name, price, f"A {name.lower()}", seller_id, db=db, quantity=quantity)
+    product_ids = [product.id for product in Product.get_products_by_user_id(seller_id, db)]
+    buyer_ids = []
+    for i in range(buyers):
+        User.register(f"buyer{i}", "password", db)
+        buyer_ids.append(User.get_user_id(f"buyer{i}", db))
+    return product_ids, buyer_ids
+
+
+def both_engines(test):
+    """
+    Return a SQLite ':memory:' database and a `MemoryDatabase`, each closed by a cleanup
+    registered on the test.
+    """
+    databases = [get_db(":memory:"), MemoryDatabase()]
+    for db in databases:
+        test.addCleanup(db.close)
+    return databases
@@ -0,0 +1,77 @@
+import asyncio
+import inspect
+import os
+import tempfile
+import unittest
+from ecommerce.aio import AsyncDatabase, AsyncUser, AsyncProduct, AsyncCart, AsyncOrder
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.cart import Cart
+from ecommerce.order import Order
+
+
+# Model methods that never touch the database.
+NOT_DATABASE_METHODS = {"hash_password"}
+
+
+def public_methods(cls):
+    """Return the names of the public methods a model defines."""
+    return {name for name, member in vars(cls).items()
+            if not name.startswith("_") and callable(getattr(cls, name)) and name not in NOT_DATABASE_METHODS}
+
+
+class TestAsyncFacade(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        """Create a temporary database and facade for each test."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.database = AsyncDatabase(os.path.join(self.tmpdir.name, "test.db"), max_workers=4)
+
+    def tearDown(self):
+        """Shut the facade down and remove the temporary database."""
+        self.database.close()
+        self.tmpdir.cleanup()
+
+    def test_every_model_method_has_an_awaitable(self):
+        """Test that each public model method has a coroutine counterpart."""
+        for model, facade in ((User, AsyncUser), (Product, AsyncProduct), (Cart, AsyncCart), (Order, AsyncOrder)):
+            for name in public_methods(model):
+                with self.subTest(model=model.__name__, method=name):
+                    self.assertTrue(inspect.iscoroutinefunction(getattr(facade, name)))
+
+    async def test_shopping_flow(self):
+        """Test registering, listing, adding to the cart and checking out asynchronously."""
+        users = AsyncUser(self.database)
+        products = AsyncProduct(self.database)
+        await users.register("seller", "password")
+        await users.register("buyer", "password")
+        seller_id = await users.get_user_id("seller")
+        buyer_id = await users.get_user_id("buyer")
+        await products.create_product("Lamp", 20.0, "Bright", seller_id, quantity=3)
+        product_id = (await products.get_all_products())[0][0]
+
+        cart = AsyncCart(buyer_id, self.database)
+        await cart.add_product(product_id, 2)
+        self.assertEqual((await cart.view_cart())[0][2], 2)
+        await cart.checkout()
+
+        orders = await AsyncOrder(buyer_id, self.database).get_orders_by_user(buyer_id)
+        self.assertEqual(orders[0][2], 40.0)
+        self.assertEqual(await cart.view_cart(), [])
+
+    async def test_many_concurrent_tasks(self):
+        """Test that over a hundred concurrent tasks complete against the shared pool."""
+        users = AsyncUser(self.database)
+        await asyncio.gather(*(users.register(f"user{i}", "password") for i in range(150)))
+
+        ids = await asyncio.gather(*(users.get_user_id(f"user{i}") for i in range(150)))
+        self.assertEqual(len(set(ids)), 150)
+
+    async def test_errors_propagate(self):
+        """Test that model exceptions are raised from the awaitable."""
+        with self.assertRaises(ValueError):
+            await AsyncUser(self.database).login("nobody", "password")
+
+
+if __name__ == '__main__':
+    unittest.main()
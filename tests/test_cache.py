@@ -0,0 +1,242 @@
+import os
+import tempfile
+import unittest
+from ecommerce.cache import LRUCache
+from ecommerce.cart import Cart
+from ecommerce.db import get_db, close_pools
+from ecommerce.memory import MemoryDatabase
+from ecommerce.user import User
+from ecommerce.product import Product
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create a small cache on a controllable clock before each test."""
+        self.clock = FakeClock()
+        self.cache = LRUCache(max_size=2, ttl=10.0, clock=self.clock)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test that a full cache drops the entry that was used longest ago."""
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get("a")
+        self.cache.put("c", 3)
+
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_entries_expire(self):
+        """Test that entries older than the TTL are treated as misses."""
+        self.cache.put("a", 1)
+        self.clock.now = 9.9
+        self.assertEqual(self.cache.get("a"), 1)
+        self.clock.now = 10.0
+        self.assertIsNone(self.cache.get("a"))
+
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["expirations"], stats["size"]), (1, 1, 1, 0))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_invalidation(self):
+        """Test dropping entries by key and by predicate."""
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.invalidate("a")
+        self.cache.invalidate("missing")
+        self.cache.invalidate_where(lambda key, value: value == 2)
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.stats()["invalidations"], 2)
+
+    def test_fill_after_invalidation_is_skipped(self):
+        """Test that a value read before an invalidation, even of a missing key, is not stored."""
+        generation = self.cache.generation
+        self.cache.invalidate("a")
+
+        self.assertFalse(self.cache.put("a", "old", generation))
+        self.assertIsNone(self.cache.get("a"))
+        self.assertTrue(self.cache.put("a", "new", self.cache.generation))
+        self.assertEqual(self.cache.get("a"), "new")
+
+    def test_invalid_size(self):
+        """Test that a cache must hold at least one entry."""
+        with self.assertRaises(ValueError):
+            LRUCache(max_size=0)
+
+
+class TestProductCache(unittest.TestCase):
+
+    def setUp(self):
+        """Create a database with a seller and a product before each test."""
+        self.db = get_db(":memory:")
+        self.cache = self.db.product_cache
+        User.register("seller", "password", self.db)
+        self.seller_id = User.get_user_id("seller", self.db)
+        Product.create_product("Lamp", 20.0, "A desk lamp", self.seller_id, db=self.db, quantity=5)
+        self.product_id = Product.get_products_by_user_id(self.seller_id, self.db)[0][0]
+
+    def tearDown(self):
+        """Close the database after each test."""
+        self.db.close()
+
+    def change_behind_the_cache(self, price):
+        """Change the product's price with raw SQL, which the cache does not see."""
+        self.db.write("UPDATE products SET price = ? WHERE id = ?", (price, self.product_id))
+
+    def test_repeated_reads_hit_the_cache(self):
+        """Test that only the first read of a product goes to the database."""
+        for _ in range(3):
+            Product.get_product_by_id(self.product_id, self.db)
+        self.change_behind_the_cache(1.0)
+
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.db)[2], 20.0)
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.db, use_cache=False)[2], 1.0)
+        self.assertEqual((self.cache.stats()["hits"], self.cache.stats()["misses"]), (3, 1))
+
+    def test_missing_products_are_not_cached(self):
+        """Test that a miss for an unknown product is not remembered."""
+        self.assertIsNone(Product.get_product_by_id(999, self.db))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_get_many_reads_through_the_cache(self):
+        """Test that a batch lookup serves cached products and caches the ones it reads."""
+        Product.create_product("Rug", 40.0, "A rug", self.seller_id, db=self.db)
+        rug_id = Product.get_products_by_user_id(self.seller_id, self.db)[1][0]
+        Product.get_product_by_id(self.product_id, self.db)
+        self.change_behind_the_cache(1.0)
+
+        batch = Product.get_many([rug_id, self.product_id], self.db)
+
+        self.assertEqual([(product.name, product.price) for product in batch.products], [("Rug", 40.0), ("Lamp", 20.0)])
+        self.assertEqual(Product.get_product_by_id(rug_id, self.db), batch.products[0])
+        self.assertEqual(self.cache.stats()["hits"], 2)
+
+    def test_product_writes_invalidate(self):
+        """Test that updating and deleting products drop their cached rows."""
+        Product.get_product_by_id(self.product_id, self.db)
+        Product.get_product_by_id(self.product_id, self.db, include_ascii_art=False)
+        Product.update_product(self.product_id, price=30.0, db=self.db)
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.db)[2], 30.0)
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.db, include_ascii_art=False)[2], 30.0)
+
+        Product.delete_product(self.product_id, self.db)
+        self.assertIsNone(Product.get_product_by_id(self.product_id, self.db))
+
+    def test_seller_changes_invalidate(self):
+        """Test that renaming a seller and deleting their products drop their cached rows."""
+        Product.get_product_by_id(self.product_id, self.db)
+        User.update_username("seller", "maker", self.db)
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.db)[4], "maker")
+
+        Product.delete_products_by_user(self.seller_id, self.db)
+        self.assertIsNone(Product.get_product_by_id(self.product_id, self.db))
+
+    def test_reads_inside_a_transaction_bypass_the_cache(self):
+        """Test that uncommitted rows never reach the cache."""
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.change_behind_the_cache(1.0)
+                self.assertEqual(Product.get_product_by_id(self.product_id, self.db)[2], 1.0)
+                raise RuntimeError("roll back")
+
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.db)[2], 20.0)
+
+
+class TestCacheInvalidationTiming(unittest.TestCase):
+
+    def setUp(self):
+        """Create two handles on one database file, sharing its product cache."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "shop.db")
+        self.db = get_db(self.db_name)
+        self.other = get_db(self.db_name)
+        User.register("seller", "password", self.db)
+        User.register("buyer", "password", self.db)
+        Product.create_product("Lamp", 20.0, "A desk lamp", User.get_user_id("seller", self.db), db=self.db, quantity=5)
+        self.product_id = Product.get_all_products(self.db)[0].id
+
+    def tearDown(self):
+        """Close both handles and the pools, and remove the database."""
+        self.db.close()
+        self.other.close()
+        close_pools()
+        self.tmpdir.cleanup()
+
+    def test_reader_during_a_transaction_cannot_recache_the_old_row(self):
+        """Test that a read from another handle before the commit does not leave a stale cached product."""
+        cart = Cart(User.get_user_id("buyer", self.db), self.db)
+        cart.add_product(self.product_id, 5)
+
+        with self.db.transaction():
+            cart.checkout()
+            self.assertEqual(Product.get_product_by_id(self.product_id, self.other).quantity, 5)
+
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.other).quantity, 0)
+
+    def test_reader_during_account_deletion_cannot_recache_the_seller(self):
+        """Test that a read from another handle before a seller's deletion commits leaves no stale seller cached."""
+        with self.db.transaction():
+            User.delete_account("seller", self.db)
+            self.assertEqual(Product.get_product_by_id(self.product_id, self.other).seller, "seller")
+
+        self.assertIsNone(Product.get_product_by_id(self.product_id, self.other).seller)
+
+    def test_read_overlapping_an_update_is_not_cached(self):
+        """Test that a row read before an update commits is returned but not cached, for single and batch reads."""
+        db = MemoryDatabase(product_cache=LRUCache())
+        self.addCleanup(db.close)
+        User.register("seller", "password", db)
+        Product.create_product("Lamp", 20.0, "A desk lamp", User.get_user_id("seller", db), db=db, quantity=5)
+        product_id = Product.get_all_products(db)[0].id
+        storage = db.storage
+
+        def read_then_update(read, quantity):
+            # Read the row, then let a writer commit an update before the reader fills the cache.
+            def wrapper(*args):
+                result = read(*args)
+                Product.update_product(product_id, quantity=quantity, db=db)
+                return result
+            return wrapper
+
+        for name, read in (("get_product", lambda: Product.get_product_by_id(product_id, db)),
+                           ("get_products", lambda: Product.get_many([product_id], db).products[0])):
+            with self.subTest(read=name):
+                db.product_cache.clear()
+                original = getattr(storage, name)
+                quantity = Product.get_product_by_id(product_id, db, use_cache=False).quantity - 1
+                setattr(storage, name, read_then_update(original, quantity))
+                try:
+                    stale = read()
+                finally:
+                    setattr(storage, name, original)
+
+                self.assertEqual(Product.get_product_by_id(product_id, db).quantity, stale.quantity - 1)
+
+    def test_rolled_back_write_keeps_the_cached_product(self):
+        """Test that the invalidations of a rolled-back transaction are dropped."""
+        Product.get_product_by_id(self.product_id, self.db)
+        invalidations = self.db.product_cache.stats()["invalidations"]
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                Product.update_product(self.product_id, quantity=1, db=self.db)
+                raise RuntimeError("boom")
+
+        self.assertEqual(self.db.product_cache.stats()["invalidations"], invalidations)
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.other).quantity, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
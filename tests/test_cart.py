@@ -3,6 +3,8 @@ from ecommerce.db import get_db
 from ecommerce.user import User
 from ecommerce.product import Product
 from ecommerce.cart import Cart
+from ecommerce.inventory import OutOfStockError
+from ecommerce.memory import MemoryDatabase
 
 
 class TestCartModel(unittest.TestCase):
@@ -79,6 +81,62 @@ class TestCartModel(unittest.TestCase):
 
         self.assertEqual(len(remaining_items), 0)
 
+    def test_checkout_commits_once(self):
+        """Test that checkout writes the order and clears the cart in one transaction."""
+        cart = Cart(self.user_id, db=self.db)
+        cart.add_product(self.product_id, 2)
+        statements = []
+        self.db.connection.set_trace_callback(statements.append)
+
+        cart.checkout()
+
+        self.assertEqual(statements.count("COMMIT"), 1)
+
+    def test_batch_operations_commit_once(self):
+        """Test that add_many, set_quantities and remove_many each take one commit."""
+        Product.create_product("Other Product", 5.00, "Another product", self.user_id, db=self.db, quantity=10)
+        other_id = self.db.fetchone("SELECT id FROM products WHERE name = ?", ("Other Product",))[0]
+        cart = Cart(self.user_id, db=self.db)
+        statements = []
+        self.db.connection.set_trace_callback(statements.append)
+
+        cart.add_many({self.product_id: 2, other_id: 1})
+        cart.add_many([(self.product_id, 1), (self.product_id, 2)])
+        self.assertEqual([(line.product_id, line.quantity) for line in cart.view_cart()], [(self.product_id, 5), (other_id, 1)])
+        cart.set_quantities({self.product_id: 1, other_id: 0})
+        self.assertEqual([(line.product_id, line.quantity) for line in cart.view_cart()], [(self.product_id, 1)])
+        cart.remove_many([self.product_id, other_id])
+        self.assertEqual(cart.view_cart(), [])
+
+        self.assertEqual(statements.count("COMMIT"), 4)
+
+    def test_batch_operations_check_stock(self):
+        """Test that a batch beyond the stock or naming a missing product changes nothing, on both engines."""
+        for db in (self.db, MemoryDatabase()):
+            with self.subTest(db=type(db).__name__):
+                if isinstance(db, MemoryDatabase):
+                    User.register("testuser", "password", db)
+                    Product.create_product("Test Product", 50.00, "A test product description", self.user_id, db=db, quantity=10)
+                product_id = Product.get_all_products(db)[0].id
+                cart = Cart(self.user_id, db=db)
+                cart.add_many({product_id: 8})
+
+                with self.assertRaises(OutOfStockError) as e:
+                    cart.add_many({product_id: 3})
+                self.assertEqual(e.exception.requested, 11)
+                with self.assertRaises(OutOfStockError):
+                    cart.set_quantities({product_id: 11})
+                with self.assertRaises(ValueError):
+                    cart.add_many({product_id: 1, 999: 1})
+                with self.assertRaises(ValueError):
+                    cart.set_quantities({product_id: -1})
+                with self.assertRaises(ValueError):
+                    cart.add_many({product_id: 0})
+
+                self.assertEqual([line.quantity for line in cart.view_cart()], [8])
+                cart.set_quantities({product_id: 10})
+                self.assertEqual([line.quantity for line in cart.view_cart()], [10])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,163 @@
+import time
+import unittest
+from ecommerce.cart import Cart
+from ecommerce.cart_sessions import CartSessionStore
+from ecommerce.db import get_db, close_pools
+from ecommerce.memory import MemoryDatabase
+from ecommerce.order import Order
+from tests.helpers import both_engines, seed_shop, temporary_database
+
+
+class TestCartSessionStore(unittest.TestCase):
+
+    def seed(self, db):
+        """Add a seller with a lamp and a rug (10 of each in stock) and a buyer, and return the buyer's ID."""
+        (self.lamp_id, self.rug_id), (buyer_id,) = seed_shop(db, [("Lamp", 20.0, 10), ("Rug", 40.0, 10)])
+        return buyer_id
+
+    def open_store(self, db, flush_interval=None):
+        """Return a store on `db` that is closed when the test ends."""
+        store = CartSessionStore(db, flush_interval=flush_interval)
+        self.addCleanup(store.close)
+        return store
+
+    def memory_db(self):
+        """Return a SQLite ':memory:' database closed when the test ends."""
+        db = get_db(":memory:")
+        self.addCleanup(db.close)
+        return db
+
+    def stored(self, db, user_id):
+        """Return the cart rows in the database as (product_id, quantity)."""
+        return db.storage.list_cart_items(user_id)
+
+    def test_changes_stay_in_memory_until_flushed(self):
+        """Test that adds and removes are seen by the session at once and by the table after a flush, on both engines."""
+        for db in both_engines(self):
+            with self.subTest(db=type(db).__name__):
+                buyer_id = self.seed(db)
+                Cart(buyer_id, db).add_product(self.rug_id, 1)
+                store = self.open_store(db)
+                cart = store.cart(buyer_id)
+
+                cart.add_product(self.lamp_id, 2)
+                cart.add_product(self.lamp_id, 1)
+                cart.remove_product(self.rug_id)
+
+                self.assertEqual([(line.name, line.quantity) for line in cart.view_cart()], [("Lamp", 3)])
+                self.assertEqual(self.stored(db, buyer_id), [(self.rug_id, 1)])
+                self.assertEqual(store.flush(), 2)
+                self.assertEqual(self.stored(db, buyer_id), [(self.lamp_id, 3)])
+                self.assertEqual(store.flush(), 0)
+                self.assertEqual(store.flushes, 1)
+
+    def test_timer_flush(self):
+        """Test that the background thread flushes changes on its own."""
+        db = self.memory_db()
+        buyer_id = self.seed(db)
+        store = self.open_store(db, flush_interval=0.01)
+        store.cart(buyer_id).add_product(self.lamp_id, 2)
+
+        deadline = time.monotonic() + 5
+        while not self.stored(db, buyer_id) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.stored(db, buyer_id), [(self.lamp_id, 2)])
+
+    def test_failed_timer_flush_is_logged_and_retried(self):
+        """Test that a background flush that fails is logged and its changes are written by a later one."""
+        db = MemoryDatabase()
+        self.addCleanup(db.close)
+        buyer_id = self.seed(db)
+        write = db.storage.set_cart_quantities
+        failures = [RuntimeError("disk full")]
+
+        def failing_write(*args):
+            if failures:
+                raise failures.pop()
+            write(*args)
+
+        db.storage.set_cart_quantities = failing_write
+        with self.assertLogs("ecommerce.cart_sessions", level="ERROR") as logs:
+            store = self.open_store(db, flush_interval=0.01)
+            store.cart(buyer_id).add_product(self.lamp_id, 2)
+            deadline = time.monotonic() + 5
+            while not self.stored(db, buyer_id) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            store.close()
+
+        self.assertIn("disk full", logs.output[0])
+        self.assertEqual(self.stored(db, buyer_id), [(self.lamp_id, 2)])
+
+    def test_checkout_flushes_and_empties_the_session(self):
+        """Test that checkout orders the unflushed cart and leaves both the session and the table empty."""
+        db = self.memory_db()
+        buyer_id = self.seed(db)
+        cart = self.open_store(db).cart(buyer_id)
+        cart.add_product(self.lamp_id, 2)
+        cart.add_product(self.rug_id, 1)
+
+        order_id = cart.checkout()
+
+        self.assertEqual(Order.get_orders_by_user(buyer_id, db)[0].id, order_id)
+        self.assertEqual(Order.get_order_by_id(order_id, db).total, 80.0)
+        self.assertEqual(cart.view_cart(), [])
+        self.assertEqual(self.stored(db, buyer_id), [])
+        with self.assertRaises(ValueError):
+            cart.checkout()
+
+    def test_batch_operations_see_unflushed_changes(self):
+        """Test that a batch operation works on the cart including changes not yet flushed."""
+        db = self.memory_db()
+        buyer_id = self.seed(db)
+        store = self.open_store(db)
+        cart = store.cart(buyer_id)
+        cart.add_product(self.lamp_id, 2)
+
+        cart.add_many({self.lamp_id: 1, self.rug_id: 1})
+        cart.remove_product(self.rug_id)
+
+        self.assertEqual([(line.product_id, line.quantity) for line in cart.view_cart()], [(self.lamp_id, 3)])
+        store.close()
+        self.assertEqual(self.stored(db, buyer_id), [(self.lamp_id, 3)])
+
+    def test_recovery_after_crash(self):
+        """Test that a store abandoned without closing leaves the carts as of its last flush."""
+        db_name = temporary_database(self)
+        db = get_db(db_name)
+        self.addCleanup(db.close)
+        buyer_id = self.seed(db)
+        crashed = CartSessionStore(db, flush_interval=None)
+        crashed.cart(buyer_id).add_product(self.lamp_id, 2)
+        crashed.flush()
+        crashed.cart(buyer_id).add_product(self.rug_id, 5)
+        db.close()
+        close_pools()
+
+        db = get_db(db_name)
+        self.addCleanup(db.close)
+        store = self.open_store(db)
+        self.assertEqual([(line.product_id, line.quantity) for line in store.cart(buyer_id).view_cart()],
+                         [(self.lamp_id, 2)])
+
+    def test_close_and_end_session(self):
+        """Test that ending a session and closing the store both flush, and a closed store refuses carts."""
+        db = self.memory_db()
+        buyer_id = self.seed(db)
+        store = self.open_store(db, flush_interval=5.0)
+        store.cart(buyer_id).add_product(self.lamp_id, 1)
+        store.end_session(buyer_id)
+        self.assertEqual(self.stored(db, buyer_id), [(self.lamp_id, 1)])
+
+        store.cart(buyer_id).clear_cart()
+        store.close()
+
+        self.assertEqual(self.stored(db, buyer_id), [])
+        with self.assertRaises(ValueError):
+            store.cart(buyer_id)
+        with self.assertRaises(ValueError):
+            CartSessionStore(db, flush_interval=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
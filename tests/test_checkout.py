@@ -0,0 +1,134 @@
+import sqlite3
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from ecommerce.db import get_db
+from ecommerce.cart import Cart
+from ecommerce.checkout import CheckoutQueue
+from ecommerce.inventory import OutOfStockError
+from ecommerce.order import Order
+from ecommerce.product import Product
+from tests.helpers import both_engines, seed_shop, temporary_database
+
+
+class TestCheckoutQueue(unittest.TestCase):
+
+    def seed(self, db, buyers):
+        """Add a seller with a lamp (10 in stock) and buyers with the lamp in their carts."""
+        (self.lamp_id,), buyer_ids = seed_shop(db, [("Lamp", 20.0, 10)], buyers)
+        for buyer_id in buyer_ids:
+            Cart(buyer_id, db).add_product(self.lamp_id, 1)
+        return buyer_ids
+
+    def test_concurrent_checkouts_are_committed_in_groups(self):
+        """Test that checkouts from many threads all land, in fewer commits than checkouts."""
+        db = get_db(temporary_database(self))
+        self.addCleanup(db.close)
+        buyer_ids = self.seed(db, 10)
+        checkouts = CheckoutQueue(db, max_wait=0.05)
+        self.addCleanup(checkouts.close)
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            order_ids = list(executor.map(checkouts.checkout, buyer_ids))
+        checkouts.close()
+
+        self.assertEqual(len(set(order_ids)), 10)
+        self.assertLess(checkouts.batches, 10)
+        self.assertEqual(Product.get_product_by_id(self.lamp_id, db, use_cache=False).quantity, 0)
+        for buyer_id, order_id in zip(buyer_ids, order_ids):
+            self.assertEqual([order.id for order in Order.get_orders_by_user(buyer_id, db)], [order_id])
+            self.assertEqual(Cart(buyer_id, db).view_cart(), [])
+
+    def test_failed_checkout_leaves_its_group_alone(self):
+        """Test that an empty cart and an oversold cart fail alone in a group on both engines."""
+        for db in both_engines(self):
+            with self.subTest(db=type(db).__name__):
+                buyer_ids = self.seed(db, 3)
+                Cart(buyer_ids[1], db).clear_cart()
+                Cart(buyer_ids[2], db).add_product(self.lamp_id, 20)
+                checkouts = CheckoutQueue(db, max_wait=0.05)
+                self.addCleanup(checkouts.close)
+
+                futures = [checkouts.submit(buyer_id) for buyer_id in buyer_ids]
+                checkouts.close()
+
+                self.assertIsInstance(futures[0].result(), int)
+                self.assertIsInstance(futures[1].exception(), ValueError)
+                self.assertIsInstance(futures[2].exception(), OutOfStockError)
+                self.assertEqual(Product.get_product_by_id(self.lamp_id, db).quantity, 9)
+                self.assertEqual(len(Cart(buyer_ids[2], db).view_cart()), 1)
+
+    def test_failed_commit_leaves_no_orders(self):
+        """Test that a group whose commit fails is rolled back and not committed with the next group."""
+        db = get_db(":memory:")
+        self.addCleanup(db.close)
+        buyer_ids = self.seed(db, 2)
+        commit = db._commit
+        failures = [sqlite3.OperationalError("database is locked")]
+
+        def failing_commit():
+            if failures:
+                raise failures.pop()
+            commit()
+
+        db._commit = failing_commit
+        checkouts = CheckoutQueue(db)
+        self.addCleanup(checkouts.close)
+        with self.assertRaises(sqlite3.OperationalError):
+            checkouts.checkout(buyer_ids[0])
+        order_id = checkouts.checkout(buyer_ids[1])
+        checkouts.close()
+
+        self.assertEqual(Order.get_orders_by_user(buyer_ids[0], db), [])
+        self.assertEqual(len(Cart(buyer_ids[0], db).view_cart()), 1)
+        self.assertEqual([order.id for order in Order.get_orders_by_user(buyer_ids[1], db)], [order_id])
+        self.assertEqual(Product.get_product_by_id(self.lamp_id, db, use_cache=False).quantity, 9)
+
+    def test_trickle_does_not_delay_the_first_checkout(self):
+        """Test that checkouts arriving one by one within `max_wait` cannot hold the first past `max_wait`."""
+        db = get_db(":memory:")
+        self.addCleanup(db.close)
+        buyer_ids = self.seed(db, 9)
+        checkouts = CheckoutQueue(db, max_wait=0.25)
+        self.addCleanup(checkouts.close)
+        answered = []
+
+        start = time.monotonic()
+        first = checkouts.submit(buyer_ids[0])
+        first.add_done_callback(lambda future: answered.append(time.monotonic() - start))
+        for buyer_id in buyer_ids[1:]:
+            time.sleep(0.1)
+            checkouts.submit(buyer_id)
+        checkouts.close()
+
+        self.assertIsInstance(first.result(), int)
+        self.assertLess(answered[0], 0.6)
+        self.assertGreater(checkouts.batches, 1)
+
+    def test_closed_queue_refuses_checkouts(self):
+        """Test that closing finishes queued checkouts and refuses new ones."""
+        db = get_db(":memory:")
+        self.addCleanup(db.close)
+        buyer_ids = self.seed(db, 1)
+        checkouts = CheckoutQueue(db)
+        self.addCleanup(checkouts.close)
+        future = checkouts.submit(buyer_ids[0])
+        checkouts.close()
+
+        self.assertTrue(future.done())
+        with self.assertRaises(ValueError):
+            checkouts.checkout(buyer_ids[0])
+        checkouts.close()
+
+    def test_invalid_arguments(self):
+        """Test that empty batches and negative waits are refused."""
+        db = get_db(":memory:")
+        self.addCleanup(db.close)
+        with self.assertRaises(ValueError):
+            CheckoutQueue(db, max_batch=0)
+        with self.assertRaises(ValueError):
+            CheckoutQueue(db, max_wait=-1)
+
+
+if __name__ == '__main__':
+    unittest.main()
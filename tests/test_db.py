@@ -0,0 +1,437 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from ecommerce.db import (
+    ConnectionPool,
+    Database,
+    ReplicaPool,
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    get_db,
+    get_pool,
+    close_pools,
+    get_schema_version,
+    migrate,
+    open_connection
+)
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.order import Order
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        """Create a temporary database file for each test."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "test.db")
+
+    def tearDown(self):
+        """Close the pools and remove the temporary database."""
+        close_pools()
+        self.tmpdir.cleanup()
+
+    def test_connection_is_reused(self):
+        """Test that a released connection is handed out again."""
+        pool = ConnectionPool(self.db_name, max_size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(pool.size, 1)
+        pool.close()
+
+    def test_max_size_is_enforced(self):
+        """Test that acquiring beyond max_size times out."""
+        pool = ConnectionPool(self.db_name, max_size=1, timeout=0.05)
+        pool.acquire()
+
+        with self.assertRaises(TimeoutError):
+            pool.acquire()
+        pool.close()
+
+    def test_idle_connections_expire(self):
+        """Test that connections idle longer than idle_timeout are closed."""
+        pool = ConnectionPool(self.db_name, idle_timeout=0)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIsNot(pool.acquire(), connection)
+        self.assertEqual(pool.size, 1)
+        pool.close()
+
+    def test_broken_connection_is_replaced(self):
+        """Test that a connection failing the health check is discarded."""
+        pool = ConnectionPool(self.db_name, health_check_interval=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.close()
+
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertEqual(replacement.execute("SELECT 1").fetchone(), (1,))
+        pool.close()
+
+    def test_release_rolls_back_open_transaction(self):
+        """Test that uncommitted work is discarded when a connection is returned."""
+        pool = ConnectionPool(self.db_name)
+        connection = pool.acquire()
+        connection.execute("INSERT INTO users (username, password_hash) VALUES ('ghost', 'x')")
+        pool.release(connection)
+
+        connection = pool.acquire()
+        self.assertEqual(connection.execute("SELECT COUNT(*) FROM users").fetchone(), (0,))
+        pool.close()
+
+    def test_get_db_returns_connection_on_close(self):
+        """Test that get_db checks out of the shared pool and close returns the connection."""
+        db = get_db(self.db_name)
+        pool = get_pool(self.db_name)
+        self.assertIs(db.pool, pool)
+        self.assertEqual(pool.idle, 0)
+
+        db.close()
+        self.assertEqual(pool.idle, 1)
+        self.assertIs(get_db(self.db_name).connection, db.connection)
+
+    def test_pools_are_separate_per_profile(self):
+        """Test that each pragma profile gets its own pool of configured connections."""
+        durable = get_db(self.db_name)
+        readonly = get_db(self.db_name, profile="readonly")
+
+        self.assertIsNot(durable.pool, readonly.pool)
+        self.assertEqual(readonly.pool.profile, "readonly")
+
+
+class TestPragmaProfiles(unittest.TestCase):
+
+    def setUp(self):
+        """Create a temporary database file for each test."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "test.db")
+
+    def tearDown(self):
+        """Close the pools and remove the temporary database."""
+        close_pools()
+        self.tmpdir.cleanup()
+
+    def pragma(self, db, name):
+        """Read the current value of a pragma."""
+        return db.connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+    def test_durable_profile(self):
+        """Test that the default profile uses WAL with full synchronous commits."""
+        db = get_db(self.db_name)
+        self.assertEqual(self.pragma(db, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(db, "synchronous"), 2)
+        self.assertEqual(self.pragma(db, "busy_timeout"), 5000)
+
+    def test_throughput_profile(self):
+        """Test that the throughput profile relaxes fsyncs and enlarges the caches."""
+        db = get_db(self.db_name, profile="throughput")
+        self.assertEqual(self.pragma(db, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(db, "synchronous"), 1)
+        self.assertEqual(self.pragma(db, "cache_size"), -65536)
+        self.assertEqual(self.pragma(db, "temp_store"), 2)
+
+    def test_readonly_profile_rejects_writes(self):
+        """Test that the readonly profile can read but not write."""
+        get_db(self.db_name).close()
+        db = get_db(self.db_name, profile="readonly")
+
+        db.cursor.execute("SELECT COUNT(*) FROM users")
+        self.assertEqual(db.cursor.fetchone(), (0,))
+        with self.assertRaises(sqlite3.OperationalError):
+            db.cursor.execute("INSERT INTO users (username, password_hash) VALUES ('x', 'y')")
+
+    def test_concurrent_opens_of_a_new_file(self):
+        """Test that many threads opening a fresh file at once all switch it to WAL without errors."""
+        for trial in range(20):
+            db_name = os.path.join(self.tmpdir.name, f"fresh{trial}.db")
+            errors = []
+
+            def connect():
+                try:
+                    open_connection(db_name).close()
+                except sqlite3.Error as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=connect) for _ in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            connection = open_connection(db_name)
+            self.assertEqual(connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            connection.close()
+
+    def test_unknown_profile(self):
+        """Test that an unknown profile name is rejected."""
+        with self.assertRaises(ValueError):
+            get_db(":memory:", profile="fastest")
+
+
+class TestReadReplicas(unittest.TestCase):
+
+    def setUp(self):
+        """Create a temporary database with one user for each test."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "test.db")
+        self.db = get_db(self.db_name)
+        User.register("alice", "password", self.db)
+
+    def tearDown(self):
+        """Close the pools and remove the temporary database."""
+        self.db.close()
+        close_pools()
+        self.tmpdir.cleanup()
+
+    def test_reads_are_served_by_replicas(self):
+        """Test that committed data is read through a read-only connection."""
+        self.assertEqual(User.get_user_id("alice", self.db), 1)
+        self.assertEqual(self.db.replicas.size, 1)
+
+    def test_replica_connections_are_read_only(self):
+        """Test that a replica connection cannot write."""
+        connection = self.db.replicas.acquire()
+        with self.assertRaises(sqlite3.OperationalError):
+            connection.execute("DELETE FROM users")
+        self.db.replicas.release(connection)
+
+    def test_uncommitted_work_is_read_from_writer(self):
+        """Test that reads inside a transaction see the transaction's own writes."""
+        with self.db.transaction():
+            User.register("bob", "password", self.db)
+            self.assertEqual(User.get_user_id("bob", self.db), 2)
+
+        self.db.execute("INSERT INTO users (username, password_hash) VALUES ('carol', 'x')")
+        self.assertEqual(User.get_user_id("carol", self.db), 3)
+        self.db.commit()
+
+    def test_reads_do_not_wait_for_another_threads_transaction(self):
+        """Test that a reader is served while another thread holds a write transaction."""
+        started, finish = threading.Event(), threading.Event()
+
+        def writer():
+            with self.db.transaction():
+                User.register("bob", "password", self.db)
+                started.set()
+                finish.wait(5)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        started.wait(5)
+        self.assertEqual(self.db.fetchall("SELECT username FROM users"), [("alice",)])
+        finish.set()
+        thread.join()
+        self.assertEqual(len(self.db.fetchall("SELECT username FROM users")), 2)
+
+    def test_snapshot_is_refreshed_after_interval(self):
+        """Test that snapshot replicas serve stale data until their interval elapses."""
+        replicas = ReplicaPool(self.db_name, snapshot_interval=3600)
+        self.db.replicas = replicas
+        self.assertEqual(len(self.db.fetchall("SELECT * FROM users")), 1)
+
+        User.register("bob", "password", self.db)
+        self.assertEqual(len(self.db.fetchall("SELECT * FROM users")), 1)
+
+        replicas.snapshot_interval = 0
+        self.assertEqual(len(self.db.fetchall("SELECT * FROM users")), 2)
+        replicas.close()
+
+
+class TestMigrations(unittest.TestCase):
+
+    def test_new_database_is_at_latest_version(self):
+        """Test that a fresh database is migrated to the current schema version."""
+        db = get_db(":memory:")
+        self.assertEqual(get_schema_version(db.connection), SCHEMA_VERSION)
+        db.close()
+
+    def test_redundant_seller_index_is_dropped(self):
+        """Test that the seller index covered by (user_id, price) does not survive the migrations."""
+        db = get_db(":memory:")
+        indexes = [row[0] for row in db.fetchall("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'products'")]
+        self.assertIn("idx_products_user_price", indexes)
+        self.assertNotIn("idx_products_user_id", indexes)
+        db.close()
+
+    def test_up_to_date_database_only_reads_version(self):
+        """Test that migrating an up-to-date database issues a single pragma read."""
+        db = get_db(":memory:")
+        statements = []
+        db.connection.set_trace_callback(statements.append)
+
+        migrate(db.connection)
+
+        self.assertEqual(statements, ["PRAGMA user_version"])
+        db.close()
+
+    def test_unversioned_database_is_adopted(self):
+        """Test that a database created before versioning keeps its data when migrated."""
+        connection = sqlite3.connect(":memory:")
+        connection.execute("CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, password_hash TEXT)")
+        connection.execute("INSERT INTO users (username, password_hash) VALUES ('legacy', 'x')")
+        connection.commit()
+
+        migrate(connection)
+
+        self.assertEqual(get_schema_version(connection), SCHEMA_VERSION)
+        self.assertEqual(connection.execute("SELECT username FROM users").fetchall(), [("legacy",)])
+        connection.close()
+
+    def test_existing_products_become_searchable(self):
+        """Test that the search migration indexes products created before it."""
+        connection = sqlite3.connect(":memory:")
+        for migration in MIGRATIONS[:2]:
+            migration(connection.cursor())
+        connection.execute("INSERT INTO products (name, description) VALUES ('Vintage Lamp', 'Brass')")
+        connection.execute("PRAGMA user_version = 2")
+        connection.commit()
+
+        migrate(connection)
+
+        rows = connection.execute("SELECT rowid FROM products_fts WHERE products_fts MATCH 'lamp'").fetchall()
+        self.assertEqual(rows, [(1,)])
+        connection.close()
+
+    def test_inline_ascii_art_moves_out_of_line(self):
+        """Test that the ASCII art migration moves existing art to the deduplicated art table."""
+        connection = sqlite3.connect(":memory:")
+        for migration in MIGRATIONS[:4]:
+            migration(connection.cursor())
+        connection.executemany("INSERT INTO products (name, ascii_art) VALUES (?, ?)",
+                               [("Lamp", "(*)"), ("Rug", None), ("Lamp 2", "(*)"), ("Mug", "[_]")])
+        connection.execute("PRAGMA user_version = 4")
+        connection.commit()
+
+        migrate(connection)
+
+        columns = [row[1] for row in connection.execute("PRAGMA table_info(products)")]
+        self.assertNotIn("ascii_art", columns)
+        self.assertEqual(connection.execute("SELECT COUNT(*) FROM ascii_art").fetchone()[0], 2)
+        db = Database(connection, connection.cursor())
+        self.assertEqual([Product.get_ascii_art(i, db) for i in range(1, 5)], ["(*)", None, "(*)", "[_]"])
+        connection.close()
+
+    def test_order_text_is_backfilled_into_order_items(self):
+        """Test that the order_items migration parses both checkout formats and skips other text."""
+        connection = sqlite3.connect(":memory:")
+        for migration in MIGRATIONS[:5]:
+            migration(connection.cursor())
+        connection.executemany("INSERT INTO users (id, username) VALUES (?, ?)", [(1, "seller"), (2, "buyer")])
+        connection.executemany("INSERT INTO products (name, price, user_id) VALUES (?, ?, ?)",
+                               [("Lamp", 20.0, 1), ("Rug", 40.0, 1), ("Rug", 45.0, 1)])
+        connection.executemany("INSERT INTO orders (user_id, order_details, total) VALUES (?, ?, ?)",
+                               [(2, "Lamp - $20.0 (x2)\nRug - $40.0 (x1)", 80.0),
+                                (2, "Lamp (x3) - $60.0", 60.0),
+                                (2, "Lamp x1", 20.0),
+                                (2, "Gone - $5.0 (x1)\nsomething else", 5.0)])
+        connection.execute("PRAGMA user_version = 5")
+        connection.commit()
+
+        migrate(connection)
+
+        items = connection.execute("SELECT order_id, product_id, seller_id, product_name, unit_price, quantity "
+                                   "FROM order_items ORDER BY id").fetchall()
+        self.assertEqual(items, [(1, 1, 1, "Lamp", 20.0, 2), (1, None, None, "Rug", 40.0, 1),
+                                 (2, 1, 1, "Lamp", 20.0, 3)])
+        db = Database(connection, connection.cursor())
+        self.assertEqual(Order.get_units_sold(1, db), 5)
+        self.assertEqual(Order.get_order_by_id(3, db).items, [])
+        connection.close()
+
+    def test_canceling_a_migrated_order_leaves_stock_alone(self):
+        """Test that a pending order placed before checkout reserved stock returns no units when canceled."""
+        connection = sqlite3.connect(":memory:")
+        for migration in MIGRATIONS[:5]:
+            migration(connection.cursor())
+        connection.executemany("INSERT INTO users (id, username) VALUES (?, ?)", [(1, "seller"), (2, "buyer")])
+        connection.execute("INSERT INTO products (name, price, user_id, quantity) VALUES ('Lamp', 20.0, 1, 5)")
+        connection.execute("INSERT INTO orders (user_id, order_details, total, status) "
+                           "VALUES (2, 'Lamp (x2) - $40.0', 40.0, 'pending')")
+        connection.execute("PRAGMA user_version = 5")
+        connection.commit()
+        migrate(connection)
+        db = Database(connection, connection.cursor())
+
+        Order(2, db).cancel_order(1)
+
+        self.assertEqual(Order.get_order_by_id(1, db).status, "canceled")
+        self.assertEqual(Product.get_product_by_id(1, db).quantity, 5)
+        connection.close()
+
+
+class TestTransaction(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an in-memory database before each test."""
+        self.db = get_db(":memory:")
+
+    def tearDown(self):
+        """Close the database after each test."""
+        self.db.close()
+
+    def count_users(self):
+        """Return the number of rows in the users table."""
+        self.db.cursor.execute("SELECT COUNT(*) FROM users")
+        return self.db.cursor.fetchone()[0]
+
+    def test_commit_is_deferred_to_outermost_scope(self):
+        """Test that model commits inside a transaction produce a single COMMIT."""
+        statements = []
+        self.db.connection.set_trace_callback(statements.append)
+
+        with self.db.transaction():
+            User.register("alice", "password", self.db)
+            User.register("bob", "password", self.db)
+
+        self.assertEqual(statements.count("COMMIT"), 1)
+        self.assertEqual(self.count_users(), 2)
+
+    def test_exception_rolls_back_everything(self):
+        """Test that an error inside a transaction discards all of its changes."""
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                User.register("alice", "password", self.db)
+                raise RuntimeError("boom")
+
+        self.assertEqual(self.count_users(), 0)
+
+    def test_nested_scope_rolls_back_to_savepoint(self):
+        """Test that a failing nested block only undoes its own changes."""
+        with self.db.transaction():
+            User.register("alice", "password", self.db)
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    User.register("bob", "password", self.db)
+                    raise RuntimeError("boom")
+
+        self.db.cursor.execute("SELECT username FROM users")
+        self.assertEqual(self.db.cursor.fetchall(), [("alice",)])
+
+    def test_failed_commit_rolls_back(self):
+        """Test that a block whose COMMIT fails is rolled back and not committed by the next block."""
+        self.db.connection.execute("PRAGMA foreign_keys = ON")
+        self.db.connection.execute("CREATE TABLE parents (id INTEGER PRIMARY KEY)")
+        self.db.connection.execute("CREATE TABLE children (parent_id INTEGER REFERENCES parents (id) "
+                                   "DEFERRABLE INITIALLY DEFERRED)")
+
+        with self.assertRaises(sqlite3.IntegrityError):
+            with self.db.transaction():
+                User.register("alice", "password", self.db)
+                self.db.write("INSERT INTO children (parent_id) VALUES (1)")
+
+        self.assertFalse(self.db.connection.in_transaction)
+        with self.db.transaction():
+            User.register("bob", "password", self.db)
+        self.db.cursor.execute("SELECT username FROM users")
+        self.assertEqual(self.db.cursor.fetchall(), [("bob",)])
+        self.assertEqual(self.db.fetchone("SELECT COUNT(*) FROM children")[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from ecommerce.db import get_db, close_pools
+from ecommerce.exporter import export_orders, export_products, main
+from ecommerce.memory import MemoryDatabase
+from ecommerce.order import Order
+from ecommerce.product import Product
+from ecommerce.user import User
+
+
+class CountingSink:
+    """A text file that only counts what is written to it, so output does not use memory."""
+
+    def __init__(self):
+        self.characters = 0
+
+    def write(self, text):
+        self.characters += len(text)
+        return len(text)
+
+
+class TestExporter(unittest.TestCase):
+
+    def setUp(self):
+        """Create a seller with three products and a shopper with three orders in an in-memory database."""
+        self.db = get_db(":memory:")
+        self.seed(self.db)
+
+    def tearDown(self):
+        """Close the database."""
+        self.db.close()
+
+    def seed(self, db):
+        """Add the test users, products and orders to a database."""
+        User.register("seller", "password", db)
+        User.register("shopper", "password", db)
+        self.seller_id = User.get_user_id("seller", db)
+        self.shopper_id = User.get_user_id("shopper", db)
+        Product.create_product("Lamp", 20.0, "A desk lamp", self.seller_id, db, "(*)", 5)
+        Product.create_product("Rug", 40.0, "A rug", self.seller_id, db, None, 0)
+        Product.create_product("Mug", 5.0, "A mug", self.seller_id, db, None, 12)
+        order = Order(self.shopper_id, db)
+        order.create_order("Lamp x1", 20.0)
+        order.create_order("Mug x2", 10.0, "shipped")
+        order.create_order("Rug x1", 40.0)
+
+    def test_export_products_csv(self):
+        """Test exporting chosen product columns, with filters, as CSV."""
+        output = io.StringIO(newline="")
+
+        count = export_products(output, columns=["name", "price", "ascii_art"], min_price=10, in_stock=True,
+                                batch_size=1, db=self.db)
+
+        self.assertEqual(count, 1)
+        self.assertEqual(list(csv.reader(io.StringIO(output.getvalue()))),
+                         [["name", "price", "ascii_art"], ["Lamp", "20.0", "(*)"]])
+
+    def test_export_all_product_columns(self):
+        """Test that every column is exported by default, in ID order."""
+        output = io.StringIO()
+
+        self.assertEqual(export_products(output, "jsonl", db=self.db), 3)
+
+        rows = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["Lamp", "Rug", "Mug"])
+        self.assertEqual(rows[0], {"id": 1, "name": "Lamp", "price": 20.0, "description": "A desk lamp",
+                                   "user_id": self.seller_id, "ascii_art": "(*)", "quantity": 5})
+
+    def test_export_orders(self):
+        """Test exporting orders filtered by user and status from both storage engines."""
+        for db in (self.db, MemoryDatabase()):
+            with self.subTest(db=type(db).__name__):
+                if isinstance(db, MemoryDatabase):
+                    self.seed(db)
+                output = io.StringIO()
+
+                count = export_orders(output, "jsonl", ["order_details", "total"], self.shopper_id, "pending",
+                                      batch_size=1, db=db)
+
+                self.assertEqual(count, 2)
+                self.assertEqual([json.loads(line) for line in output.getvalue().splitlines()],
+                                 [{"order_details": "Lamp x1", "total": 20.0},
+                                  {"order_details": "Rug x1", "total": 40.0}])
+
+    def test_memory_engine_products(self):
+        """Test that the in-memory engine applies the same product filters."""
+        db = MemoryDatabase()
+        self.seed(db)
+        output = io.StringIO()
+
+        export_products(output, "jsonl", ["name"], max_price=30, seller_id=self.seller_id, db=db)
+
+        self.assertEqual(output.getvalue().splitlines(), ['{"name": "Lamp"}', '{"name": "Mug"}'])
+
+    def test_invalid_arguments(self):
+        """Test that unknown formats and columns and empty batches are refused."""
+        output = io.StringIO()
+        with self.assertRaises(ValueError):
+            export_products(output, "xml", db=self.db)
+        with self.assertRaises(ValueError):
+            export_products(output, columns=["name", "password"], db=self.db)
+        with self.assertRaises(ValueError):
+            export_orders(output, columns=["ascii_art"], db=self.db)
+        with self.assertRaises(ValueError):
+            export_orders(output, batch_size=0, db=self.db)
+        self.assertEqual(output.getvalue(), "")
+
+    def test_command_line(self):
+        """Test the command-line entry point writing to a file and to stdout."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_name = os.path.join(tmpdir, "shop.db")
+            db = get_db(db_name)
+            self.seed(db)
+            db.close()
+            path = os.path.join(tmpdir, "orders.jsonl")
+
+            with redirect_stderr(io.StringIO()) as messages:
+                main(["--db", db_name, "orders", "--user", "shopper", "--status", "shipped", "-o", path])
+            with open(path) as file:
+                self.assertEqual([json.loads(line)["order_details"] for line in file], ["Mug x2"])
+            self.assertIn("Exported 1 orders", messages.getvalue())
+
+            output = io.StringIO()
+            with redirect_stdout(output), redirect_stderr(io.StringIO()):
+                main(["--db", db_name, "products", "--seller", "seller", "--columns", "id,name", "--in-stock"])
+            self.assertEqual(output.getvalue().splitlines(), ["id,name", "1,Lamp", "3,Mug"])
+            close_pools()
+
+    def test_million_rows_in_bounded_memory(self):
+        """Test that exporting a million orders stays under a fixed memory ceiling."""
+        row_count = 1000000
+        self.db.write('''
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?)
+            INSERT INTO orders (user_id, order_details, total, status)
+            SELECT ?, 'Product ' || i || ' x1', i % 500 + 0.5, 'pending' FROM n
+        ''', (row_count, self.shopper_id))
+        sink = CountingSink()
+
+        tracemalloc.start()
+        try:
+            count = export_orders(sink, db=self.db)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(count, row_count + 3)
+        self.assertGreater(sink.characters, 30 * row_count)
+        # A fetchall of the same rows holds about 250 MiB.
+        self.assertLess(peak, 2 * 2 ** 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
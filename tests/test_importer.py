@@ -0,0 +1,142 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from ecommerce.db import get_db, close_pools
+from ecommerce.importer import import_products, validate_row, main
+from ecommerce.memory import MemoryDatabase
+from ecommerce.product import Product
+from ecommerce.user import User
+
+
+class TestImporter(unittest.TestCase):
+
+    def setUp(self):
+        """Create a seller in an in-memory database and a scratch directory for each test."""
+        self.db = get_db(":memory:")
+        User.register("seller", "password", self.db)
+        self.seller_id = User.get_user_id("seller", self.db)
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Close the database and remove the scratch files."""
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        """Write a file in the scratch directory and return its path."""
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", newline="") as file:
+            file.write(text)
+        return path
+
+    def test_validate_row(self):
+        """Test conversion of valid records and rejection of invalid ones."""
+        self.assertEqual(validate_row({"name": " Lamp ", "price": "9.5", "quantity": "3"}, 7),
+                         ("Lamp", 9.5, "", 7, None, 3))
+        self.assertEqual(validate_row({"name": "Lamp", "price": 1, "quantity": 2.0}, 7)[5], 2)
+        for record in ({"price": "1"}, {"name": "Lamp", "price": "free"}, {"name": "Lamp", "price": "-1"},
+                       {"name": "Lamp", "price": "nan"}, {"name": "Lamp", "price": True},
+                       {"name": "Lamp", "price": "1", "quantity": "1.5"},
+                       {"name": "Lamp", "price": "1", "quantity": -2}, {"name": 12, "price": "1"},
+                       {"name": "Lamp", "price": "1", "description": {"x": 1}},
+                       {"name": "Lamp", "price": "1", "ascii_art": ["(*)"]}):
+            with self.subTest(record=record):
+                with self.assertRaises(ValueError):
+                    validate_row(record, 7)
+
+    def test_csv_import_rejects_bad_rows(self):
+        """Test that valid CSV rows are loaded in batches and bad ones go to the error file."""
+        path = self.write("catalog.csv", "name,price,description,quantity\n"
+                                         "Lamp,20,A desk lamp,5\n"
+                                         ",10,No name,1\n"
+                                         "Rug,40,A rug,\n"
+                                         "Chair,cheap,A chair,2\n"
+                                         "Mug,5,A mug,12\n")
+        errors = os.path.join(self.tmpdir.name, "errors.csv")
+
+        report = import_products(path, self.seller_id, batch_size=2, error_path=errors, db=self.db)
+
+        self.assertEqual((report.imported, report.rejected, report.batches), (3, 2, 3))
+        self.assertGreater(report.rows_per_second, 0)
+        products = Product.get_products_by_user_id(self.seller_id, self.db, summary=True)
+        self.assertEqual([(p[1], p[2], p[3]) for p in products], [("Lamp", 20.0, 5), ("Rug", 40.0, 0), ("Mug", 5.0, 12)])
+        with open(errors, newline="") as file:
+            rejected = list(csv.DictReader(file))
+        self.assertEqual([(row["line"], row["description"]) for row in rejected], [("3", "No name"), ("5", "A chair")])
+        self.assertIn("price", rejected[1]["error"])
+
+    def test_jsonl_import(self):
+        """Test loading a JSONL file, including malformed lines, into the in-memory engine."""
+        path = self.write("catalog.jsonl", json.dumps({"name": "Lamp", "price": 20, "ascii_art": "(*)"}) + "\n"
+                                           "\n"
+                                           "{not json\n"
+                                           "[1, 2]\n"
+                                           + json.dumps({"name": "Rug", "price": 40.5, "quantity": 1}) + "\n")
+        errors = os.path.join(self.tmpdir.name, "errors.jsonl")
+        db = MemoryDatabase()
+
+        report = import_products(path, 1, error_path=errors, db=db)
+
+        self.assertEqual((report.imported, report.rejected), (2, 2))
+        self.assertEqual(Product.get_ascii_art(1, db), "(*)")
+        with open(errors) as file:
+            self.assertEqual([json.loads(line)["line"] for line in file], [3, 4])
+
+    def test_mistyped_jsonl_row_does_not_reject_its_batch(self):
+        """Test that a JSONL row with a non-text field is rejected alone, not with its whole batch."""
+        rows = [{"name": f"Product {i}", "price": i} for i in range(5)]
+        rows.insert(3, {"name": "Odd", "price": 1, "description": {"x": 1}})
+        path = self.write("catalog.jsonl", "".join(json.dumps(row) + "\n" for row in rows))
+        errors = os.path.join(self.tmpdir.name, "errors.jsonl")
+
+        report = import_products(path, self.seller_id, error_path=errors, db=self.db)
+
+        self.assertEqual((report.imported, report.rejected), (5, 1))
+        with open(errors) as file:
+            rejected = [json.loads(line) for line in file]
+        self.assertEqual([(row["line"], row["row"]["name"]) for row in rejected], [(4, "Odd")])
+        self.assertIn("description", rejected[0]["error"])
+
+    def test_failed_batch_is_rolled_back(self):
+        """Test that a batch the database refuses is rejected as a whole and the load goes on."""
+        self.db.write("CREATE TRIGGER no_forbidden BEFORE INSERT ON products WHEN new.name = 'Forbidden' "
+                      "BEGIN SELECT RAISE(ABORT, 'forbidden product'); END")
+        path = self.write("catalog.csv", "name,price\nLamp,1\nForbidden,2\nRug,3\n")
+
+        with self.assertLogs("ecommerce.importer", "WARNING") as logs:
+            report = import_products(path, self.seller_id, batch_size=2, db=self.db)
+
+        self.assertEqual((report.imported, report.rejected), (1, 2))
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("Batch ending at line 3 failed: forbidden product", logs.output[0])
+        self.assertEqual([p[1] for p in Product.get_all_products(self.db, summary=True)], ["Rug"])
+
+    def test_invalid_arguments(self):
+        """Test that unknown formats and empty batches are refused."""
+        with self.assertRaises(ValueError):
+            import_products(self.write("catalog.xml", ""), self.seller_id, db=self.db)
+        with self.assertRaises(ValueError):
+            import_products(self.write("catalog.csv", ""), self.seller_id, batch_size=0, db=self.db)
+
+    def test_command_line(self):
+        """Test the command-line entry point against a database file."""
+        db_name = os.path.join(self.tmpdir.name, "shop.db")
+        db = get_db(db_name)
+        User.register("seller", "password", db)
+        db.close()
+        path = self.write("catalog.csv", "name,price\nLamp,1\nRug,2\n")
+
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main([path, "--seller", "seller", "--db", db_name])
+
+        self.assertIn("Imported 2 products, rejected 0", output.getvalue())
+        close_pools()
+
+
+if __name__ == '__main__':
+    unittest.main()
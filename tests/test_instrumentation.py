@@ -0,0 +1,78 @@
+import unittest
+from ecommerce.db import get_db, set_instrumentation
+from ecommerce.instrumentation import QueryStats, normalize_sql, percentile
+from ecommerce.user import User
+
+
+class TestQueryStats(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an in-memory database with a private collector before each test."""
+        self.db = get_db(":memory:")
+        self.stats = QueryStats(slow_query_threshold=None)
+        self.db.instrumentation = self.stats
+
+    def tearDown(self):
+        """Close the database and remove any process-wide hook after each test."""
+        self.db.close()
+        set_instrumentation(None)
+
+    def find(self, prefix):
+        """Return the statistics of the first statement starting with the given text."""
+        return next(stats for stats in self.stats.statements() if stats.sql.startswith(prefix))
+
+    def test_normalize_sql(self):
+        """Test that formatting, literals and placeholder lists are normalized."""
+        self.assertEqual(normalize_sql("SELECT *\n   FROM products\n WHERE id = 42 AND name = 'x'"),
+                         "SELECT * FROM products WHERE id = ? AND name = ?")
+        self.assertEqual(normalize_sql("SELECT * FROM products WHERE id IN (?, ?, ?)"),
+                         "SELECT * FROM products WHERE id IN (?, ...)")
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 0.50), 50)
+        self.assertEqual(percentile(samples, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_statements_are_counted(self):
+        """Test that repeated executions are grouped under one normalized statement."""
+        User.register("alice", "password", self.db)
+        for _ in range(3):
+            User.get_user_id("alice", self.db)
+
+        select = self.find("SELECT id FROM users")
+        self.assertEqual(select.count, 3)
+        self.assertGreater(select.total, 0)
+        self.assertEqual(self.find("COMMIT").count, 1)
+
+    def test_slow_query_is_logged_with_plan(self):
+        """Test that statements over the threshold are logged with parameters and plan."""
+        self.stats.slow_query_threshold = 0
+        with self.assertLogs("ecommerce.instrumentation", level="WARNING") as logs:
+            self.db.fetchone("SELECT id FROM users WHERE username = ?", ("alice",))
+
+        self.assertIn("params=('alice',)", logs.output[0])
+        self.assertIn("SEARCH users USING", logs.output[0])
+
+    def test_process_wide_hook(self):
+        """Test that set_instrumentation applies to databases without their own hook."""
+        stats = QueryStats(slow_query_threshold=None)
+        set_instrumentation(stats)
+        db = get_db(":memory:")
+        db.fetchall("SELECT * FROM products")
+        db.close()
+
+        self.assertEqual(stats.statements()[0].sql, "SELECT * FROM products")
+
+    def test_report(self):
+        """Test that the report lists each statement with its timings."""
+        User.register("alice", "password", self.db)
+        report = self.stats.report()
+
+        self.assertIn("p95", report.splitlines()[0])
+        self.assertIn("INSERT INTO users", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from ecommerce.db import get_db
+from ecommerce.cache import LRUCache
+from ecommerce.cart import Cart
+from ecommerce.inventory import OutOfStockError, reserve_stock
+from ecommerce.memory import MemoryDatabase
+from ecommerce.order import Order
+from ecommerce.product import Product
+from ecommerce.records import CartLine
+from ecommerce.user import User
+from tests.helpers import both_engines, seed_shop, temporary_database
+
+
+class TestInventory(unittest.TestCase):
+
+    def seed(self, db):
+        """Add a seller with a lamp (5 in stock) and a rug (1 in stock), and a buyer with a cart."""
+        (self.lamp_id, self.rug_id), (buyer_id,) = seed_shop(db, [("Lamp", 20.0, 5), ("Rug", 40.0, 1)])
+        return Cart(buyer_id, db=db)
+
+    def stock(self, db):
+        """Return the quantities of the lamp and the rug."""
+        return [product.quantity for product in Product.get_many([self.lamp_id, self.rug_id], db).products]
+
+    def test_checkout_takes_stock(self):
+        """Test that checking out decrements the stock of every product in the cart on both engines."""
+        for db in both_engines(self):
+            with self.subTest(db=type(db).__name__):
+                cart = self.seed(db)
+                cart.add_product(self.lamp_id, 2)
+                cart.add_product(self.rug_id, 1)
+
+                order_id = cart.checkout()
+
+                self.assertEqual(self.stock(db), [3, 0])
+                self.assertEqual(Order.get_orders_by_user(cart.user_id, db)[0].id, order_id)
+
+    def test_oversell_rolls_back(self):
+        """Test that a short product fails the checkout without taking any stock or emptying the cart."""
+        for db in both_engines(self):
+            with self.subTest(db=type(db).__name__):
+                cart = self.seed(db)
+                cart.add_product(self.lamp_id, 2)
+                cart.add_product(self.rug_id, 2)
+
+                with self.assertRaises(OutOfStockError) as e:
+                    cart.checkout()
+
+                self.assertEqual((e.exception.product_id, e.exception.requested), (self.rug_id, 2))
+                self.assertIn("Rug", str(e.exception))
+                self.assertEqual(self.stock(db), [5, 1])
+                self.assertEqual(len(cart.view_cart()), 2)
+                self.assertEqual(Order.get_orders_by_user(cart.user_id, db), [])
+
+    def test_cancel_returns_stock(self):
+        """Test that canceling a pending order puts its units back in stock once, on both engines."""
+        for db in (get_db(":memory:"), MemoryDatabase(product_cache=LRUCache())):
+            self.addCleanup(db.close)
+            with self.subTest(db=type(db).__name__):
+                cart = self.seed(db)
+                cart.add_product(self.lamp_id, 2)
+                cart.add_product(self.rug_id, 1)
+                order_id = cart.checkout()
+                self.assertEqual(Product.get_product_by_id(self.lamp_id, db).quantity, 3)
+
+                order = Order(cart.user_id, db)
+                order.cancel_order(order_id)
+                order.cancel_order(order_id)
+
+                self.assertEqual(Order.get_order_by_id(order_id, db).status, "canceled")
+                self.assertEqual(self.stock(db), [5, 1])
+                self.assertEqual(Product.get_product_by_id(self.lamp_id, db).quantity, 5)
+
+    def test_reservation_invalidates_cached_products(self):
+        """Test that a reservation drops the cached copy of the product."""
+        db = get_db(":memory:")
+        self.addCleanup(db.close)
+        self.seed(db)
+        self.assertEqual(Product.get_product_by_id(self.lamp_id, db).quantity, 5)
+
+        reserve_stock([CartLine("Lamp", 20.0, 4, self.lamp_id)], db)
+
+        self.assertEqual(Product.get_product_by_id(self.lamp_id, db).quantity, 1)
+        with self.assertRaises(ValueError):
+            reserve_stock([CartLine("Lamp", 20.0, 0, self.lamp_id)], db)
+        with self.assertRaises(OutOfStockError):
+            reserve_stock([CartLine("Gone", 1.0, 1, 999)], db)
+
+    def test_parallel_buyers_never_oversell(self):
+        """Test that buyers racing for a hot product on separate connections sell exactly the stock."""
+        buyers = 24
+        db_name = temporary_database(self)
+        db = get_db(db_name)
+        self.addCleanup(db.close)
+        self.seed(db)
+        Product.update_product(self.lamp_id, quantity=10, db=db)
+
+        def buy(buyer):
+            connection = get_db(db_name)
+            try:
+                User.register(f"shopper{buyer}", "password", connection)
+                cart = Cart(User.get_user_id(f"shopper{buyer}", connection), db=connection)
+                cart.add_product(self.lamp_id, 1)
+                try:
+                    cart.checkout()
+                    return True
+                except OutOfStockError:
+                    return False
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            sold = sum(executor.map(buy, range(buyers)))
+
+        self.assertEqual(sold, 10)
+        self.assertEqual(Product.get_product_by_id(self.lamp_id, db, use_cache=False).quantity, 0)
+        self.assertEqual(db.fetchone("SELECT COUNT(*) FROM orders")[0], 10)
+
+if __name__ == '__main__':
+    unittest.main()
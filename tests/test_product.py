@@ -31,8 +31,9 @@ class TestProductModel(unittest.TestCase):
         self.assertEqual(product[2], 99.99)
         self.assertEqual(product[3], "A test product with ASCII art")
         self.assertEqual(product[4], self.user_id)
-        self.assertEqual(product[5], self.ascii_art)
-        self.assertEqual(product[6], 10) 
+        self.assertEqual(product[5], 10)
+        # The art is stored out of line, in the ascii_art table.
+        self.assertEqual(Product.get_ascii_art(product[0], self.db), self.ascii_art) 
 
     def test_get_all_products_with_ascii_art_and_quantity(self):
         """Test fetching all products, including ASCII art and quantity."""
@@ -0,0 +1,163 @@
+import ast
+import glob
+import os
+import random
+import re
+import unittest
+from ecommerce.db import MIGRATIONS, get_db
+from ecommerce.storage import PRODUCT_SORTS
+
+ECOMMERCE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ecommerce")
+
+# Statements that are expected to visit every row, with the reason they are allowed to.
+# A virtual table "scan" whose index string carries constraints (such as FTS5's "M" for
+# MATCH) is a lookup by the module; one with an empty index string visits every row.
+VIRTUAL_TABLE_LOOKUP = re.compile(r"VIRTUAL TABLE INDEX \d+:\S")
+
+FULL_SCAN_ALLOWED = {
+    "SELECT p.id, p.name, p.price, p.description, p.user_id, a.data, p.quantity FROM products p "
+    "LEFT JOIN ascii_art a ON a.id = p.ascii_art_id": "lists the whole catalog",
+    "SELECT COUNT(*) FROM products": "counts the whole catalog, only when a page asks for the total",
+}
+
+
+def normalize(sql):
+    """Collapse whitespace so statements can be compared regardless of formatting."""
+    return " ".join(sql.split())
+
+
+def collect_statements():
+    """
+    Collect every literal SQL DML statement from the modules in `ecommerce/`.
+
+    Docstrings, the fragments of f-strings (statements assembled at runtime) and the bodies
+    of schema migrations, which run once against an older schema, are skipped.
+
+    Returns:
+        list: Tuples of (module file name, normalized SQL).
+    """
+    migrations = {migration.__name__ for migration in MIGRATIONS}
+    statements = []
+    for path in sorted(glob.glob(os.path.join(ECOMMERCE_DIR, "*.py"))):
+        with open(path) as source:
+            tree = ast.parse(source.read())
+        skipped = {id(node.value) for node in ast.walk(tree) if isinstance(node, ast.Expr)}
+        skipped.update(id(part) for node in ast.walk(tree) if isinstance(node, ast.JoinedStr) for part in node.values)
+        skipped.update(id(child) for node in ast.walk(tree)
+                       if isinstance(node, ast.FunctionDef) and node.name in migrations for child in ast.walk(node))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in skipped:
+                sql = normalize(node.value)
+                words = sql.split(" ")
+                if len(words) > 1 and words[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE"):
+                    statements.append((os.path.basename(path), sql))
+    return statements
+
+
+def seed(db, user_count=2000, products_per_user=10, orders_per_user=5):
+    """Fill the database with enough rows for the planner to prefer indexes."""
+    rng = random.Random(42)
+    cursor = db.cursor
+    cursor.executemany("INSERT INTO users (id, username, password_hash) VALUES (?, ?, ?)",
+                       ((i, f"user{i}", "hash") for i in range(1, user_count + 1)))
+    cursor.executemany('''
+        INSERT INTO products (name, price, description, user_id, quantity)
+        VALUES (?, ?, ?, ?, ?)
+    ''', ((f"Product {u}-{n}", rng.uniform(1, 100), "Description", u, rng.randint(0, 20))
+          for u in range(1, user_count + 1) for n in range(products_per_user)))
+    product_count = user_count * products_per_user
+    cursor.executemany("INSERT OR IGNORE INTO carts (user_id, product_id, quantity) VALUES (?, ?, ?)",
+                       ((u, rng.randint(1, product_count), 1) for u in range(1, user_count + 1) for _ in range(3)))
+    cursor.executemany("INSERT INTO orders (user_id, order_details, total, status) VALUES (?, ?, ?, ?)",
+                       ((u, "details", 10.0, rng.choice(["pending", "shipped", "canceled"]))
+                        for u in range(1, user_count + 1) for _ in range(orders_per_user)))
+    db.connection.commit()
+    cursor.execute("ANALYZE")
+
+
+class TestQueryPlans(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        """Seed one large in-memory database shared by every plan check."""
+        cls.db = get_db(":memory:")
+        seed(cls.db)
+        cls.statements = collect_statements()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Close the shared database."""
+        cls.db.close()
+
+    def explain(self, sql):
+        """Return the detail column of every EXPLAIN QUERY PLAN row for a statement."""
+        params = [1] * sql.count("?")
+        self.db.cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[3] for row in self.db.cursor.fetchall()]
+
+    def test_statements_are_found(self):
+        """Test that the collector sees the model queries."""
+        self.assertGreater(len(self.statements), 10)
+
+    def test_no_hot_query_scans_a_table(self):
+        """Test that no statement outside the allowlist does a full table or index scan."""
+        for module, sql in self.statements:
+            if sql in FULL_SCAN_ALLOWED:
+                continue
+            with self.subTest(module=module, sql=sql):
+                scans = [detail for detail in self.explain(sql) if detail.startswith("SCAN ")
+                         and detail != "SCAN CONSTANT ROW" and not VIRTUAL_TABLE_LOOKUP.search(detail)]
+                self.assertEqual(scans, [], f"{module}: full scan in {sql!r}")
+
+    def test_catalog_filters_use_indexes(self):
+        """
+        Test that every combination of catalog filters and sort order is either an index range
+        read or a walk of an index in the requested order, never a table scan followed by a sort.
+        """
+        filters = [(min_price, max_price, user_id, in_stock)
+                   for min_price in (None, 10.0) for max_price in (None, 50.0)
+                   for user_id in (None, 7) for in_stock in (False, True)]
+        for min_price, max_price, user_id, in_stock in filters:
+            for sort in PRODUCT_SORTS:
+                with self.subTest(min_price=min_price, max_price=max_price, user_id=user_id,
+                                  in_stock=in_stock, sort=sort):
+                    statements = []
+                    self.db.connection.set_trace_callback(statements.append)
+                    try:
+                        self.db.storage.filter_products(min_price, max_price, user_id, in_stock, sort, 20, 0)
+                    finally:
+                        self.db.connection.set_trace_callback(None)
+                    # The traced statement has its parameters inlined, so it can be explained as is.
+                    plan = self.explain(statements[-1])
+                    access = plan[0]
+                    sorted_separately = any("TEMP B-TREE" in detail for detail in plan)
+                    if access.startswith("SCAN "):
+                        self.assertFalse(sorted_separately, plan)
+                        self.assertTrue("USING INDEX" in access or sort == "newest", plan)
+                    else:
+                        self.assertRegex(access, r"^SEARCH products USING INDEX \w+ \(", plan)
+                    if user_id is None and max_price is not None and min_price is not None:
+                        self.assertTrue(access.startswith("SEARCH "), plan)
+
+    def test_batch_lookup_uses_the_primary_key(self):
+        """Test that `get_products` reads each product, its seller and its art by key."""
+        for include_ascii_art in (True, False):
+            with self.subTest(include_ascii_art=include_ascii_art):
+                statements = []
+                self.db.connection.set_trace_callback(statements.append)
+                try:
+                    self.db.storage.get_products([3, 1, 2], include_ascii_art)
+                finally:
+                    self.db.connection.set_trace_callback(None)
+                for detail in self.explain(statements[-1]):
+                    self.assertFalse(detail.startswith("SCAN "), detail)
+
+    def test_allowlist_is_current(self):
+        """Test that every allowlisted statement still exists in the code."""
+        sqls = {sql for _, sql in self.statements}
+        for sql in FULL_SCAN_ALLOWED:
+            self.assertIn(sql, sqls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,315 @@
+import unittest
+from ecommerce.db import get_db
+from ecommerce.memory import MemoryDatabase
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.cart import Cart
+from ecommerce.order import Order
+from ecommerce.storage import Storage
+
+
+class StorageContract:
+    """
+    Model-level behaviour every storage backend must share. Subclasses provide `make_db`.
+    """
+
+    def make_db(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        """Create a database with one seller and one product before each test."""
+        self.db = self.make_db()
+        User.register("seller", "password", self.db)
+        self.seller_id = User.get_user_id("seller", self.db)
+        Product.create_product("Lamp", 20.0, "A desk lamp", self.seller_id, db=self.db, ascii_art="(*)", quantity=5)
+        self.product_id = Product.get_products_by_user_id(self.seller_id, self.db)[0][0]
+
+    def tearDown(self):
+        """Close the database after each test."""
+        self.db.close()
+
+    def test_register_and_login(self):
+        """Test registration, duplicate usernames and password checks."""
+        User.register("alice", "secret", self.db)
+        self.assertTrue(User.login("alice", "secret", self.db))
+        with self.assertRaises(ValueError):
+            User.register("alice", "other", self.db)
+        with self.assertRaises(ValueError):
+            User.login("alice", "wrong", self.db)
+        with self.assertRaises(ValueError):
+            User.login("nobody", "secret", self.db)
+
+    def test_update_and_delete_user(self):
+        """Test renaming, changing the password of and deleting a user."""
+        User.register("alice", "secret", self.db)
+        with self.assertRaises(ValueError):
+            User.update_username("alice", "seller", self.db)
+        User.update_username("alice", "alicia", self.db)
+        User.update_password("alicia", "new", self.db)
+        self.assertTrue(User.login("alicia", "new", self.db))
+
+        User.delete_account("alicia", self.db)
+        with self.assertRaises(ValueError):
+            User.get_user_id("alicia", self.db)
+
+    def test_products(self):
+        """Test reading, updating and deleting products."""
+        self.assertEqual(Product.get_all_products(self.db),
+                         [(self.product_id, "Lamp", 20.0, "A desk lamp", self.seller_id, "(*)", 5)])
+        self.assertEqual(Product.get_product_by_id(self.product_id, self.db),
+                         (self.product_id, "Lamp", 20.0, "A desk lamp", "seller", "(*)", 5, self.seller_id))
+
+        Product.update_product(self.product_id, price=25.0, quantity=0, db=self.db)
+        product = Product.get_product_by_id(self.product_id, self.db)
+        self.assertEqual((product[1], product[2], product[6]), ("Lamp", 25.0, 0))
+
+        Product.delete_product(self.product_id, self.db)
+        self.assertIsNone(Product.get_product_by_id(self.product_id, self.db))
+
+    def test_summaries_and_lazy_ascii_art(self):
+        """Test that summary listings and detail reads leave the ASCII art out until asked for."""
+        summary = (self.product_id, "Lamp", 20.0, 5)
+        self.assertEqual(Product.get_all_products(self.db, summary=True), [summary])
+        self.assertEqual(Product.get_products_by_user_id(self.seller_id, self.db, summary=True), [summary])
+
+        product = Product.get_product_by_id(self.product_id, self.db, include_ascii_art=False)
+        self.assertEqual((product[3], product[5]), ("A desk lamp", None))
+        self.assertEqual(Product.get_ascii_art(self.product_id, self.db), "(*)")
+        self.assertIsNone(Product.get_ascii_art(self.product_id + 1, self.db))
+
+    def test_product_pages(self):
+        """Test walking the catalog page by page with keyset cursors."""
+        for i in range(6):
+            Product.create_product(f"Item {i}", 1.0 + i, "Description", self.seller_id, db=self.db, quantity=i)
+        Product.delete_product(self.product_id + 3, self.db)
+
+        first = Product.get_product_page(page_size=3, include_total=True, db=self.db)
+        self.assertEqual(first.total, 6)
+        self.assertEqual(first.products[0], (self.product_id, "Lamp", 20.0, 5))
+        second = Product.get_product_page(first.next_after_id, page_size=3, db=self.db)
+        self.assertIsNone(second.total)
+        self.assertIsNone(second.next_after_id)
+
+        ids = [row[0] for row in first.products + second.products]
+        self.assertEqual(ids, [self.product_id + i for i in (0, 1, 2, 4, 5, 6)])
+        with self.assertRaises(ValueError):
+            Product.get_product_page(page_size=0, db=self.db)
+
+    def test_search(self):
+        """Test word and prefix matching, ranking and index maintenance of product search."""
+        Product.create_product("Brass Floor Lamp", 90.0, "Tall and bright", self.seller_id, db=self.db, quantity=1)
+        Product.create_product("Reading Chair", 150.0, "Comes with a matching lamp", self.seller_id, db=self.db, quantity=2)
+        floor_lamp_id, chair_id = self.product_id + 1, self.product_id + 2
+
+        ids = [row[0] for row in Product.search("lamp", db=self.db)]
+        self.assertEqual(set(ids), {self.product_id, floor_lamp_id, chair_id})
+        self.assertEqual(ids[-1], chair_id)
+        self.assertEqual(Product.search("FLOOR lam", db=self.db), [(floor_lamp_id, "Brass Floor Lamp", 90.0, 1)])
+        self.assertEqual(len(Product.search("lamp", limit=2, offset=2, db=self.db)), 1)
+        self.assertEqual(Product.search("  -\"* ", db=self.db), [])
+
+        Product.update_product(chair_id, name="Reading Armchair", description="Soft", db=self.db)
+        Product.delete_product(floor_lamp_id, self.db)
+        self.assertEqual([row[0] for row in Product.search("lamp", db=self.db)], [self.product_id])
+        self.assertEqual([row[0] for row in Product.search("armchair", db=self.db)], [chair_id])
+        with self.assertRaises(ValueError):
+            Product.search("lamp", limit=0, db=self.db)
+
+    def test_browse(self):
+        """Test filtering the catalog by price, seller and stock, and each sort order."""
+        User.register("maker", "password", self.db)
+        maker_id = User.get_user_id("maker", self.db)
+        Product.create_product("Rug", 40.0, "A rug", maker_id, db=self.db, quantity=0)
+        Product.create_product("Chair", 20.0, "A chair", maker_id, db=self.db, quantity=2)
+        Product.create_product("Mug", 5.0, "A mug", self.seller_id, db=self.db, quantity=9)
+        lamp, rug, chair, mug = (self.product_id + i for i in range(4))
+
+        def ids(**filters):
+            return [row[0] for row in Product.browse(db=self.db, **filters)]
+
+        self.assertEqual(ids(), [mug, chair, rug, lamp])
+        self.assertEqual(ids(sort="price"), [mug, lamp, chair, rug])
+        self.assertEqual(ids(sort="price_desc"), [rug, chair, lamp, mug])
+        self.assertEqual(ids(sort="name"), [chair, lamp, mug, rug])
+        self.assertEqual(ids(min_price=20.0, max_price=30.0, sort="price"), [lamp, chair])
+        self.assertEqual(ids(seller_id=maker_id), [chair, rug])
+        self.assertEqual(ids(seller_id=maker_id, in_stock=True), [chair])
+        self.assertEqual(ids(in_stock=True, max_price=20.0, sort="name"), [chair, lamp, mug])
+        self.assertEqual(ids(sort="price", limit=2, offset=1), [lamp, chair])
+        self.assertEqual(Product.browse(min_price=40.0, db=self.db), [(rug, "Rug", 40.0, 0)])
+        for filters in ({"sort": "cheapest"}, {"min_price": -1}, {"min_price": 30.0, "max_price": 20.0},
+                        {"limit": 0}, {"offset": -1}):
+            with self.subTest(filters=filters):
+                with self.assertRaises(ValueError):
+                    Product.browse(db=self.db, **filters)
+
+    def test_rows_are_typed_records(self):
+        """Test that rows expose their columns by name and still compare equal to plain tuples."""
+        Cart(self.seller_id, self.db).add_product(self.product_id, 2)
+        self.assertEqual(Cart(self.seller_id, self.db).view_cart()[0].quantity, 2)
+        Cart(self.seller_id, self.db).checkout()
+        order = Order.get_orders_by_user(self.seller_id, self.db)[0]
+        self.assertEqual((order.total, order.status), (40.0, "pending"))
+
+        product = Product.get_product_by_id(self.product_id, self.db)
+        self.assertEqual((product.seller, product.ascii_art, product.user_id), ("seller", "(*)", self.seller_id))
+        self.assertEqual(Product.get_all_products(self.db)[0].description, "A desk lamp")
+        summary = Product.get_product_page(db=self.db).products[0]
+        self.assertEqual(summary, (self.product_id, "Lamp", 20.0, 3))
+        self.assertEqual(summary._fields, ("id", "name", "price", "quantity"))
+
+    def test_get_many(self):
+        """Test a batch lookup keeps the order of the IDs, reports missing ones and spans several queries."""
+        Product.create_product("Rug", 40.0, "A rug", self.seller_id, db=self.db)
+        rug_id = Product.get_products_by_user_id(self.seller_id, self.db)[1][0]
+
+        batch = Product.get_many([rug_id, 999, self.product_id, rug_id], self.db)
+
+        self.assertEqual(batch.products, [Product.get_product_by_id(rug_id, self.db, use_cache=False),
+                                          Product.get_product_by_id(self.product_id, self.db, use_cache=False)])
+        self.assertEqual(batch.missing, [999])
+        self.assertIsNone(Product.get_many([self.product_id], self.db, include_ascii_art=False).products[0].ascii_art)
+        self.assertEqual(Product.get_many([], self.db).products, [])
+
+        ids = list(range(1200, 0, -1))
+        batch = Product.get_many(ids, self.db, use_cache=False)
+        self.assertEqual([product.id for product in batch.products], [rug_id, self.product_id])
+        self.assertEqual(len(batch.missing), 1198)
+
+    def test_delete_products_by_user(self):
+        """Test deleting every product of a seller."""
+        Product.create_product("Rug", 40.0, "A rug", self.seller_id, db=self.db)
+        Product.delete_products_by_user(self.seller_id, self.db)
+        self.assertEqual(Product.get_all_products(self.db), [])
+
+    def test_cart_and_checkout(self):
+        """Test filling a cart, removing items and checking out."""
+        User.register("buyer", "password", self.db)
+        cart = Cart(User.get_user_id("buyer", self.db), db=self.db)
+        with self.assertRaises(ValueError):
+            cart.checkout()
+
+        Product.create_product("Rug", 40.0, "A rug", self.seller_id, db=self.db)
+        rug_id = Product.get_products_by_user_id(self.seller_id, self.db)[1][0]
+        cart.add_product(self.product_id, 1)
+        cart.add_product(self.product_id, 2)
+        cart.add_product(rug_id)
+        self.assertEqual(cart.view_cart(), [("Lamp", 20.0, 3, self.product_id), ("Rug", 40.0, 1, rug_id)])
+
+        cart.remove_product(rug_id)
+        cart.checkout()
+        self.assertEqual(cart.view_cart(), [])
+        orders = Order.get_orders_by_user(cart.user_id, self.db)
+        self.assertEqual([(order[2], order[3]) for order in orders], [(60.0, "pending")])
+
+    def test_checkout_records_order_items(self):
+        """Test that checkout writes one line per product and that order reads use them."""
+        User.register("buyer", "password", self.db)
+        buyer_id = User.get_user_id("buyer", self.db)
+        Product.create_product("Rug", 40.0, "A rug", self.seller_id, db=self.db, quantity=3)
+        rug_id = Product.get_products_by_user_id(self.seller_id, self.db)[1][0]
+        cart = Cart(buyer_id, db=self.db)
+        cart.add_product(self.product_id, 2)
+        cart.add_product(rug_id, 1)
+        order_id = cart.checkout()
+        Product.update_product(self.product_id, price=99.0, db=self.db)
+
+        order = Order.get_order_by_id(order_id, self.db)
+        self.assertEqual((order.total, order.status), (80.0, "pending"))
+        self.assertEqual(order.items, [(self.product_id, "Lamp", self.seller_id, "seller", 20.0, 2),
+                                       (rug_id, "Rug", self.seller_id, "seller", 40.0, 1)])
+        self.assertEqual(Order.get_units_sold(self.product_id, self.db), 2)
+
+        Order(buyer_id, self.db).cancel_order(order_id)
+        self.assertEqual(Order.get_units_sold(self.product_id, self.db), 0)
+        Order.delete_orders_by_user(buyer_id, self.db)
+        self.assertIsNone(Order.get_order_by_id(order_id, self.db))
+
+    def test_orders(self):
+        """Test creating, updating, canceling and deleting orders."""
+        order = Order(self.seller_id, db=self.db)
+        order.create_order("Lamp x1", 20.0)
+        order.create_order("Lamp x2", 40.0)
+        first, second = [row[0] for row in Order.get_orders_by_user(self.seller_id, self.db)]
+
+        order.update_order_status(first, "shipped")
+        order.cancel_order(first)
+        order.cancel_order(second)
+        Order(self.seller_id + 1, db=self.db).update_order_status(second, "shipped")
+        self.assertEqual([row[3] for row in Order.get_orders_by_user(self.seller_id, self.db)], ["shipped", "canceled"])
+        self.assertEqual(Order.get_order_by_id(first, self.db)[:4], (first, "Lamp x1", 20.0, "shipped"))
+
+        Order.delete_orders_by_user(self.seller_id, self.db)
+        self.assertEqual(Order.get_orders_by_user(self.seller_id, self.db), [])
+
+    def test_transaction_rolls_back(self):
+        """Test that a failed transaction undoes its writes and a failed nested block only its own."""
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                User.register("alice", "secret", self.db)
+                Product.delete_product(self.product_id, self.db)
+                raise RuntimeError("boom")
+
+        with self.db.transaction():
+            User.register("bob", "secret", self.db)
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    User.update_username("bob", "robert", self.db)
+                    raise RuntimeError("boom")
+
+        with self.assertRaises(ValueError):
+            User.get_user_id("alice", self.db)
+        self.assertIsNotNone(Product.get_product_by_id(self.product_id, self.db))
+        self.assertTrue(User.login("bob", "secret", self.db))
+
+
+class TestSQLiteStorage(StorageContract, unittest.TestCase):
+
+    def make_db(self):
+        return get_db(":memory:")
+
+    def stored_art(self):
+        """Return the number of distinct pieces of ASCII art stored."""
+        return self.db.fetchone("SELECT COUNT(*) FROM ascii_art")[0]
+
+    def test_ascii_art_is_stored_once_and_released(self):
+        """Test that identical art is stored once, compressed, and dropped with its last product."""
+        art = ("@" * 99 + "\n") * 40
+        Product.create_product("Rug", 40.0, "A rug", self.seller_id, db=self.db, ascii_art=art)
+        self.db.storage.insert_products([("Mug", 5.0, "A mug", self.seller_id, art, 1)] * 2)
+        rug_id, first_mug_id, second_mug_id = (self.product_id + i for i in (1, 2, 3))
+
+        self.assertEqual(self.stored_art(), 2)
+        self.assertLess(self.db.fetchone("SELECT MAX(LENGTH(data)) FROM ascii_art")[0], len(art) // 10)
+        self.assertEqual(Product.get_ascii_art(second_mug_id, self.db), art)
+
+        Product.update_product(self.product_id, ascii_art=art, db=self.db)
+        self.assertEqual(self.stored_art(), 1)
+        for product_id in (self.product_id, rug_id, first_mug_id):
+            Product.delete_product(product_id, self.db)
+        self.assertEqual(self.stored_art(), 1)
+        Product.delete_product(second_mug_id, self.db)
+        self.assertEqual(self.stored_art(), 0)
+
+
+class TestMemoryStorage(StorageContract, unittest.TestCase):
+
+    def make_db(self):
+        return MemoryDatabase()
+
+
+class TestStorageInterface(unittest.TestCase):
+
+    def test_incomplete_backend_cannot_be_created(self):
+        """Test that a backend missing an operation fails when it is created, not on first use."""
+        class PartialStorage(Storage):
+            def insert_user(self, username, password_hash):
+                return 1
+
+        with self.assertRaises(TypeError) as e:
+            PartialStorage()
+        self.assertIn("get_user_id", str(e.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from ecommerce.db import get_db, close_pools
+from ecommerce.user import User
+from ecommerce.product import Product
+from ecommerce.cart import Cart
+from ecommerce.order import Order
+
+THREADS = 8
+ROUNDS = 25
+
+
+class TestThreadSafety(unittest.TestCase):
+
+    def setUp(self):
+        """Create a temporary database with one seller and a product for each test."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmpdir.name, "test.db")
+        self.db = get_db(self.db_name)
+        User.register("seller", "password", self.db)
+        self.seller_id = User.get_user_id("seller", self.db)
+        Product.create_product("Hot Product", 5.0, "Popular", self.seller_id, db=self.db, quantity=1000)
+        self.product_id = self.db.fetchone("SELECT id FROM products")[0]
+
+    def tearDown(self):
+        """Close the database and pools and remove the temporary files."""
+        self.db.close()
+        close_pools()
+        self.tmpdir.cleanup()
+
+    def shop(self, db, worker):
+        """Register a buyer, fill their cart over several rounds, browse and check out."""
+        username = f"buyer{worker}"
+        User.register(username, "password", db)
+        user_id = User.get_user_id(username, db)
+        cart = Cart(user_id, db=db)
+        for _ in range(ROUNDS):
+            cart.add_product(self.product_id, 1)
+            Product.get_all_products(db)
+            Product.create_product(f"Item {worker}", 1.0, "Stress", user_id, db=db, quantity=1)
+        self.assertEqual(cart.view_cart()[0][2], ROUNDS)
+        cart.checkout()
+        return user_id
+
+    def assert_consistent(self, user_ids):
+        """Check that every worker's writes landed exactly once."""
+        self.assertEqual(len(set(user_ids)), THREADS)
+        self.assertEqual(self.db.fetchone("SELECT COUNT(*) FROM carts")[0], 0)
+        self.assertEqual(self.db.fetchone("SELECT COUNT(*) FROM products")[0], 1 + THREADS * ROUNDS)
+        for user_id in user_ids:
+            orders = Order.get_orders_by_user(user_id, self.db)
+            self.assertEqual(len(orders), 1)
+            self.assertEqual(orders[0][2], 5.0 * ROUNDS)
+
+    def test_shared_database_across_threads(self):
+        """Test hammering the models from many threads through one shared Database."""
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            user_ids = list(executor.map(lambda worker: self.shop(self.db, worker), range(THREADS)))
+
+        self.assert_consistent(user_ids)
+
+    def test_pooled_connection_per_thread(self):
+        """Test hammering the models from many threads, each with its own pooled connection."""
+        def work(worker):
+            db = get_db(self.db_name)
+            try:
+                return self.shop(db, worker)
+            finally:
+                db.close()
+
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            user_ids = list(executor.map(work, range(THREADS)))
+
+        self.assert_consistent(user_ids)
+
+    def test_nested_query_does_not_clobber_results(self):
+        """Test that a query issued while iterating another keeps both result sets intact."""
+        for i in range(3):
+            User.register(f"user{i}", "password", self.db)
+
+        seen = []
+        for (username,) in self.db.execute("SELECT username FROM users ORDER BY id"):
+            seen.append((username, User.get_user_id(username, self.db)))
+
+        self.assertEqual([name for name, _ in seen], ["seller", "user0", "user1", "user2"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -19,7 +19,7 @@ def view_cart(logged_in_user):
     cart_items = cart.view_cart()
 
     if cart_items:
-        product_list = [(str(item[3]), f"{item[0]} - ${item[1]} (x{item[2]})") for item in cart_items]
+        product_list = [(str(item.product_id), f"{item.name} - ${item.price} (x{item.quantity})") for item in cart_items]
         product_list.append(("checkout", "Proceed to Checkout"))
 
         action = radiolist_dialog(
@@ -34,18 +34,18 @@ def view_cart(logged_in_user):
         elif action is not None:
             selected_product_id = int(action)
 
-            selected_item = next(item for item in cart_items if item[3] == selected_product_id)
+            selected_item = next(item for item in cart_items if item.product_id == selected_product_id)
 
             confirmation = yes_no_dialog(
                 title="Confirm Removal",
-                text=f"Are you sure you want to remove {selected_item[0]} from your cart?"
+                text=f"Are you sure you want to remove {selected_item.name} from your cart?"
             ).run()
 
             if confirmation:
                 cart.remove_product(selected_product_id) 
                 button_dialog(
                     title="Success",
-                    text=f"{selected_item[0]} removed from your cart.",
+                    text=f"{selected_item.name} removed from your cart.",
                     buttons=[("OK", True)]
                 ).run()
 
@@ -70,28 +70,23 @@ def checkout(logged_in_user):
     """
     user_id = User.get_user_id(logged_in_user)
     cart = Cart(user_id)
-    cart_items = cart.view_cart()
-
-    if cart_items:
-        order_details = "\n".join([f"{item[0]} (x{item[2]}) - ${item[1] * item[2]}" for item in cart_items])
-        total = sum([item[1] * item[2] for item in cart_items])
-
-        order = Order(user_id)
-        order.create_order(order_details, total)
-
-        cart.clear_cart()
 
-        button_dialog(
-            title="Checkout",
-            text="Order placed successfully! Your order is now pending.",
-            buttons=[("OK", True)]
-        ).run()
-    else:
+    try:
+        cart.checkout()
+    except ValueError as e:
+        # An empty cart, or a product that sold out since it was added (`OutOfStockError`).
         button_dialog(
             title="Error",
-            text="Your cart is empty. Please add products before checkout.",
+            text=str(e),
             buttons=[("OK", True)]
         ).run()
+        return
+
+    button_dialog(
+        title="Checkout",
+        text="Order placed successfully! Your order is now pending.",
+        buttons=[("OK", True)]
+    ).run()
 
 def view_orders(logged_in_user):
     """
@@ -108,7 +103,7 @@ def view_orders(logged_in_user):
     order = Order(user_id)
     orders = order.get_orders_by_user(user_id)
     if orders:
-        order_list = [(str(order[0]), f"Order ID: {order[0]} - Status: {order[3]}") for order in orders]
+        order_list = [(str(order.id), f"Order ID: {order.id} - Status: {order.status}") for order in orders]
 
         order_selected = radiolist_dialog(
             title="Order List",
@@ -118,15 +113,22 @@ def view_orders(logged_in_user):
         ).run()
 
         if order_selected is not None:
-            selected_order = next(o for o in orders if str(o[0]) == order_selected)
-            order_details = (f"Order ID: {selected_order[0]}\n"
-                             f"Details: {selected_order[1]}\n"
-                             f"Total: ${selected_order[2]}\n"
-                             f"Status: {selected_order[3]}")
+            selected_order = Order.get_order_by_id(int(order_selected), order.db)
+            if selected_order.items:
+                details = "\n".join(f"  {item.product_name} (x{item.quantity}) - ${item.unit_price} each, "
+                                     f"sold by {item.seller_name or 'a former seller'}"
+                                     for item in selected_order.items)
+            else:
+                # Orders without lines: made with `create_order`, or old text the migration could not parse.
+                details = selected_order.order_details
+            order_details = (f"Order ID: {selected_order.id}\n"
+                             f"Items:\n{details}\n"
+                             f"Total: ${selected_order.total}\n"
+                             f"Status: {selected_order.status}")
 
             buttons = [("Back", True)]
 
-            if selected_order[3] == "pending":
+            if selected_order.status == "pending":
                 buttons.append(("Cancel Order", "cancel"))
 
             action = button_dialog(
@@ -142,7 +144,7 @@ def view_orders(logged_in_user):
                 ).run()
 
                 if confirmation:
-                    order.cancel_order(selected_order[0])
+                    order.cancel_order(selected_order.id)
                     button_dialog(
                         title="Success",
                         text="Your order has been canceled.",
@@ -1,4 +1,4 @@
-from ecommerce.product import Product
+from ecommerce.product import DEFAULT_PAGE_SIZE, Product
 from ecommerce.cart import Cart
 from prompt_toolkit.shortcuts import input_dialog, yes_no_dialog, button_dialog, radiolist_dialog
 from ecommerce.user import User
@@ -95,8 +95,8 @@ def create_product(logged_in_user):
 
 def view_products(logged_in_user):
     """
-    Displays the list of products and allows the user to view details, update, or delete them if they are the creator.
-    Also shows an option to add the product to the cart if it's not created by the logged-in user.
+    Displays the list of products one page at a time and allows the user to view details, update, or delete them
+    if they are the creator. Also shows an option to add the product to the cart if it's not created by the logged-in user.
     
     Args:
         logged_in_user (str): The username of the logged-in user.
@@ -104,92 +104,43 @@ def view_products(logged_in_user):
     Returns:
         None
     """
-    products = Product.get_all_products()
-    
-    if products:
-        product_list = [(str(p[0]), HTML(f'{p[1]} - ${p[2]} (Quantity: {p[6]})')) for p in products]  
-        
+    cursors = [0]
+    page = Product.get_product_page(include_total=True)
+    total = page.total
+    product_selected = None
+
+    while page.products:
+        product_list = [(str(p.id), HTML(f'{p.name} - ${p.price} (Quantity: {p.quantity})')) for p in page.products]
+        if page.next_after_id is not None:
+            product_list.append(("next_page", "Next page >"))
+        if len(cursors) > 1:
+            product_list.append(("previous_page", "< Previous page"))
+        page_count = (total + DEFAULT_PAGE_SIZE - 1) // DEFAULT_PAGE_SIZE
+
         product_selected = radiolist_dialog(
             title="Product List",
-            text="Available products:\n\nSelect a product to view details:",
-            values=product_list,  
+            text=f"Available products (page {len(cursors)} of {page_count}):\n\nSelect a product to view details:",
+            values=product_list,
             cancel_text="Back"
         ).run()
 
-        if product_selected is not None:  
-            product = Product.get_product_by_id(int(product_selected))
-            if product:
-                creator = product[4]  
-                ascii_art = product[5] if product[5] is not None else "No ASCII art available."
-                quantity = product[6]   
-
-                product_details = (f"Name: {product[1]}\n"
-                                   f"Price: ${product[2]}\n"
-                                   f"Description: {product[3]}\n"
-                                   f"Quantity: {quantity}\n"
-                                   f"Created by: {creator}")
-
-                if creator == logged_in_user:
-                    action = button_dialog(
-                        title="Product Details",
-                        text=f"{product_details}\n\nWhat would you like to do?",
-                        buttons=[("Update", "update"), ("Delete", "delete"), ("View Image", "view_image"), ("Back", None)]
-                    ).run()
-
-                    if action == "update":
-                        update_product(int(product_selected)) 
-                    elif action == "delete":
-                        delete_product(int(product_selected))
-                    elif action == "view_image":
-                        view_ascii_art(ascii_art)
-                else:
-                    if quantity == 0:
-                        button_dialog(
-                            title="Product Unavailable",
-                            text="This product is currently unavailable.",
-                            buttons=[("OK", True)]
-                        ).run()
-                    else:
-                        action = button_dialog(
-                            title="Product Details",
-                            text=f"{product_details}",
-                            buttons=[("Add to Cart", "add_to_cart"), ("View Image", "view_image"), ("Back", True)]
-                        ).run()
-
-                        if action == "add_to_cart":
-                            while True:
-                                quantity_to_add = input_dialog(
-                                    title="Add to Cart",
-                                    text=f"Enter the quantity to add (Available: {quantity}): "
-                                ).run()
+        if product_selected == "next_page":
+            next_page = Product.get_product_page(page.next_after_id)
+            if next_page.products:
+                cursors.append(page.next_after_id)
+                page = next_page
+            else:
+                # The products after this page were deleted since it was listed: stay on it.
+                page = Product.get_product_page(cursors[-1])
+        elif product_selected == "previous_page":
+            cursors.pop()
+            page = Product.get_product_page(cursors[-1])
+        else:
+            break
 
-                                try:
-                                    quantity_to_add = int(quantity_to_add)
-                                    if 0 < quantity_to_add <= quantity:
-                                        user_id = User.get_user_id(logged_in_user)
-                                        cart = Cart(user_id)
-                                        cart.add_product(int(product_selected), quantity_to_add)
-                                        button_dialog(
-                                            title="Success",
-                                            text=f"Added {quantity_to_add} of {product[1]} to the cart.",
-                                            buttons=[("OK", True)]
-                                        ).run()
-                                        break
-                                    else:
-                                        button_dialog(
-                                            title="Error",
-                                            text="Invalid quantity. Please enter a number between 1 and the available quantity.",
-                                            buttons=[("OK", True)]
-                                        ).run()
-                                except ValueError:
-                                    button_dialog(
-                                        title="Error",
-                                        text="Invalid input. Please enter a valid integer.",
-                                        buttons=[("OK", True)]
-                                    ).run()
-
-                        elif action == "view_image":
-                            view_ascii_art(ascii_art)
+    if page.products:
+        if product_selected is not None:
+            view_product_details(logged_in_user, int(product_selected))
     else:
         button_dialog(
             title="No Products",
@@ -197,6 +148,234 @@ def view_products(logged_in_user):
             buttons=[("OK", True)]
         ).run()
 
+def search_products(logged_in_user):
+    """
+    Asks for search words and lists the best matching products one page at a time. Selecting a product
+    shows its details.
+
+    Args:
+        logged_in_user (str): The username of the logged-in user.
+
+    Returns:
+        None
+    """
+    query = input_dialog(
+        title="Search Products",
+        text="Enter words to search for in product names and descriptions:"
+    ).run()
+    if not query:
+        return
+
+    offset = 0
+    while True:
+        # Fetch one extra match to know whether there is a next page.
+        results = Product.search(query, limit=DEFAULT_PAGE_SIZE + 1, offset=offset)
+        if not results and offset == 0:
+            button_dialog(
+                title="No Products",
+                text=f"No products match '{query}'.",
+                buttons=[("OK", True)]
+            ).run()
+            return
+
+        product_list = [(str(p.id), HTML(f'{p.name} - ${p.price} (Quantity: {p.quantity})')) for p in results[:DEFAULT_PAGE_SIZE]]
+        if len(results) > DEFAULT_PAGE_SIZE:
+            product_list.append(("next_page", "Next page >"))
+        if offset > 0:
+            product_list.append(("previous_page", "< Previous page"))
+
+        product_selected = radiolist_dialog(
+            title="Search Results",
+            text=f"Products matching '{query}':\n\nSelect a product to view details:",
+            values=product_list,
+            cancel_text="Back"
+        ).run()
+
+        if product_selected == "next_page":
+            offset += DEFAULT_PAGE_SIZE
+        elif product_selected == "previous_page":
+            offset -= DEFAULT_PAGE_SIZE
+        else:
+            break
+
+    if product_selected is not None:
+        view_product_details(logged_in_user, int(product_selected))
+
+def filter_products(logged_in_user):
+    """
+    Asks for a price range, whether to show only products in stock, and a sort order, then lists the matching
+    products one page at a time. Selecting a product shows its details.
+
+    Args:
+        logged_in_user (str): The username of the logged-in user.
+
+    Returns:
+        None
+    """
+    sort = radiolist_dialog(
+        title="Filter Products",
+        text="Sort products by:",
+        values=[("newest", "Newest first"), ("price", "Price: low to high"),
+                ("price_desc", "Price: high to low"), ("name", "Name")],
+        cancel_text="Back"
+    ).run()
+    if sort is None:
+        return
+
+    prices = []
+    for bound in ("minimum", "maximum"):
+        while True:
+            price = input_dialog(
+                title="Filter Products",
+                text=f"Enter the {bound} price (USD), or leave blank for none:"
+            ).run()
+            if price is None:
+                return
+            try:
+                prices.append(float(price) if price.strip() else None)
+                break
+            except ValueError:
+                button_dialog(
+                    title="Error",
+                    text="Invalid price. Please enter a valid number.",
+                    buttons=[("OK", True)]
+                ).run()
+    min_price, max_price = prices
+
+    in_stock = yes_no_dialog(
+        title="Filter Products",
+        text="Show only products in stock?"
+    ).run()
+
+    offset = 0
+    while True:
+        try:
+            # Fetch one extra product to know whether there is a next page.
+            results = Product.browse(min_price, max_price, in_stock=in_stock, sort=sort,
+                                     limit=DEFAULT_PAGE_SIZE + 1, offset=offset)
+        except ValueError as e:
+            button_dialog(
+                title="Error",
+                text=str(e),
+                buttons=[("OK", True)]
+            ).run()
+            return
+        if not results and offset == 0:
+            button_dialog(
+                title="No Products",
+                text="No products match these filters.",
+                buttons=[("OK", True)]
+            ).run()
+            return
+
+        product_list = [(str(p.id), HTML(f'{p.name} - ${p.price} (Quantity: {p.quantity})')) for p in results[:DEFAULT_PAGE_SIZE]]
+        if len(results) > DEFAULT_PAGE_SIZE:
+            product_list.append(("next_page", "Next page >"))
+        if offset > 0:
+            product_list.append(("previous_page", "< Previous page"))
+
+        product_selected = radiolist_dialog(
+            title="Filtered Products",
+            text="Matching products:\n\nSelect a product to view details:",
+            values=product_list,
+            cancel_text="Back"
+        ).run()
+
+        if product_selected == "next_page":
+            offset += DEFAULT_PAGE_SIZE
+        elif product_selected == "previous_page":
+            offset -= DEFAULT_PAGE_SIZE
+        else:
+            break
+
+    if product_selected is not None:
+        view_product_details(logged_in_user, int(product_selected))
+
+def view_product_details(logged_in_user, product_id):
+    """
+    Displays one product and the actions available on it: update, delete or view the image for its creator,
+    add to cart or view the image for everyone else.
+
+    Args:
+        logged_in_user (str): The username of the logged-in user.
+        product_id (int): The ID of the product to display.
+
+    Returns:
+        None
+    """
+    product = Product.get_product_by_id(product_id, include_ascii_art=False)
+    if product:
+        creator = product.seller
+        quantity = product.quantity
+
+        product_details = (f"Name: {product.name}\n"
+                           f"Price: ${product.price}\n"
+                           f"Description: {product.description}\n"
+                           f"Quantity: {quantity}\n"
+                           f"Created by: {creator}")
+
+        if creator == logged_in_user:
+            action = button_dialog(
+                title="Product Details",
+                text=f"{product_details}\n\nWhat would you like to do?",
+                buttons=[("Update", "update"), ("Delete", "delete"), ("View Image", "view_image"), ("Back", None)]
+            ).run()
+
+            if action == "update":
+                update_product(product_id) 
+            elif action == "delete":
+                delete_product(product_id)
+            elif action == "view_image":
+                view_ascii_art(Product.get_ascii_art(product_id) or "No ASCII art available.")
+        else:
+            if quantity == 0:
+                button_dialog(
+                    title="Product Unavailable",
+                    text="This product is currently unavailable.",
+                    buttons=[("OK", True)]
+                ).run()
+            else:
+                action = button_dialog(
+                    title="Product Details",
+                    text=f"{product_details}",
+                    buttons=[("Add to Cart", "add_to_cart"), ("View Image", "view_image"), ("Back", True)]
+                ).run()
+
+                if action == "add_to_cart":
+                    while True:
+                        quantity_to_add = input_dialog(
+                            title="Add to Cart",
+                            text=f"Enter the quantity to add (Available: {quantity}): "
+                        ).run()
+
+                        try:
+                            quantity_to_add = int(quantity_to_add)
+                            if 0 < quantity_to_add <= quantity:
+                                user_id = User.get_user_id(logged_in_user)
+                                cart = Cart(user_id)
+                                cart.add_product(product_id, quantity_to_add)
+                                button_dialog(
+                                    title="Success",
+                                    text=f"Added {quantity_to_add} of {product.name} to the cart.",
+                                    buttons=[("OK", True)]
+                                ).run()
+                                break
+                            else:
+                                button_dialog(
+                                    title="Error",
+                                    text="Invalid quantity. Please enter a number between 1 and the available quantity.",
+                                    buttons=[("OK", True)]
+                                ).run()
+                        except ValueError:
+                            button_dialog(
+                                title="Error",
+                                text="Invalid input. Please enter a valid integer.",
+                                buttons=[("OK", True)]
+                            ).run()
+
+                elif action == "view_image":
+                    view_ascii_art(Product.get_ascii_art(product_id) or "No ASCII art available.")
+
 def update_product(product_id):
     """
     Allows the user to update a product's name, price, description, quantity, and ASCII art.
@@ -315,12 +494,12 @@ def view_my_products(logged_in_user):
         None
     """
     user_id = User.get_user_id(logged_in_user)
-    products = Product.get_products_by_user_id(user_id)
+    products = Product.get_products_by_user_id(user_id, summary=True)
 
     options = [("create_product", "Create New Product")]
 
     if products:
-        product_list = [(str(p[0]), HTML(f'{p[1]} - ${p[2]} (Quantity: {p[6]})')) for p in products]
+        product_list = [(str(p.id), HTML(f'{p.name} - ${p.price} (Quantity: {p.quantity})')) for p in products]
         options.extend(product_list)
 
     product_selected = radiolist_dialog(
@@ -333,14 +512,13 @@ def view_my_products(logged_in_user):
     if product_selected == "create_product":
         create_product(logged_in_user)
     elif product_selected is not None:
-        product = Product.get_product_by_id(int(product_selected))
+        product = Product.get_product_by_id(int(product_selected), include_ascii_art=False)
         if product:
-            ascii_art = product[5] if product[5] is not None else "No ASCII art available."
-            quantity = product[6]
+            quantity = product.quantity
 
-            product_details = (f"Name: {product[1]}\n"
-                               f"Price: ${product[2]}\n"
-                               f"Description: {product[3]}\n"
+            product_details = (f"Name: {product.name}\n"
+                               f"Price: ${product.price}\n"
+                               f"Description: {product.description}\n"
                                f"Quantity: {quantity}\n")
 
             action = button_dialog(
@@ -354,4 +532,4 @@ def view_my_products(logged_in_user):
             elif action == "delete":
                 delete_product(int(product_selected))
             elif action == "view_image":
-                view_ascii_art(ascii_art)
\ No newline at end of file
+                view_ascii_art(Product.get_ascii_art(int(product_selected)) or "No ASCII art available.")
\ No newline at end of file
@@ -16,6 +16,8 @@ def show_main_menu(logged_in_user):
     if logged_in_user:
         options = [
             ("market_products", "Market Products"),  
+            ("search_products", "Search Products"),
+            ("filter_products", "Filter Products"),
             ("my_products", "My Products"),         
             ("view_cart", "View Cart"),
             ("view_orders", "View Orders"),
@@ -1,3 +1,4 @@
+from ecommerce.db import get_db
 from ecommerce.user import User
 from ecommerce.product import Product
 from ecommerce.cart import Cart
@@ -281,14 +282,17 @@ def delete_account(logged_in_user):
     ).run()
 
     if confirmation:
-        user_id = User.get_user_id(logged_in_user)
-        Product.delete_products_by_user(user_id)  
+        db = get_db()
+        with db.transaction():
+            user_id = User.get_user_id(logged_in_user, db)
+            Product.delete_products_by_user(user_id, db)
 
-        Cart.clear_cart_by_user(user_id) 
+            Cart.clear_cart_by_user(user_id, db)
 
-        Order.delete_orders_by_user(user_id)  
+            Order.delete_orders_by_user(user_id, db)
 
-        User.delete_account(logged_in_user)  
+            User.delete_account(logged_in_user, db)
+        db.close()
 
         button_dialog(
             title="Success",